@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class PizzamanagerConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'PizzaManager'
+
+    def ready(self):
+        # Connects the cache invalidation signal handlers, the SQLite connection tuning and the query timer.
+        from . import database, signals, timing
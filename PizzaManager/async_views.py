@@ -0,0 +1,154 @@
+"""
+Async versions of the read-heavy views, routed in place of the synchronous ones when `ASYNC_VIEWS` is on (the
+default under `PizzaShop/asgi.py`).
+
+They share templates, caching, pagination and conditional GET handling with `views.py`, but wait on the database
+through Django's async ORM API, so one ASGI worker keeps serving other requests while a query is in flight.
+"""
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.paginator import InvalidPage, Paginator
+from django.http import Http404, HttpResponse
+from django.shortcuts import render
+
+from . import views
+from .caching import ROW_VERSIONS, getCached, pageCacheKey, rowTagVersions, setCached, tagVersions
+from .menu_io import aiterMenuExport
+from .models import Topping, Pizza
+from .pagination import InvalidCursor, KeysetPage, akeysetPage
+from .versioning import aconditionalGetResponse, csrfSalt, pizzaEditorVersionNames, setConditionalHeaders
+
+async def index(request):
+    """
+    Async version of `views.index`.
+    """
+    return render(request, "PizzaManager/landing_page.html")
+
+async def toppings_overview(request):
+    """
+    Async version of `views.ToppingsOverview`.
+    """
+    return await renderOverview(request, views.ToppingsOverview())
+
+async def pizza_overview(request):
+    """
+    Async version of `views.PizzaOverview`.
+    """
+    if settings.MENU_SNAPSHOT:
+        # Served from memory without waiting on the database, apart from the odd refresh.
+        return await sync_to_async(views.PizzaOverview.as_view())(request)
+    return await renderOverview(request, views.PizzaOverview())
+
+async def menu_export(request):
+    """
+    Async version of `views.menu_export`, which reads the menu one page of rows at a time as it is sent.
+    """
+    menu_format = views.menuExportFormat(request)
+    return views.createMenuExportReply(aiterMenuExport(menu_format), menu_format)
+
+async def pizza_editor(request, pizza_id):
+    """
+    Async version of the `views.pizza_editor` GET path. Changes are passed on to the synchronous view.
+    """
+    if request.method != 'GET':
+        return await sync_to_async(views.pizza_editor)(request, pizza_id)
+
+    not_modified, validators = await aconditionalGetResponse(
+        request, pizzaEditorVersionNames(pizza_id), csrfSalt(request)
+    )
+    if not_modified is not None:
+        return not_modified
+
+    try:
+        pizza = await Pizza.objects.prefetch_related("toppings").aget(pk=pizza_id)
+    except Pizza.DoesNotExist:
+        raise Http404("No Pizza matches the given query.")
+    toppings_list = None
+    if not settings.TOPPING_TYPEAHEAD:
+        toppings_list = [topping async for topping in Topping.objects.all()]
+    return setConditionalHeaders(render(request, "PizzaManager/pizza_editor.html",
+                    {
+                      "pizza": pizza,
+                      "toppings_list": toppings_list,
+                      "topping_typeahead": settings.TOPPING_TYPEAHEAD,
+                    }
+                  ), validators)
+
+async def renderOverview(request, view) -> HttpResponse:
+    """
+    Helper method serving one page of an overview the way its ListView would, but through the async ORM.
+    @param request: The GET request.
+    @param view: An instance of the synchronous overview view, used for its queryset, template, page size and cache
+    settings.
+    @return An HttpResponse with the rendered page, or a 304 if the client already holds it.
+    """
+    view.setup(request)
+    not_modified, validators = await aconditionalGetResponse(request, view.version_names)
+    if not_modified is not None:
+        return not_modified
+
+    caching = view.usesPageCache()
+    if caching:
+        key = pageCacheKey(request)
+        content = getCached(key)
+        if content is not None:
+            return setConditionalHeaders(HttpResponse(content), validators)
+        versions = tagVersions(view.cache_tags)
+
+    context = await paginateOverview(request, view, view.get_queryset())
+    if caching:
+        row_versions = rowTagVersions(view.get_cache_tags(context))
+        context[ROW_VERSIONS] = row_versions
+    response = render(request, view.template_name, context)
+    if caching and row_versions is not None:
+        setCached(key, response.content, dict(row_versions, **versions))
+    return setConditionalHeaders(response, validators)
+
+async def paginateOverview(request, view, queryset) -> dict:
+    """
+    Helper method building the template context of an overview page, matching what `ListView` provides.
+    @param request: The GET request, carrying `page` or `cursor`.
+    @param view: The synchronous overview view, with `topping_filters` set when it is the pizza overview.
+    @param queryset: The ordered rows the overview lists.
+    @return The template context.
+    """
+    if view.usesKeysetPagination():
+        try:
+            items, next_cursor, previous_cursor = await akeysetPage(
+                queryset, view.paginate_by, request.GET.get("cursor") or None
+            )
+        except InvalidCursor:
+            raise Http404("Invalid cursor.")
+        paginator = None
+        page = KeysetPage(items, next_cursor, previous_cursor)
+        is_paginated = page.has_next() or page.has_previous()
+    else:
+        paginator = Paginator(queryset, view.paginate_by)
+        # Paginator counts synchronously, so its count is filled in from the async ORM first.
+        paginator.count = await queryset.acount()
+        page_number = request.GET.get("page") or 1
+        if page_number == "last":
+            page_number = paginator.num_pages
+        try:
+            page = paginator.page(page_number)
+        except InvalidPage:
+            raise Http404("Invalid page.")
+        page.object_list = [item async for item in page.object_list]
+        items = page.object_list
+        is_paginated = paginator.num_pages > 1
+
+    context = {
+        "paginator": paginator,
+        "page_obj": page,
+        "is_paginated": is_paginated,
+        "object_list": items,
+        view.context_object_name: items,
+        "view": view,
+        "keyset_pagination": view.usesKeysetPagination(),
+    }
+    topping_filters = getattr(view, "topping_filters", None)
+    if topping_filters is not None:
+        # As `views.PizzaOverview.get_context_data` adds, so filtered pages keep their filters and summary.
+        context["filter_query"] = views.toppingFilterQuery(topping_filters)
+        context["filter_summary"] = await sync_to_async(views.toppingFilterSummary)(topping_filters)
+    return context
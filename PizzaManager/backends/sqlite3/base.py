@@ -0,0 +1,21 @@
+"""
+SQLite backend that starts transactions with `BEGIN IMMEDIATE`.
+
+Django's backend starts them with a plain `BEGIN`, which only takes the write lock at the first write. If another
+connection has written in the meantime SQLite cannot upgrade the lock and fails at once with "database is locked",
+ignoring `busy_timeout`. Taking the write lock up front lets the transaction wait its turn instead. Set
+DJANGO_SQLITE_TRANSACTION_MODE to "DEFERRED" to go back to Django's behaviour.
+"""
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.sqlite3 import base
+
+TRANSACTION_MODES = ("DEFERRED", "IMMEDIATE", "EXCLUSIVE")
+
+class DatabaseWrapper(base.DatabaseWrapper):
+
+    def _start_transaction_under_autocommit(self):
+        transaction_mode = (getattr(settings, "SQLITE_TRANSACTION_MODE", "") or "DEFERRED").upper()
+        if transaction_mode not in TRANSACTION_MODES:
+            raise ImproperlyConfigured("SQLITE_TRANSACTION_MODE must be one of " + ", ".join(TRANSACTION_MODES))
+        self.cursor().execute("BEGIN " + transaction_mode)
@@ -0,0 +1,95 @@
+"""
+Changes that touch many pizza to topping links at once: putting a topping on, or taking it off, every pizza matching
+a filter, and cloning a pizza with its toppings.
+
+Each change is one `INSERT ... SELECT` or `DELETE` on the pizza to topping table inside a transaction, so its cost
+does not grow with the number of pizzas beyond the rows the database itself writes. These statements send no model
+signals, so the version counters and cache are updated here instead.
+"""
+from django.db import connection, transaction
+
+from .caching import MENU_TAG, invalidateTags
+from .models import Pizza
+from .versioning import MENU_VERSION, TOPPINGS_VERSION, bumpVersions, pizzaVersionName
+
+def matchingPizzas(name_contains : str = ""):
+    """
+    Helper method selecting the pizzas a bulk change applies to.
+    @param name_contains: Only pizzas whose name contains this text, ignoring case. Blank matches every pizza.
+    @return A queryset of the matching pizzas.
+    """
+    pizzas = Pizza.objects.all()
+    if name_contains.strip():
+        pizzas = pizzas.filter(name__icontains=name_contains.strip())
+    return pizzas
+
+def _linkTable() -> tuple:
+    """
+    Helper method naming the pizza to topping table and its two columns, quoted for raw SQL.
+    """
+    through = Pizza.toppings.through
+    quote = connection.ops.quote_name
+    return (
+        quote(through._meta.db_table),
+        quote(through._meta.get_field("pizza").column),
+        quote(through._meta.get_field("topping").column),
+    )
+
+def applyTopping(topping, pizzas) -> int:
+    """
+    Helper method putting `topping` on every pizza in `pizzas` that does not have it yet, in one statement.
+    @param topping: The topping to add.
+    @param pizzas: A queryset of the pizzas to add it to, such as one from `matchingPizzas`.
+    @return The number of pizzas the topping was added to.
+    """
+    table, pizza_column, topping_column = _linkTable()
+    pizzas_sql, pizzas_params = pizzas.order_by().values("id").query.sql_with_params()
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "INSERT INTO " + table + " (" + pizza_column + ", " + topping_column + ") "
+                "SELECT matching.id, %s FROM (" + pizzas_sql + ") matching "
+                "WHERE NOT EXISTS (SELECT 1 FROM " + table + " link "
+                "WHERE link." + pizza_column + " = matching.id AND link." + topping_column + " = %s)",
+                (topping.pk, *pizzas_params, topping.pk),
+            )
+            added = cursor.rowcount
+        # Every pizza editor depends on the topping list version, which covers each pizza that changed.
+        bumpVersions(MENU_VERSION, TOPPINGS_VERSION)
+    invalidateTags(MENU_TAG)
+    return added
+
+def removeTopping(topping, pizzas) -> int:
+    """
+    Helper method taking `topping` off every pizza in `pizzas`, in one statement.
+    @param topping: The topping to remove.
+    @param pizzas: A queryset of the pizzas to remove it from, such as one from `matchingPizzas`.
+    @return The number of pizzas the topping was removed from.
+    """
+    with transaction.atomic():
+        removed, _ = Pizza.toppings.through.objects.filter(
+            topping_id=topping.pk, pizza_id__in=pizzas.order_by().values("id")
+        ).delete()
+        bumpVersions(MENU_VERSION, TOPPINGS_VERSION)
+    invalidateTags(MENU_TAG)
+    return removed
+
+def clonePizza(pizza, clone):
+    """
+    Helper method copying every topping of `pizza` onto `clone` in one statement.
+    @param pizza: The pizza to copy from.
+    @param clone: The newly saved pizza, with no toppings yet, to copy to. Save it in the same transaction so a
+    failed copy leaves no empty pizza behind.
+    @return The `clone`.
+    """
+    table, pizza_column, topping_column = _linkTable()
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "INSERT INTO " + table + " (" + pizza_column + ", " + topping_column + ") "
+                "SELECT %s, " + topping_column + " FROM " + table + " WHERE " + pizza_column + " = %s",
+                (clone.pk, pizza.pk),
+            )
+        bumpVersions(MENU_VERSION, pizzaVersionName(clone.pk))
+    invalidateTags("pizzas", "pizza:" + str(clone.pk))
+    return clone
@@ -0,0 +1,174 @@
+"""
+Tag-based caching for rendered overview pages and their fragments.
+
+Every cached entry records the version of each tag it depends on, such as `toppings` (the topping list),
+`pizzas` (the pizza list), `pizza:<id>` or `topping:<id>`. Invalidating a tag deletes its version, so only entries
+that depend on it stop matching. Tag versions live in the same cache as the entries, so invalidation reaches every
+worker that shares the cache backend. Per-row tags are read after their rows, so an entry is only stored when
+those tags already had versions; otherwise a row may have changed in between, and the next visit stores it instead.
+Setting `OVERVIEW_CACHE_TIMEOUT` to 0 turns page and fragment caching off.
+"""
+import hashlib
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+
+from .metrics import recordCacheLookup
+
+CACHE_PREFIX = "pizzamanager:"
+# Every entry depends on this tag so bulk writes that skip model signals can drop the whole cache at once.
+MENU_TAG = "menu"
+# Template context variable holding the versions a cached page read for its rows, for its fragments to reuse.
+ROW_VERSIONS = "cache_row_versions"
+
+def _tagKey(tag : str) -> str:
+    return CACHE_PREFIX + "tag:" + tag
+
+def cacheTimeout() -> int:
+    return getattr(settings, "OVERVIEW_CACHE_TIMEOUT", 300)
+
+def _createStamp(key : str) -> str:
+    # add() keeps a stamp another process may have just created. If it is replaced again before it can be read back,
+    # an unmatched stamp is used, which still counts as a change.
+    cache.add(key, uuid.uuid4().hex, None)
+    return cache.get(key) or uuid.uuid4().hex
+
+def sharedStamp(key : str) -> str:
+    """
+    Helper method reading a stamp that every process sees through the shared cache, creating it if it is missing.
+    Tag versions, the menu versions stamp and the topping name stamp are all such stamps.
+    @param key: The cache key of the stamp.
+    @return The current stamp.
+    """
+    stamp = cache.get(key)
+    return _createStamp(key) if stamp is None else stamp
+
+def replaceStamp(key : str):
+    """
+    Helper method replacing a shared stamp, so every process sees a change the next time it reads it.
+    @param key: The cache key of the stamp.
+    """
+    cache.set(key, uuid.uuid4().hex, None)
+
+def _readTagVersions(tags) -> tuple:
+    """
+    Helper method to read the current version of each tag, creating versions for tags that have none yet.
+    @return The dict mapping each tag to its version, and whether any version had to be created.
+    """
+    keys = {_tagKey(tag): tag for tag in set(tags) | {MENU_TAG}}
+    found = cache.get_many(keys)
+    missing = keys.keys() - found.keys()
+    for key in missing:
+        found[key] = _createStamp(key)
+    return {keys[key]: version for key, version in found.items()}, bool(missing)
+
+def tagVersions(tags) -> dict:
+    """
+    Helper method to read the current version of each tag, creating versions for tags that have none yet.
+    Versions must be read before the data they cover is queried.
+    @param tags: The tags to look up.
+    @return A dict mapping each tag to its version.
+    """
+    return _readTagVersions(tags)[0]
+
+def rowTagVersions(tags):
+    """
+    Helper method to read the versions of tags belonging to rows that have already been queried.
+    A tag without a version may have been invalidated between the query and this read, so the rows could be stale.
+    @param tags: The tags to look up.
+    @return A dict mapping each tag to its version, or `None` if any version had to be created, in which case the
+    entry built from the rows must not be stored.
+    """
+    versions, created = _readTagVersions(tags)
+    return None if created else versions
+
+def invalidateTags(*tags):
+    """
+    Helper method to drop every cached entry that depends on any of `tags`.
+    @param tags: The tags that changed.
+    """
+    cache.delete_many([_tagKey(tag) for tag in tags])
+
+def getCached(key : str):
+    """
+    Helper method to read a cached entry, treating it as missing if any tag it depends on has changed since.
+    @param key: The key the entry was stored under.
+    @return The cached value, or `None` if it is missing or stale.
+    """
+    entry = cache.get(CACHE_PREFIX + key)
+    if entry is None:
+        recordCacheLookup(hit=False)
+        return None
+    versions, value = entry
+    current = cache.get_many([_tagKey(tag) for tag in versions])
+    if any(current.get(_tagKey(tag)) != version for tag, version in versions.items()):
+        recordCacheLookup(hit=False)
+        return None
+    recordCacheLookup(hit=True)
+    return value
+
+def setCached(key : str, value, versions : dict):
+    """
+    Helper method to store an entry along with the tag versions it was built from.
+    @param key: The key to store the entry under.
+    @param value: The value to store.
+    @param versions: Tag versions, read with `tagVersions` before the data behind `value` was queried, or with
+    `rowTagVersions` after it.
+    """
+    cache.set(CACHE_PREFIX + key, (versions, value), cacheTimeout())
+
+def pageCacheKey(request) -> str:
+    """
+    Helper method naming the cache entry for a rendered page, one per URL including its query string.
+    """
+    return "page:" + hashlib.md5(request.get_full_path().encode()).hexdigest()
+
+def cacheTagsFor(instance) -> list:
+    """
+    Helper method listing the tags a rendering of a pizza or topping depends on.
+    A pizza depends on itself and every topping on it, so its toppings should already be prefetched.
+    @param instance: The pizza or topping being rendered, either a model instance or one from the menu snapshot.
+    @return The list of tags.
+    """
+    # Only pizzas have `toppings`, so snapshot pizzas are told apart from toppings without importing either class.
+    if hasattr(instance, "toppings"):
+        return ["pizza:" + str(instance.pk)] + ["topping:" + str(topping.pk) for topping in instance.toppings.all()]
+    return ["topping:" + str(instance.pk)]
+
+class CachedPageMixin:
+    """
+    ListView mixin that serves repeat GETs of the same URL from the cache until one of the page's tags changes.
+    Views list the tags every page depends on in `cache_tags` and may add per-row tags in `get_cache_tags`.
+    """
+    cache_tags = ()
+
+    def get_cache_tags(self, context) -> list:
+        return []
+
+    def usesPageCache(self) -> bool:
+        return bool(cacheTimeout())
+
+    def get(self, request, *args, **kwargs):
+        if not self.usesPageCache():
+            return super().get(request, *args, **kwargs)
+
+        key = pageCacheKey(request)
+        content = getCached(key)
+        if content is not None:
+            return HttpResponse(content)
+
+        # Versions of `cache_tags` are read before querying so a change made while the page renders leaves the entry
+        # stale. Per-row tags are only known once the rows are, so they are read before rendering, and a page whose
+        # row tags had no version yet is not stored.
+        versions = tagVersions(self.cache_tags)
+        response = super().get(request, *args, **kwargs)
+        row_versions = None
+        if response.status_code == 200:
+            row_versions = rowTagVersions(self.get_cache_tags(response.context_data))
+            response.context_data[ROW_VERSIONS] = row_versions
+        response.render()
+        if row_versions is not None:
+            setCached(key, response.content, dict(row_versions, **versions))
+        return response
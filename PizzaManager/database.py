@@ -0,0 +1,40 @@
+"""
+Connection tuning for the SQLite database.
+
+SQLite's default rollback journal makes readers and writers block each other, which shows up as "database is locked"
+when an owner edits the menu while chefs are browsing it. Every new connection is therefore switched to the
+pragmas in `settings.SQLITE_PRAGMAS`: write-ahead logging lets readers carry on during a write, `busy_timeout`
+makes a writer wait for the lock instead of failing, and `mmap_size` and `cache_size` keep hot pages in memory.
+"""
+import re
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+PRAGMA_VALUE = re.compile(r"^-?[A-Za-z0-9_]+$")
+
+@receiver(connection_created)
+def configure_sqlite(sender, connection, **kwargs):
+    if connection.vendor != "sqlite":
+        return
+    with connection.cursor() as cursor:
+        for pragma, value in sqlitePragmas().items():
+            cursor.execute("PRAGMA " + pragma + " = " + value)
+
+def sqlitePragmas() -> dict:
+    """
+    Helper method returning the configured pragmas that have a value, checked for safe inclusion in a statement.
+    @return A dictionary of pragma names to values, in the order they should be applied.
+    """
+    pragmas = {}
+    for pragma, value in getattr(settings, "SQLITE_PRAGMAS", {}).items():
+        value = str(value).strip()
+        if value == "":
+            continue
+        # PRAGMA statements cannot take bound parameters, so values are restricted to plain words and numbers.
+        if not PRAGMA_VALUE.match(value):
+            raise ImproperlyConfigured("Invalid value for SQLite pragma " + pragma + ": " + value)
+        pragmas[pragma] = value
+    return pragmas
@@ -0,0 +1,51 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from PizzaManager.management.reporting import writePeakMemory
+from PizzaManager.menu_io import IMPORT_CHUNK_SIZE, MENU_FORMATS, MenuFileError, importMenuRows, parseMenuRows
+
+class Command(BaseCommand):
+    help = "Imports toppings and pizzas from a CSV or JSON Lines menu file in chunked bulk inserts."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Menu file to import, or - to read from standard input.")
+        parser.add_argument("--format", choices=MENU_FORMATS, help="Menu format. Defaults to the file extension.")
+        parser.add_argument("--chunk-size", type=int, default=IMPORT_CHUNK_SIZE, help="Rows written per transaction.")
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        menu_format = options["format"] or path.rsplit(".", 1)[-1].lower()
+        if menu_format not in MENU_FORMATS:
+            raise CommandError("Could not tell the menu format of " + path + ". Please pass --format.")
+        if options["chunk_size"] < 1:
+            raise CommandError("--chunk-size must be at least 1.")
+
+        started = time.perf_counter()
+
+        def report(totals):
+            elapsed = time.perf_counter() - started
+            self.stdout.write(
+                "%d rows read (%.0f rows/sec)" % (totals["rows"], totals["rows"] / elapsed if elapsed else 0)
+            )
+
+        try:
+            if path == "-":
+                totals = importMenuRows(parseMenuRows(sys.stdin, menu_format), options["chunk_size"], report)
+            else:
+                with open(path, newline="", encoding="utf-8") as menu_file:
+                    totals = importMenuRows(parseMenuRows(menu_file, menu_format), options["chunk_size"], report)
+        except MenuFileError as error:
+            # Chunks written before the bad line are kept, so the file can be fixed and imported again.
+            raise CommandError(str(error) + " Rows in earlier chunks were imported.")
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            "Imported %d toppings, %d pizzas and %d topping links from %d rows (%d skipped) in %.2fs, %.0f rows/sec."
+            % (
+                totals["toppings"], totals["pizzas"], totals["links"], totals["rows"], totals["skipped"],
+                elapsed, totals["rows"] / elapsed if elapsed else 0,
+            )
+        ))
+        writePeakMemory(self.stdout)
@@ -0,0 +1,34 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from PizzaManager.merging import MergeError, mergeToppings
+from PizzaManager.models import Topping
+
+class Command(BaseCommand):
+    help = "Merges toppings into one, moving every pizza using them onto the topping kept and deleting the rest."
+
+    def add_arguments(self, parser):
+        parser.add_argument("target", help="Name of the topping to keep.")
+        parser.add_argument("sources", nargs="+", help="Names of the toppings to merge into the target.")
+
+    def handle(self, *args, **options):
+        names = [options["target"]] + options["sources"]
+        toppings = {topping.name: topping for topping in Topping.objects.filter(name__in=names)}
+        missing = [name for name in names if name not in toppings]
+        if missing:
+            raise CommandError("No topping named " + ", ".join(repr(name) for name in missing) + ".")
+
+        started = time.perf_counter()
+        try:
+            totals = mergeToppings(toppings[options["target"]], [toppings[name] for name in options["sources"]])
+        except MergeError as error:
+            raise CommandError(str(error))
+
+        self.stdout.write(self.style.SUCCESS(
+            "Merged %d topping%s into %r: %d pizza links moved and %d duplicates dropped in %.2fs."
+            % (
+                totals["deleted"], "" if totals["deleted"] == 1 else "s", options["target"],
+                totals["moved"], totals["duplicates"], time.perf_counter() - started,
+            )
+        ))
@@ -0,0 +1,52 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from PizzaManager.management.reporting import writePeakMemory
+from PizzaManager.seeding import SEED_CHUNK_SIZE, seedMenu
+
+class Command(BaseCommand):
+    help = "Fills the database with a generated menu of the given size using chunked bulk inserts."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--pizzas", type=int, default=1000, help="Number of pizzas to create.")
+        parser.add_argument("--toppings", type=int, default=100, help="Number of toppings to create.")
+        parser.add_argument("--toppings-per-pizza", type=int, default=8, help="Distinct toppings on each pizza.")
+        parser.add_argument("--seed", type=int, help="Random seed, for generating the same menu again.")
+        parser.add_argument("--chunk-size", type=int, default=SEED_CHUNK_SIZE,
+                            help="Pizzas or toppings written per transaction.")
+
+    def handle(self, *args, **options):
+        for option in ("pizzas", "toppings", "toppings_per_pizza"):
+            if options[option] < 0:
+                raise CommandError("--" + option.replace("_", "-") + " cannot be negative.")
+        if options["chunk_size"] < 1:
+            raise CommandError("--chunk-size must be at least 1.")
+        if options["pizzas"] and options["toppings_per_pizza"] > options["toppings"]:
+            raise CommandError("--toppings-per-pizza cannot be more than --toppings.")
+
+        started = time.perf_counter()
+
+        def report(totals):
+            elapsed = time.perf_counter() - started
+            rows = totals["toppings"] + totals["pizzas"] + totals["links"]
+            self.stdout.write(
+                "%d toppings, %d pizzas, %d links written (%.0f rows/sec)"
+                % (totals["toppings"], totals["pizzas"], totals["links"], rows / elapsed if elapsed else 0)
+            )
+
+        totals = seedMenu(
+            options["pizzas"], options["toppings"], options["toppings_per_pizza"],
+            seed=options["seed"], chunk_size=options["chunk_size"], on_chunk=report,
+        )
+
+        elapsed = time.perf_counter() - started
+        rows = totals["toppings"] + totals["pizzas"] + totals["links"]
+        self.stdout.write(self.style.SUCCESS(
+            "Seeded %d toppings, %d pizzas and %d topping links (%d names already taken) in %.2fs, %.0f rows/sec."
+            % (
+                totals["toppings"], totals["pizzas"], totals["links"], totals["skipped"],
+                elapsed, rows / elapsed if elapsed else 0,
+            )
+        ))
+        writePeakMemory(self.stdout)
@@ -0,0 +1,29 @@
+"""
+Progress reporting shared by the management commands that write large menus.
+"""
+import sys
+
+try:
+    import resource
+except ImportError:  # Windows has no `resource` module; peak memory is simply not reported there.
+    resource = None
+
+def peakMemoryMB() -> float:
+    """
+    Helper method reading the most memory this process has held at once.
+    @return The peak resident memory in megabytes, or `None` where it cannot be read.
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes while macOS reports bytes.
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+def writePeakMemory(stdout):
+    """
+    Helper method adding the peak memory to a command's output, where it can be read.
+    @param stdout: The command's `self.stdout`.
+    """
+    peak_mb = peakMemoryMB()
+    if peak_mb is not None:
+        stdout.write("Peak memory: %.1f MB" % peak_mb)
@@ -0,0 +1,208 @@
+"""
+Helpers for moving whole menus in and out of PizzaManager in bulk.
+
+A menu file is a sequence of rows, each either a topping or a pizza:
+    CSV:   `type,name,toppings` with a pizza's toppings separated by `;`
+    JSONL: `{"type": "topping", "name": ...}` or `{"type": "pizza", "name": ..., "toppings": [...]}`
+Toppings are always written before pizzas so a file can be imported in a single pass.
+"""
+import csv
+import json
+
+from django.db import transaction
+
+from .caching import MENU_TAG, invalidateTags
+from .models import Topping, Pizza
+from .validation import nameProblem
+from .versioning import MENU_VERSION, TOPPINGS_VERSION, bumpVersions, pizzaVersionName
+
+MENU_FORMATS = ("csv", "jsonl")
+CSV_FIELDS = ("type", "name", "toppings")
+CSV_TOPPING_SEPARATOR = ";"
+EXPORT_CHUNK_SIZE = 2000
+IMPORT_CHUNK_SIZE = 1000
+
+class MenuFileError(ValueError):
+    """
+    Raised when a line of a menu file cannot be decoded or has fields of the wrong type. The message names the line.
+    """
+
+class _Echo:
+    """
+    File-like object whose `write` hands the line straight back so `csv.writer` can feed a streaming response.
+    """
+    def write(self, value):
+        return value
+
+def iterMenuRows():
+    """
+    Lazily yields every topping and then every pizza as a `(type, name, topping_names)` tuple.
+    Rows are read with `.iterator()`, so memory stays bounded by `EXPORT_CHUNK_SIZE` whatever the menu size.
+    """
+    for name in Topping.objects.order_by("name").values_list("name", flat=True).iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        yield ("topping", name, [])
+
+    pizzas = Pizza.objects.order_by("name").prefetch_related("toppings").iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    for pizza in pizzas:
+        yield ("pizza", pizza.name, sorted(topping.name for topping in pizza.toppings.all()))
+
+async def aiterMenuRows():
+    """
+    Async version of `iterMenuRows`, reading rows with `.aiterator()` in chunks of `EXPORT_CHUNK_SIZE`.
+    """
+    toppings = Topping.objects.order_by("name").values_list("name", flat=True).aiterator(chunk_size=EXPORT_CHUNK_SIZE)
+    async for name in toppings:
+        yield ("topping", name, [])
+
+    pizzas = Pizza.objects.order_by("name").prefetch_related("toppings").aiterator(chunk_size=EXPORT_CHUNK_SIZE)
+    async for pizza in pizzas:
+        yield ("pizza", pizza.name, sorted(topping.name for topping in pizza.toppings.all()))
+
+def _encodeMenuRow(writer, menu_format : str, row_type : str, name : str, topping_names : list) -> str:
+    if menu_format == "csv":
+        return writer.writerow((row_type, name, CSV_TOPPING_SEPARATOR.join(topping_names)))
+    row = {"type": row_type, "name": name}
+    if row_type == "pizza":
+        row["toppings"] = topping_names
+    return json.dumps(row) + "\n"
+
+def iterMenuExport(menu_format : str):
+    """
+    Lazily encodes the menu in `menu_format`, one line at a time.
+    @param menu_format: Either `csv` or `jsonl`.
+    @return A generator of encoded lines suitable for a `StreamingHttpResponse`.
+    """
+    writer = csv.writer(_Echo())
+    if menu_format == "csv":
+        yield writer.writerow(CSV_FIELDS)
+    for row in iterMenuRows():
+        yield _encodeMenuRow(writer, menu_format, *row)
+
+async def aiterMenuExport(menu_format : str):
+    """
+    Async version of `iterMenuExport`, for streaming responses served under ASGI. Django reads a synchronous iterator
+    of a streaming response into a list first there, which would hold the whole menu in memory.
+    """
+    writer = csv.writer(_Echo())
+    if menu_format == "csv":
+        yield writer.writerow(CSV_FIELDS)
+    async for row in aiterMenuRows():
+        yield _encodeMenuRow(writer, menu_format, *row)
+
+def parseMenuRows(lines, menu_format : str):
+    """
+    Incrementally decodes a menu file into `(type, name, topping_names)` tuples.
+    @param lines: Any iterable of text lines, such as an open file.
+    @param menu_format: Either `csv` or `jsonl`.
+    @return A generator of decoded rows. Blank names are passed through for the caller to reject.
+    @raise MenuFileError when a JSON Lines row is not a JSON object or its fields have the wrong types, once the rows
+    before it have been yielded.
+    """
+    if menu_format == "csv":
+        for row in csv.DictReader(lines):
+            toppings = row.get("toppings") or ""
+            yield (
+                (row.get("type") or "").strip(),
+                row.get("name") or "",
+                [name for name in toppings.split(CSV_TOPPING_SEPARATOR) if name],
+            )
+    else:
+        for line_number, line in enumerate(lines, 1):
+            if line.strip() == "":
+                continue
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError as error:
+                raise MenuFileError("Line " + str(line_number) + " is not valid JSON: " + error.msg + ".")
+            if not isinstance(row, dict):
+                raise MenuFileError("Line " + str(line_number) + " is not a JSON object.")
+            row_type, name, toppings = row.get("type", ""), row.get("name", ""), row.get("toppings", [])
+            if not isinstance(row_type, str) or not isinstance(name, str):
+                raise MenuFileError("Line " + str(line_number) + " needs a type and name given as strings.")
+            # A string is iterable too, and would otherwise be read as one topping per character.
+            if not isinstance(toppings, list) or not all(isinstance(topping, str) for topping in toppings):
+                raise MenuFileError("Line " + str(line_number) + " needs its toppings given as a list of strings.")
+            yield (row_type, name, toppings)
+
+def importMenuRows(rows, chunk_size : int = IMPORT_CHUNK_SIZE, on_chunk=None) -> dict:
+    """
+    Writes decoded menu rows with chunked `bulk_create` calls, one transaction per chunk.
+    Names that already exist are kept, and existing pizzas gain any toppings listed for them.
+    Rows with invalid names are skipped and counted.
+    @param rows: Iterable of `(type, name, topping_names)` tuples, such as from `parseMenuRows`.
+    @param chunk_size: Number of rows written per transaction.
+    @param on_chunk: Optional callable receiving the running totals after each chunk.
+    @return The totals: rows read, toppings and pizzas created, links written and rows skipped.
+    """
+    totals = {"rows": 0, "toppings": 0, "pizzas": 0, "links": 0, "skipped": 0}
+    chunk = []
+    for row in rows:
+        totals["rows"] += 1
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            _importChunk(chunk, totals)
+            chunk = []
+            if on_chunk is not None:
+                on_chunk(totals)
+    if chunk:
+        _importChunk(chunk, totals)
+        if on_chunk is not None:
+            on_chunk(totals)
+    return totals
+
+def _isValidName(name : str) -> bool:
+    # Rows with a bad name are skipped rather than reported, so only whether there is a problem matters.
+    return nameProblem(name, "") == ""
+
+def _importChunk(chunk, totals : dict):
+    """
+    Writes one chunk of rows in a fixed number of queries: toppings, pizzas and then their links.
+    """
+    topping_names = set()
+    pizzas = {}
+    for row_type, name, pizza_toppings in chunk:
+        if row_type == "topping" and _isValidName(name):
+            topping_names.add(name)
+        elif row_type == "pizza" and _isValidName(name) and all(_isValidName(topping) for topping in pizza_toppings):
+            pizzas.setdefault(name, set()).update(pizza_toppings)
+            topping_names.update(pizza_toppings)
+        else:
+            totals["skipped"] += 1
+
+    changed_pizza_ids = []
+    with transaction.atomic():
+        existing_toppings = set(Topping.objects.filter(name__in=topping_names).values_list("name", flat=True))
+        Topping.objects.bulk_create(
+            [Topping(name=name) for name in topping_names - existing_toppings],
+            ignore_conflicts=True,
+        )
+        totals["toppings"] += len(topping_names - existing_toppings)
+
+        existing_pizzas = set(Pizza.objects.filter(name__in=pizzas).values_list("name", flat=True))
+        Pizza.objects.bulk_create(
+            [Pizza(name=name) for name in pizzas.keys() - existing_pizzas],
+            ignore_conflicts=True,
+        )
+        totals["pizzas"] += len(pizzas.keys() - existing_pizzas)
+
+        if any(pizzas.values()):
+            topping_ids = dict(Topping.objects.filter(name__in=topping_names).values_list("name", "id"))
+            pizza_ids = dict(Pizza.objects.filter(name__in=pizzas).values_list("name", "id"))
+            PizzaToppings = Pizza.toppings.through
+            # Links the pizzas already have are left out, so only links actually written are counted.
+            existing_links = set(PizzaToppings.objects.filter(
+                pizza_id__in=pizza_ids.values(), topping_id__in=topping_ids.values()
+            ).values_list("pizza_id", "topping_id"))
+            links = [
+                PizzaToppings(pizza_id=pizza_ids[pizza_name], topping_id=topping_ids[topping_name])
+                for pizza_name, pizza_toppings in pizzas.items()
+                for topping_name in pizza_toppings
+                if (pizza_ids[pizza_name], topping_ids[topping_name]) not in existing_links
+            ]
+            PizzaToppings.objects.bulk_create(links, ignore_conflicts=True)
+            totals["links"] += len(links)
+            changed_pizza_ids = sorted({link.pizza_id for link in links})
+
+        # bulk_create sends no model signals, so the version counters and cache are updated here instead.
+        bumpVersions(MENU_VERSION, TOPPINGS_VERSION, *[pizzaVersionName(pizza_id) for pizza_id in changed_pizza_ids])
+    invalidateTags(MENU_TAG)
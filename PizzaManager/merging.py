@@ -0,0 +1,52 @@
+"""
+Merges duplicate toppings into one, such as "Pepperoni" and "pepperoni " after a supplier change.
+
+Rather than swapping the topping on each pizza in turn, a merge re-points every pizza to topping link at once:
+one statement drops the links that would become duplicates, one moves the rest over to the target, and one
+deletes the sources. The cost therefore stays at a handful of statements however many pizzas use the toppings.
+"""
+from django.db import transaction
+from django.db.models import Min
+
+from .caching import invalidateTags
+from .models import Topping, Pizza
+from .versioning import MENU_VERSION, TOPPINGS_VERSION, bumpVersions
+
+class MergeError(ValueError):
+    """
+    Raised when toppings cannot be merged, such as when one of them does not exist.
+    """
+
+def mergeToppings(target, sources) -> dict:
+    """
+    Helper method moving every pizza from the `sources` toppings onto `target`, then deleting the sources. Pizzas
+    that already had `target`, or had more than one of the sources, end up with it once. Either all of this
+    happens or, on any error, none of it does.
+    @param target: The topping to keep.
+    @param sources: The toppings to fold into `target`.
+    @return A dict counting the links `moved` to the target, the `duplicates` dropped and the sources `deleted`.
+    @raise MergeError if `target` is one of the `sources` or no sources are given.
+    """
+    source_ids = sorted({source.pk for source in sources})
+    if not source_ids:
+        raise MergeError("Please choose at least one topping to merge.")
+    if target.pk in source_ids:
+        raise MergeError("A topping cannot be merged into itself.")
+
+    links = Pizza.toppings.through.objects
+    with transaction.atomic():
+        source_links = links.filter(topping_id__in=source_ids)
+        # Each pizza keeps one of its source links, unless it already has the target.
+        kept = (
+            source_links.exclude(pizza_id__in=links.filter(topping_id=target.pk).values("pizza_id"))
+            .values("pizza_id").annotate(kept_id=Min("id")).values("kept_id")
+        )
+        duplicates, _ = links.filter(topping_id__in=source_ids).exclude(id__in=kept).delete()
+        moved = links.filter(topping_id__in=source_ids).update(topping_id=target.pk)
+        # The sources have no links left, so this only removes the topping rows and sends their delete signals.
+        _, deleted = Topping.objects.filter(pk__in=source_ids).delete()
+        # Moving links with `update` sends no signals. Every pizza editor depends on the topping list version.
+        bumpVersions(MENU_VERSION, TOPPINGS_VERSION)
+    invalidateTags("toppings", "topping:" + str(target.pk))
+
+    return {"moved": moved, "duplicates": duplicates, "deleted": deleted.get(Topping._meta.label, 0)}
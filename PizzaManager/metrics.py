@@ -0,0 +1,121 @@
+"""
+Prometheus metrics for PizzaManager, served in the text format by `views.metrics`.
+
+Requests are counted and timed by `middleware.ServerTimingMiddleware`, cache lookups by `caching.getCached`, topping
+name lookups by `topping_names.ToppingNameCache` and error replies by `views.createPizzaErrorReply` and
+`views.createToppingErrorReply`.
+
+Each gunicorn worker keeps its own counts. To report the sum across workers, point the `PROMETHEUS_MULTIPROC_DIR`
+environment variable at an empty directory before the server starts: every worker then writes its metrics to files
+in that directory, and `/metrics` adds them up whichever worker serves it. Empty the directory on each deploy, or
+counts carry over from the previous run.
+"""
+import os
+
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Histogram, generate_latest
+from prometheus_client import multiprocess
+
+# Upper bounds in seconds. Pages render in a few milliseconds, seeded menus and exports take longer.
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Requests that did not match a URL pattern, so the label set stays bounded.
+UNMATCHED_URL_NAME = "unmatched"
+
+# Error reply kinds, found by a phrase in the message so new call sites are counted without being changed.
+ERROR_KINDS = (
+    ("already exists", "duplicate_name"),
+    ("special characters", "special_characters"),
+    ("Received blank", "blank_name"),
+    ("characters or fewer", "long_name"),
+    ("is already on this pizza", "duplicate_topping"),
+    ("replaced with itself", "same_topping"),
+    ("is not on this pizza", "topping_not_on_pizza"),
+    ("changed more than once", "repeated_topping"),
+    ("pizza that does not exist", "missing_pizza"),
+    ("topping that does not exist", "missing_topping"),
+    ("merged into itself", "same_topping"),
+    ("Internal Error", "internal_error"),
+)
+OTHER_ERROR_KIND = "other"
+
+REQUESTS = Counter(
+    "pizzamanager_requests", "Requests served.", ["url_name", "method", "status"],
+)
+REQUEST_LATENCY = Histogram(
+    "pizzamanager_request_duration_seconds", "Time from the first middleware to the response.",
+    ["url_name", "method"], buckets=LATENCY_BUCKETS,
+)
+DB_QUERIES = Counter(
+    "pizzamanager_db_queries", "Database queries run while serving requests.", ["url_name", "method"],
+)
+DB_TIME = Counter(
+    "pizzamanager_db_duration_seconds", "Time spent running database queries while serving requests.",
+    ["url_name", "method"],
+)
+CACHE_LOOKUPS = Counter(
+    "pizzamanager_cache_lookups", "Page and fragment cache lookups, by whether a current entry was found.",
+    ["result"],
+)
+TOPPING_NAME_LOOKUPS = Counter(
+    "pizzamanager_topping_name_lookups", "Topping names resolved to ids, by whether the process's cache held them.",
+    ["result"],
+)
+ERROR_REPLIES = Counter(
+    "pizzamanager_error_replies", "Error pages rendered for the pizza and topping forms.", ["view", "kind"],
+)
+
+def errorKind(error_message : str) -> str:
+    """
+    Helper method naming the kind of an error reply for its metric label.
+    @param error_message: The message shown to the user.
+    @return One of the kinds in `ERROR_KINDS`, or `OTHER_ERROR_KIND`.
+    """
+    for phrase, kind in ERROR_KINDS:
+        if phrase in error_message:
+            return kind
+    return OTHER_ERROR_KIND
+
+def recordRequest(url_name, method : str, status : int, duration : float, queries : int, db_time : float):
+    """
+    Helper method recording one served request.
+    @param url_name: The namespaced URL name the request matched, or `None` if it matched none.
+    @param duration: Seconds taken to serve the request.
+    @param queries: Number of queries the request ran.
+    @param db_time: Seconds spent running those queries.
+    """
+    url_name = url_name or UNMATCHED_URL_NAME
+    REQUESTS.labels(url_name, method, str(status)).inc()
+    REQUEST_LATENCY.labels(url_name, method).observe(duration)
+    DB_QUERIES.labels(url_name, method).inc(queries)
+    DB_TIME.labels(url_name, method).inc(db_time)
+
+def recordCacheLookup(hit : bool):
+    CACHE_LOOKUPS.labels("hit" if hit else "miss").inc()
+
+def recordToppingNameLookups(hits : int, misses : int):
+    if hits:
+        TOPPING_NAME_LOOKUPS.labels("hit").inc(hits)
+    if misses:
+        TOPPING_NAME_LOOKUPS.labels("miss").inc(misses)
+
+def recordErrorReply(view : str, error_message : str):
+    ERROR_REPLIES.labels(view, errorKind(error_message)).inc()
+
+def metricsRegistry(path=None):
+    """
+    Helper method finding the metrics to report.
+    @param path: Directory holding the files of every worker. Defaults to `PROMETHEUS_MULTIPROC_DIR`.
+    @return A registry adding up every worker's files when there is such a directory, otherwise this process's registry.
+    """
+    path = path or os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+    if not path:
+        return REGISTRY
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry, path=path)
+    return registry
+
+def exposition(registry=None) -> tuple:
+    """
+    Helper method rendering metrics in the Prometheus text format.
+    @return The encoded metrics and their content type.
+    """
+    return generate_latest(registry or metricsRegistry()), CONTENT_TYPE_LATEST
@@ -0,0 +1,86 @@
+"""
+Middleware for PizzaManager.
+"""
+import json
+import logging
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
+from .metrics import recordRequest
+from .timing import currentTimer, startTimer, stopTimer
+
+timing_logger = logging.getLogger("PizzaManager.timing")
+
+class ServerTimingMiddleware:
+    """
+    Measures each request and reports where the time went in a `Server-Timing` header, one JSON log line on the
+    `PizzaManager.timing` logger and the request metrics in `metrics`. The header lists:
+        total:      the whole request, from this middleware to the response
+        middleware: the time spent before the view was called, in the middleware below this one and URL routing
+        db:         time spent running queries, with the query count
+        template:   time spent rendering templates
+    Streamed responses, such as the menu export, are measured up to the point the response starts streaming.
+    Keep it first in `MIDDLEWARE` so the other middleware is included in the total.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        timer, token = startTimer()
+        try:
+            response = self.get_response(request)
+        finally:
+            stopTimer(token)
+        return self.reportTiming(request, response, timer)
+
+    async def __acall__(self, request):
+        timer, token = startTimer()
+        try:
+            response = await self.get_response(request)
+        finally:
+            stopTimer(token)
+        return self.reportTiming(request, response, timer)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        timer = currentTimer()
+        if timer is not None:
+            timer.view_started = time.perf_counter()
+
+    def reportTiming(self, request, response, timer):
+        """
+        Helper method adding the `Server-Timing` header to `response`, then logging and recording the same figures.
+        @return The `response`.
+        """
+        match = request.resolver_match
+        url_name = match.view_name if match else None
+        total = time.perf_counter() - timer.started
+        middleware = (timer.view_started or time.perf_counter()) - timer.started
+        response["Server-Timing"] = ", ".join((
+            "total;dur=%.1f" % (total * 1000),
+            "middleware;dur=%.1f" % (middleware * 1000),
+            'db;dur=%.1f;desc="%d queries"' % (timer.db_time * 1000, timer.queries),
+            "template;dur=%.1f" % (timer.template_time * 1000),
+        ))
+        recordRequest(url_name, request.method, response.status_code, total,
+                      timer.queries, timer.db_time)
+        if timing_logger.isEnabledFor(logging.INFO):
+            timing_logger.info(json.dumps({
+                "url_name": url_name,
+                "method": request.method,
+                "path": request.path,
+                "status": response.status_code,
+                "total_ms": round(total * 1000, 2),
+                "middleware_ms": round(middleware * 1000, 2),
+                "db_ms": round(timer.db_time * 1000, 2),
+                "queries": timer.queries,
+                "template_ms": round(timer.template_time * 1000, 2),
+            }))
+        return response
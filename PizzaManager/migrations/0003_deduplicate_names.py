@@ -0,0 +1,56 @@
+from django.db import migrations
+from django.db.models import Count
+
+
+def merge_duplicate_toppings(apps, schema_editor):
+    """
+    Folds toppings that share a name into the oldest one, moving their pizza links across first.
+    """
+    Topping = apps.get_model("PizzaManager", "Topping")
+    Pizza = apps.get_model("PizzaManager", "Pizza")
+    PizzaToppings = Pizza.toppings.through
+
+    duplicated = Topping.objects.values("name").annotate(total=Count("id")).filter(total__gt=1)
+    for name in duplicated.values_list("name", flat=True):
+        ids = list(Topping.objects.filter(name=name).order_by("id").values_list("id", flat=True))
+        keeper, extras = ids[0], ids[1:]
+        linked = set(PizzaToppings.objects.filter(topping_id=keeper).values_list("pizza_id", flat=True))
+        moved = set(PizzaToppings.objects.filter(topping_id__in=extras).values_list("pizza_id", flat=True)) - linked
+        PizzaToppings.objects.bulk_create([PizzaToppings(pizza_id=pizza_id, topping_id=keeper) for pizza_id in moved])
+        Topping.objects.filter(id__in=extras).delete()
+
+
+def rename_duplicate_pizzas(apps, schema_editor):
+    """
+    Keeps the oldest pizza of each name and gives the others a numbered suffix so no recipe is lost.
+    """
+    Pizza = apps.get_model("PizzaManager", "Pizza")
+    max_length = Pizza._meta.get_field("name").max_length
+
+    duplicated = Pizza.objects.values("name").annotate(total=Count("id")).filter(total__gt=1)
+    for name in duplicated.values_list("name", flat=True):
+        suffix = 2
+        for pizza in Pizza.objects.filter(name=name).order_by("id")[1:]:
+            while True:
+                candidate = name[:max_length - len(str(suffix)) - 1] + " " + str(suffix)
+                suffix += 1
+                if not Pizza.objects.filter(name=candidate).exists():
+                    break
+            pizza.name = candidate
+            pizza.save(update_fields=["name"])
+
+
+def deduplicate_names(apps, schema_editor):
+    merge_duplicate_toppings(apps, schema_editor)
+    rename_duplicate_pizzas(apps, schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('PizzaManager', '0002_rename_toppings_topping'),
+    ]
+
+    operations = [
+        migrations.RunPython(deduplicate_names, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.0.2 on 2026-10-18 10:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('PizzaManager', '0003_deduplicate_names'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='pizza',
+            name='name',
+            field=models.CharField(max_length=50, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='topping',
+            name='name',
+            field=models.CharField(max_length=50, unique=True),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.0.2 on 2026-10-18 10:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('PizzaManager', '0004_unique_names'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='pizza',
+            index=models.Index(fields=['name', 'id'], name='pizza_name_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='topping',
+            index=models.Index(fields=['name', 'id'], name='topping_name_id_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.2 on 2026-10-18 10:39
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('PizzaManager', '0006_menuversion'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='topping',
+            index=models.Index(django.db.models.functions.text.Lower('name'), models.F('id'), name='topping_name_lower_idx'),
+        ),
+    ]
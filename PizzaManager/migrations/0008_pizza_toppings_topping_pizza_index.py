@@ -0,0 +1,23 @@
+# Generated by Django 5.0.2 on 2026-10-18 10:52
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    """
+    Indexes the pizza to topping table on `(topping_id, pizza_id)`. The table Django creates for `Pizza.toppings` has
+    no model to declare indexes on, so the index is added with SQL. Finding or counting the pizzas that use a topping
+    then reads only this index, rather than the index on `topping_id` followed by a lookup of every matching row.
+    """
+
+    dependencies = [
+        ('PizzaManager', '0007_topping_name_lower_index'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            sql='CREATE INDEX "pizza_toppings_topping_pizza_idx" '
+                'ON "PizzaManager_pizza_toppings" ("topping_id", "pizza_id");',
+            reverse_sql='DROP INDEX "pizza_toppings_topping_pizza_idx";',
+        ),
+    ]
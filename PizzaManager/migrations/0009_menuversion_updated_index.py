@@ -0,0 +1,17 @@
+# Generated by Django 5.0.2 on 2026-10-18 10:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('PizzaManager', '0008_pizza_toppings_topping_pizza_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='menuversion',
+            index=models.Index(fields=['updated'], name='menuversion_updated_idx'),
+        ),
+    ]
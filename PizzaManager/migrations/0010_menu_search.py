@@ -0,0 +1,67 @@
+from django.db import migrations
+
+SEARCHED_TABLES = ("PizzaManager_pizza", "PizzaManager_topping")
+
+
+def has_fts5(connection) -> bool:
+    if connection.vendor != "sqlite":
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')")
+        return bool(cursor.fetchone()[0])
+
+
+def create_search_tables(apps, schema_editor):
+    """
+    Creates an FTS5 index of the names in each table, filled from the rows already there. Triggers keep it in step with
+    every insert, rename and delete, including the `bulk_create` calls of the seeder and menu import, which send no
+    model signals. Other databases, and SQLite builds without FTS5, search with `LIKE` instead (see
+    PizzaManager/search.py).
+    """
+    if not has_fts5(schema_editor.connection):
+        return
+    for table in SEARCHED_TABLES:
+        search = table + "_search"
+        schema_editor.execute(
+            f'CREATE VIRTUAL TABLE "{search}" USING fts5(name, content=\'{table}\', content_rowid=\'id\', '
+            f'tokenize=\'unicode61 remove_diacritics 2\', prefix=\'1 2 3\')'
+        )
+        schema_editor.execute(
+            f'CREATE TRIGGER "{search}_insert" AFTER INSERT ON "{table}" BEGIN '
+            f'INSERT INTO "{search}"(rowid, name) VALUES (new.id, new.name); END'
+        )
+        schema_editor.execute(
+            f'CREATE TRIGGER "{search}_delete" AFTER DELETE ON "{table}" BEGIN '
+            f'INSERT INTO "{search}"("{search}", rowid, name) VALUES (\'delete\', old.id, old.name); END'
+        )
+        schema_editor.execute(
+            f'CREATE TRIGGER "{search}_update" AFTER UPDATE OF id, name ON "{table}" BEGIN '
+            f'INSERT INTO "{search}"("{search}", rowid, name) VALUES (\'delete\', old.id, old.name); '
+            f'INSERT INTO "{search}"(rowid, name) VALUES (new.id, new.name); END'
+        )
+        schema_editor.execute(f'INSERT INTO "{search}"("{search}") VALUES (\'rebuild\')')
+
+
+def drop_search_tables(apps, schema_editor):
+    if not has_fts5(schema_editor.connection):
+        return
+    for table in SEARCHED_TABLES:
+        search = table + "_search"
+        for trigger in ("insert", "delete", "update"):
+            schema_editor.execute(f'DROP TRIGGER IF EXISTS "{search}_{trigger}"')
+        schema_editor.execute(f'DROP TABLE IF EXISTS "{search}"')
+
+
+class Migration(migrations.Migration):
+    """
+    Adds full text search over pizza and topping names. SQLite rebuilds a table to alter most of its columns, which
+    drops the triggers on it, so a later migration that alters `Pizza` or `Topping` must create them again.
+    """
+
+    dependencies = [
+        ('PizzaManager', '0009_menuversion_updated_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_tables, drop_search_tables),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.0.2 on 2026-10-18 11:41
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('PizzaManager', '0010_menu_search'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='pizza',
+            name='pizza_name_id_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='topping',
+            name='topping_name_id_idx',
+        ),
+    ]
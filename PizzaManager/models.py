@@ -1,15 +1,97 @@
 from django.db import models
+from django.db.models.functions import Coalesce, Concat, Lower
 
 # Create your models here.
+# Sorts after any character a name can hold, so `prefix + PREFIX_END` bounds every name starting with `prefix`.
+PREFIX_END = chr(0x10FFFF)
+
+class ToppingQuerySet(models.QuerySet):
+    def with_name_prefix(self, prefix : str):
+        """
+        Filters to the toppings whose name starts with `prefix`, ignoring case, ordered by lowercased name.
+        The prefix is matched as a range on `LOWER(name)` rather than with `LIKE`, so it seeks
+        `topping_name_lower_idx` and reads only the matching rows, already in order.
+        """
+        lowered = Lower(models.Value(prefix, output_field=models.CharField()))
+        return self.annotate(name_lower=Lower("name")).filter(
+            name_lower__gte=lowered,
+            name_lower__lt=Concat(lowered, models.Value(PREFIX_END), output_field=models.CharField()),
+        ).order_by("name_lower", "id")
+
 class Topping(models.Model):
-    name = models.CharField(max_length=50)
+    # The unique index also backs keyset pagination, which seeks on the name alone (see `pagination.py`).
+    name = models.CharField(max_length=50, unique=True)
+
+    objects = ToppingQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Backs the typeahead search, which seeks on the lowercased name.
+            models.Index(Lower("name"), models.F("id"), name="topping_name_lower_idx"),
+        ]
 
     def __str__(self):
         return self.name
 
+class PizzaQuerySet(models.QuerySet):
+    def with_toppings(self):
+        """
+        Prefetches every pizza's toppings and annotates `topping_count` so listing pages cost a fixed
+        number of queries no matter how many pizzas are shown. The count is a subquery per pizza rather than a join
+        grouped by pizza, so it is only worked out for the pizzas on the page instead of for every pizza before
+        the page is cut.
+        """
+        links = self.model.toppings.through.objects.filter(pizza_id=models.OuterRef("pk")).order_by()
+        return self.prefetch_related("toppings").annotate(topping_count=Coalesce(
+            models.Subquery(links.values("pizza_id").annotate(count=models.Count("*")).values("count")), 0,
+            output_field=models.IntegerField(),
+        ))
+
+    def with_topping_filter(self, all_of=(), any_of=(), none_of=()):
+        """
+        Filters to the pizzas that have every topping in `all_of`, at least one in `any_of` and none in `none_of`,
+        each given as topping ids. Every condition is a subquery on the pizza to topping table, so the filter runs as
+        part of the one statement fetching the pizzas. `all_of` and `any_of` start from the toppings, reading only
+        their rows through `pizza_toppings_topping_pizza_idx`, and `none_of` checks each pizza against the
+        `(pizza_id, topping_id)` unique index.
+        """
+        links = self.model.toppings.through.objects
+        queryset = self
+        if all_of:
+            all_of = set(all_of)
+            queryset = queryset.filter(pk__in=links.filter(topping_id__in=all_of).values("pizza_id").annotate(
+                matched=models.Count("topping_id")
+            ).filter(matched=len(all_of)).values("pizza_id"))
+        if any_of:
+            queryset = queryset.filter(pk__in=links.filter(topping_id__in=set(any_of)).values("pizza_id"))
+        if none_of:
+            queryset = queryset.filter(~models.Exists(
+                links.filter(pizza_id=models.OuterRef("pk"), topping_id__in=set(none_of))
+            ))
+        return queryset
+
 class Pizza(models.Model):
-    name = models.CharField(max_length=50)
+    # The unique index also backs keyset pagination, which seeks on the name alone (see `pagination.py`).
+    name = models.CharField(max_length=50, unique=True)
     toppings = models.ManyToManyField(Topping)
 
+    objects = PizzaQuerySet.as_manager()
+
+    def __str__(self):
+        return self.name
+
+class MenuVersion(models.Model):
+    """
+    A change counter that only ever goes up, such as for the whole menu (`menu`), the topping list (`toppings`)
+    or a single pizza (`pizza:<id>`). Pages use these to answer conditional GETs without being rebuilt.
+    """
+    name = models.CharField(max_length=50, primary_key=True)
+    version = models.PositiveBigIntegerField(default=0)
+    updated = models.DateTimeField()
+
+    class Meta:
+        # Backs the menu snapshot's refresh, which reads the counters bumped since it last looked.
+        indexes = [models.Index(fields=["updated"], name="menuversion_updated_idx")]
+
     def __str__(self):
-        return self.name
\ No newline at end of file
+        return self.name + " v" + str(self.version)
@@ -0,0 +1,181 @@
+"""
+Keyset ("seek") pagination over `(name, id)`.
+
+Rather than counting the table and skipping with OFFSET, each page remembers the last row it showed and the next
+page starts directly after it, found through the unique index on `name`. Page 5,000 therefore costs the same as page 1.
+"""
+import base64
+import binascii
+import bisect
+import json
+
+from django.conf import settings
+from django.http import Http404
+
+class InvalidCursor(ValueError):
+    """
+    Raised when a cursor received from a client cannot be decoded.
+    """
+
+def encodeCursor(name : str, pk : int, backwards : bool = False) -> str:
+    """
+    Helper method to turn the sort key of a row into an opaque, URL-safe cursor.
+    @param name: The name of the row the cursor points at.
+    @param pk: The id of the row the cursor points at.
+    @param backwards: `True` if the cursor pages backwards from the row, otherwise it pages forwards.
+    @return The encoded cursor.
+    """
+    payload = json.dumps([name, pk, int(backwards)], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+def decodeCursor(cursor : str):
+    """
+    Helper method to recover the `(name, id)` sort key and direction stored in a cursor.
+    @param cursor: A cursor produced by `encodeCursor`.
+    @return The `(name, id, backwards)` tuple.
+    @raise InvalidCursor if the cursor was not produced by `encodeCursor`.
+    """
+    try:
+        name, pk, backwards = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (binascii.Error, UnicodeDecodeError, ValueError, TypeError):
+        raise InvalidCursor("Invalid cursor.")
+    if not isinstance(name, str) or not isinstance(pk, int) or backwards not in (0, 1):
+        raise InvalidCursor("Invalid cursor.")
+    return name, pk, bool(backwards)
+
+class SortedRows:
+    """
+    Rows held in memory instead of the database, which `keysetPage` and Django's `Paginator` page through like a
+    queryset. Only the `(name, id)` keys are kept in order, and rows are built for the keys on the page alone.
+    """
+    def __init__(self, keys, load):
+        """
+        @param keys: Every row's `(name, id)`, sorted.
+        @param load: Builds the rows for a list of keys, in the same order.
+        """
+        self.keys = keys
+        self.load = load
+
+    def count(self):
+        return len(self.keys)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self.load(self.keys[index])
+        return self.load([self.keys[index]])[0]
+
+def _sortKey(item):
+    if isinstance(item, dict):
+        return item["name"], item["id"]
+    return item.name, item.pk
+
+def keysetPage(queryset, limit : int, cursor : str = None):
+    """
+    Helper method to fetch one page of `queryset` ordered by `(name, id)` without counting or offsetting.
+    @param queryset: Rows to page through. Each row must expose `name` and `id`.
+    @param limit: The maximum number of rows on the page.
+    @param cursor: A cursor returned for an earlier page, or `None` for the first page.
+    @return A tuple of the rows on the page, the cursor for the next page and the cursor for the previous page.
+    The cursors are `None` when there is no page in that direction.
+    @raise InvalidCursor if the cursor cannot be decoded.
+    """
+    if isinstance(queryset, SortedRows):
+        return _keysetRows(queryset, limit, cursor)
+    page, backwards = _keysetQuery(queryset, limit, cursor)
+    return _keysetResult(list(page), limit, cursor, backwards)
+
+async def akeysetPage(queryset, limit : int, cursor : str = None):
+    """
+    Async version of `keysetPage`.
+    """
+    page, backwards = _keysetQuery(queryset, limit, cursor)
+    return _keysetResult([item async for item in page], limit, cursor, backwards)
+
+def _keysetQuery(queryset, limit : int, cursor : str):
+    name, pk, backwards = decodeCursor(cursor) if cursor is not None else (None, None, False)
+    # A range on the name lets SQLite seek through the unique name index, where comparing `(name, id)` with an OR has
+    # it scan the index from the start. The id then only matters for the row named in the cursor.
+    if backwards:
+        page = queryset.filter(name__lte=name).exclude(name=name, pk__gte=pk).order_by("-name", "-id")
+    else:
+        page = queryset.order_by("name", "id")
+        if cursor is not None:
+            page = page.filter(name__gte=name).exclude(name=name, pk__lte=pk)
+    # One extra row tells whether there is a further page in the direction of travel.
+    return page[:limit + 1], backwards
+
+def _keysetRows(rows : SortedRows, limit : int, cursor : str):
+    name, pk, backwards = decodeCursor(cursor) if cursor is not None else (None, None, False)
+    # Python orders strings by code point, as SQLite's default collation orders their UTF-8 bytes.
+    if backwards:
+        end = bisect.bisect_left(rows.keys, (name, pk))
+        keys = rows.keys[max(end - limit - 1, 0):end][::-1]
+    else:
+        start = bisect.bisect_right(rows.keys, (name, pk)) if cursor is not None else 0
+        keys = rows.keys[start:start + limit + 1]
+    return _keysetResult(rows.load(keys), limit, cursor, backwards)
+
+def _keysetResult(items, limit : int, cursor : str, backwards : bool):
+    if backwards:
+        has_previous = len(items) > limit
+        items = items[:limit][::-1]
+        has_next = True
+    else:
+        has_next = len(items) > limit
+        items = items[:limit]
+        has_previous = cursor is not None
+
+    if not items:
+        return items, None, None
+    next_cursor = encodeCursor(*_sortKey(items[-1])) if has_next else None
+    previous_cursor = encodeCursor(*_sortKey(items[0]), backwards=True) if has_previous else None
+    return items, next_cursor, previous_cursor
+
+class KeysetPage:
+    """
+    Stand-in for Django's `Page` in keyset mode. It knows its neighbours' cursors but not its number.
+    """
+    def __init__(self, object_list, next_cursor, previous_cursor):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+class KeysetPaginationMixin:
+    """
+    ListView mixin adding a keyset pagination mode that never runs COUNT(*) or OFFSET.
+    The mode is used whenever the request carries a `cursor` parameter (`?cursor=` for the first page), or for every
+    request when the `KEYSET_PAGINATION` setting is on. Otherwise the view falls back to Django's numbered pages.
+    """
+    def usesKeysetPagination(self) -> bool:
+        return "cursor" in self.request.GET or getattr(settings, "KEYSET_PAGINATION", False)
+
+    def paginate_queryset(self, queryset, page_size):
+        if not self.usesKeysetPagination():
+            return super().paginate_queryset(queryset, page_size)
+
+        try:
+            items, next_cursor, previous_cursor = keysetPage(queryset, page_size, self.request.GET.get("cursor") or None)
+        except InvalidCursor:
+            raise Http404("Invalid cursor.")
+        page = KeysetPage(items, next_cursor, previous_cursor)
+        return (None, page, items, page.has_next() or page.has_previous())
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context["keyset_pagination"] = self.usesKeysetPagination()
+        return context
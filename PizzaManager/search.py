@@ -0,0 +1,84 @@
+"""
+Search over pizza and topping names.
+
+On SQLite, names are looked up in the FTS5 tables created by migration 0010, which triggers keep in step with every
+change to `Pizza.name` and `Topping.name`. Each word searched for matches any word in a name that starts with it, in
+any order, so "pep ro" finds "Roasted Pepper" and "Pepperoni Rolls". Matches are ranked by BM25, which puts names made
+mostly of the words searched for first, then by name. Accents are ignored, so "jalapeno" finds "Jalapeño".
+
+Ranking scores every match, which takes tens of milliseconds when a short search such as "c" matches a large share of
+the menu. Only the first `MAX_RANKED_MATCHES` matches, oldest first, are ranked, so every search stays within a few
+milliseconds. A search matching more than that shows good matches rather than the best ones until more is typed.
+
+Other databases, SQLite builds without FTS5, and `FULL_TEXT_SEARCH` turned off fall back to matching every word
+anywhere in the name with `LIKE`, ranking names that start with the first word first. That reads the whole table, so
+it is only quick on small menus.
+"""
+import re
+import sqlite3
+from contextlib import closing
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Case, IntegerField, Value, When
+
+# The runs of letters and digits FTS5's `unicode61` tokenizer splits names into.
+SEARCH_WORD = re.compile(r"[^\W_]+")
+MAX_SEARCH_WORDS = 8
+MAX_RANKED_MATCHES = 1000
+
+def _sqliteHasFts5() -> bool:
+    # Django's SQLite backend runs on the library behind the `sqlite3` module, so asking it costs no query.
+    with closing(sqlite3.connect(":memory:")) as probe:
+        return bool(probe.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')").fetchone()[0])
+
+SQLITE_HAS_FTS5 = _sqliteHasFts5()
+
+def usesFullTextSearch() -> bool:
+    """
+    Helper method telling whether searches go through the FTS5 tables rather than `LIKE`.
+    """
+    return getattr(settings, "FULL_TEXT_SEARCH", True) and connection.vendor == "sqlite" and SQLITE_HAS_FTS5
+
+def searchWords(text : str) -> list:
+    """
+    Helper method splitting a search into the words it looks for.
+    @param text: The search as typed.
+    @return At most `MAX_SEARCH_WORDS` lowercased words, in the order typed. Empty when there is nothing to look for.
+    """
+    return [word.lower() for word in SEARCH_WORD.findall(text)[:MAX_SEARCH_WORDS]]
+
+def searchNames(model, text : str, limit : int) -> list:
+    """
+    Helper method finding the pizzas or toppings whose name matches a search, best match first.
+    @param model: `Pizza` or `Topping`.
+    @param text: The search as typed.
+    @param limit: How many matches to return at most.
+    @return A list of `{"id": ..., "name": ...}` dictionaries.
+    """
+    words = searchWords(text)
+    if not words:
+        return []
+    if usesFullTextSearch():
+        return _fullTextMatches(model, words, limit)
+    return _likeMatches(model, words, limit)
+
+def _fullTextMatches(model, words : list, limit : int) -> list:
+    table = connection.ops.quote_name(model._meta.db_table + "_search")
+    # Each word is quoted, so nothing typed is read as FTS5 query syntax, and starred to match as a prefix.
+    match = " ".join('"' + word + '"*' for word in words)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT rowid, name FROM ("
+            "SELECT rowid, name, rank FROM " + table + " WHERE " + table + " MATCH %s LIMIT %s"
+            ") ORDER BY rank, name, rowid LIMIT %s",
+            [match, MAX_RANKED_MATCHES, limit],
+        )
+        return [{"id": pk, "name": name} for pk, name in cursor.fetchall()]
+
+def _likeMatches(model, words : list, limit : int) -> list:
+    queryset = model.objects.all()
+    for word in words:
+        queryset = queryset.filter(name__icontains=word)
+    first_word = Case(When(name__istartswith=words[0], then=Value(0)), default=Value(1), output_field=IntegerField())
+    return list(queryset.order_by(first_word, "name", "id").values("id", "name")[:limit])
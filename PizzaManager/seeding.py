@@ -0,0 +1,108 @@
+"""
+Generates large synthetic menus for reproducing production-sized problems locally.
+
+Names are built from word lists so pages look like a real menu, end in a number so every generated name is unique,
+and only use letters, digits and spaces so they pass the same checks as names typed into the editors. Rows are
+written with chunked `bulk_create` calls, one transaction per chunk, so memory stays bounded by the chunk size
+however many pizzas or topping links are generated.
+"""
+import random
+
+from django.db import connection, reset_queries, transaction
+
+from .caching import MENU_TAG, invalidateTags
+from .models import Topping, Pizza
+from .versioning import MENU_VERSION, TOPPINGS_VERSION, bumpVersions
+
+SEED_CHUNK_SIZE = 2000
+
+TOPPING_WORDS = (
+    "Mozzarella", "Parmesan", "Gorgonzola", "Ricotta", "Feta", "Cheddar", "Pepperoni", "Salami", "Ham", "Bacon",
+    "Sausage", "Chicken", "Anchovy", "Tuna", "Shrimp", "Mushroom", "Olive", "Onion", "Pepper", "Jalapeno",
+    "Tomato", "Spinach", "Artichoke", "Pineapple", "Basil", "Oregano", "Garlic", "Rocket", "Corn", "Aubergine",
+)
+TOPPING_STYLES = ("Fresh", "Roasted", "Smoked", "Grilled", "Spicy", "Pickled", "Sweet", "Aged", "Wild", "Crispy")
+PIZZA_STYLES = (
+    "Classic", "Rustic", "Spicy", "Smoky", "Garden", "Deluxe", "Supreme", "Farmhouse", "Coastal", "Midnight",
+    "Sunday", "Firehouse", "Old Town", "Harbour", "Mountain",
+)
+PIZZA_WORDS = (
+    "Margherita", "Marinara", "Diavola", "Capricciosa", "Napoletana", "Calzone", "Romana", "Quattro Formaggi",
+    "Ortolana", "Boscaiola", "Bianca", "Siciliana", "Hawaiian", "Feast", "Special",
+)
+
+def toppingName(index : int, rng) -> str:
+    return rng.choice(TOPPING_STYLES) + " " + rng.choice(TOPPING_WORDS) + " " + str(index + 1)
+
+def pizzaName(index : int, rng) -> str:
+    return rng.choice(PIZZA_STYLES) + " " + rng.choice(PIZZA_WORDS) + " " + str(index + 1)
+
+def seedMenu(pizzas : int, toppings : int, toppings_per_pizza : int, seed : int = None,
+             chunk_size : int = SEED_CHUNK_SIZE, on_chunk=None) -> dict:
+    """
+    Adds a generated menu to the database. Numbering continues after any toppings and pizzas already present, so
+    seeding twice grows the menu rather than colliding with it.
+    @param pizzas: Number of pizzas to create.
+    @param toppings: Number of toppings to create. Pizzas only use the toppings generated here.
+    @param toppings_per_pizza: Number of distinct toppings linked to each pizza.
+    @param seed: Random seed, so the same arguments produce the same menu on the same database.
+    @param chunk_size: Number of pizzas or toppings written per transaction.
+    @param on_chunk: Optional callable receiving the running totals after each chunk.
+    @return The totals: toppings, pizzas and links created, and generated names skipped as already taken.
+    """
+    if toppings_per_pizza > toppings:
+        raise ValueError(
+            "Cannot put %d distinct toppings on each pizza from %d toppings." % (toppings_per_pizza, toppings)
+        )
+    rng = random.Random(seed)
+    totals = {"toppings": 0, "pizzas": 0, "links": 0, "skipped": 0}
+
+    topping_ids = []
+    first_topping = Topping.objects.count()
+    for start in range(0, toppings, chunk_size):
+        names = [toppingName(first_topping + index, rng) for index in range(start, min(start + chunk_size, toppings))]
+        created_ids, taken_ids = _seedChunk(Topping, names, totals, "toppings")
+        # A generated topping that already exists is still used on the new pizzas.
+        topping_ids.extend(created_ids + taken_ids)
+        if on_chunk is not None:
+            on_chunk(totals)
+
+    PizzaToppings = Pizza.toppings.through
+    first_pizza = Pizza.objects.count()
+    for start in range(0, pizzas, chunk_size):
+        names = [pizzaName(first_pizza + index, rng) for index in range(start, min(start + chunk_size, pizzas))]
+        _seedChunk(Pizza, names, totals, "pizzas", links=lambda pizza_ids: [
+            PizzaToppings(pizza_id=pizza_id, topping_id=topping_id)
+            for pizza_id in pizza_ids
+            for topping_id in rng.sample(topping_ids, toppings_per_pizza)
+        ])
+        if on_chunk is not None:
+            on_chunk(totals)
+    return totals
+
+def _seedChunk(model, names, totals : dict, total_name : str, links=None):
+    """
+    Writes one chunk of generated names for `model` in a single transaction, along with the pizza topping `links`
+    built for the new rows. Names already taken are skipped.
+    @return The ids of the rows created and of the rows whose names were already taken.
+    """
+    with transaction.atomic():
+        taken = dict(model.objects.filter(name__in=names).values_list("name", "id"))
+        new_names = [name for name in names if name not in taken]
+        created = model.objects.bulk_create([model(name=name) for name in new_names])
+        if connection.features.can_return_rows_from_bulk_insert:
+            created_ids = [instance.pk for instance in created]
+        else:
+            created_ids = list(model.objects.filter(name__in=new_names).values_list("id", flat=True))
+        if links is not None:
+            new_links = links(created_ids)
+            Pizza.toppings.through.objects.bulk_create(new_links)
+            totals["links"] += len(new_links)
+        # bulk_create sends no model signals, so the version counters and cache are updated here instead.
+        bumpVersions(MENU_VERSION, TOPPINGS_VERSION)
+    invalidateTags(MENU_TAG)
+    # With DEBUG on Django keeps the last 9000 statements, which for inserts this size would hold on to hundreds of MB.
+    reset_queries()
+    totals[total_name] += len(created_ids)
+    totals["skipped"] += len(taken)
+    return created_ids, list(taken.values())
@@ -0,0 +1,54 @@
+"""
+Signal handlers that keep cached menu pages and menu version counters in step with the database.
+"""
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from .caching import invalidateTags
+from .models import Topping, Pizza
+from .topping_names import forgetToppingNames
+from .versioning import (
+    MENU_VERSION,
+    PIZZA_DELETIONS_VERSION,
+    TOPPINGS_VERSION,
+    bumpVersions,
+    dropVersions,
+    pizzaVersionName,
+)
+
+@receiver(post_save, sender=Topping)
+@receiver(post_delete, sender=Topping)
+def topping_changed(sender, instance, **kwargs):
+    # The topping list and every page showing this topping. Deleting a topping also drops its pizza links.
+    invalidateTags("toppings", "topping:" + str(instance.pk))
+    bumpVersions(MENU_VERSION, TOPPINGS_VERSION)
+    forgetToppingNames()
+
+@receiver(post_save, sender=Pizza)
+def pizza_saved(sender, instance, **kwargs):
+    invalidateTags("pizzas", "pizza:" + str(instance.pk))
+    bumpVersions(MENU_VERSION, pizzaVersionName(instance.pk))
+
+@receiver(post_delete, sender=Pizza)
+def pizza_deleted(sender, instance, **kwargs):
+    invalidateTags("pizzas", "pizza:" + str(instance.pk))
+    # The dropped counter reads as 0 again, so the deletion counter is what moves the editor's ETag on.
+    bumpVersions(MENU_VERSION, PIZZA_DELETIONS_VERSION)
+    dropVersions(pizzaVersionName(instance.pk))
+
+@receiver(m2m_changed, sender=Pizza.toppings.through)
+def pizza_toppings_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    if not reverse:
+        invalidateTags("pizza:" + str(instance.pk))
+        bumpVersions(MENU_VERSION, pizzaVersionName(instance.pk))
+    elif pk_set:
+        # Changed from the topping's side, e.g. `topping.pizza_set.add(...)`.
+        invalidateTags(*["pizza:" + str(pk) for pk in pk_set])
+        bumpVersions(MENU_VERSION, *[pizzaVersionName(pk) for pk in pk_set])
+    else:
+        # A reverse clear does not say which pizzas lost the topping, but they all showed it. Every pizza editor
+        # depends on the topping list version, so bumping it covers them.
+        invalidateTags("topping:" + str(instance.pk))
+        bumpVersions(MENU_VERSION, TOPPINGS_VERSION)
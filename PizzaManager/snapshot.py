@@ -0,0 +1,316 @@
+"""
+An in-process, read-only copy of the menu for the chef screens.
+
+With `MENU_SNAPSHOT` on, each worker loads every pizza, topping and pizza to topping link once, then serves the pizza
+overview and `/api/pizzas/` from memory without querying the database. Topping names are interned and held once per
+topping. Each pizza holds its name and a compact array of its topping ids, in topping name order. A sorted list of
+every pizza's `(name, id)` pages through the pizzas the way the `(name, id)` index does. Topping filters are answered
+from the ids of the pizzas using each topping, gathered on the first filtered request and kept up to date by refreshes.
+
+Every change to the menu bumps its version counters, which replaces `versioning.VERSIONS_STAMP_KEY` in the shared
+cache. A request compares that stamp with the one the snapshot was loaded under, so a current snapshot costs one cache
+read and no queries. When the stamp has moved, only the pizzas whose counters changed since the last load are read
+again. Changes to the topping list reload everything, since renaming, deleting or bulk editing a topping can touch
+every pizza at once.
+"""
+import sys
+import threading
+from array import array
+from bisect import bisect_left, insort
+from collections import defaultdict
+from datetime import timedelta
+
+from django.utils import timezone
+
+from .models import MenuVersion, Topping, Pizza
+from .pagination import SortedRows
+from .versioning import MENU_VERSION, TOPPINGS_VERSION, conditionalGetFromRows, pizzaVersionName, versionsStamp
+
+# Pizza counters bumped this long before the last load are read again, to catch changes from transactions that
+# started before it but committed after.
+REFRESH_OVERLAP = timedelta(seconds=5)
+# Past this many changed pizzas one full load is quicker than reading them by id.
+MAX_INCREMENTAL_PIZZAS = 500
+
+class StaleSnapshot(Exception):
+    """
+    Raised when a pizza read into the snapshot uses a topping added since the toppings were read.
+    """
+
+class SnapshotTopping:
+    """
+    A topping as the templates and API see it.
+    """
+    __slots__ = ("id", "name")
+
+    def __init__(self, topping_id : int, name : str):
+        self.id = topping_id
+        self.name = name
+
+    @property
+    def pk(self):
+        return self.id
+
+class SnapshotToppings:
+    """
+    Stands in for `pizza.toppings`, so templates written for model instances can call `pizza.toppings.all`.
+    """
+    __slots__ = ("toppings",)
+
+    def __init__(self, toppings : list):
+        self.toppings = toppings
+
+    def all(self) -> list:
+        return self.toppings
+
+class SnapshotPizza:
+    """
+    A pizza as the templates and API see it, with its toppings in name order.
+    """
+    __slots__ = ("id", "name", "toppings")
+
+    def __init__(self, pizza_id : int, name : str, toppings : list):
+        self.id = pizza_id
+        self.name = name
+        self.toppings = SnapshotToppings(toppings)
+
+    @property
+    def pk(self):
+        return self.id
+
+    @property
+    def topping_count(self) -> int:
+        return len(self.toppings.toppings)
+
+class MenuSnapshot:
+    """
+    The menu as it stood when loaded. A snapshot's menu is never changed once built; refreshing builds a new one, so a request
+    reading from it sees one consistent menu however many other threads refresh meanwhile.
+    """
+
+    def __init__(self, stamp : str, loaded_at, versions : dict, toppings : dict, pizzas : dict, keys : list):
+        self.stamp = stamp
+        # When the counters were read, on the clock `bumpVersions` sets `MenuVersion.updated` from.
+        self.loaded_at = loaded_at
+        # The `MenuVersion` rows of the menu and topping list.
+        self.versions = versions
+        # Topping id to name.
+        self.toppings = toppings
+        # Pizza id to `(name, topping ids)`.
+        self.pizzas = pizzas
+        # Every pizza's `(name, id)`, sorted.
+        self.keys = keys
+        # Topping id to the ids of the pizzas using it, built when first filtered by.
+        self.topping_pizzas = None
+
+    @classmethod
+    def load(cls, stamp : str):
+        """
+        Reads the whole menu in three queries, plus one for its counters.
+        @param stamp: The versions stamp read before any of the data.
+        """
+        while True:
+            loaded_at = timezone.now()
+            versions = _readVersions()
+            toppings = {topping_id: sys.intern(name) for topping_id, name in Topping.objects.values_list("id", "name")}
+            try:
+                pizzas = _readPizzas(Pizza.objects.all(), Pizza.toppings.through.objects.all(), toppings)
+            except StaleSnapshot:
+                # A topping was added and used while the menu was being read, so it is read again.
+                continue
+            keys = sorted((name, pk) for pk, (name, _) in pizzas.items())
+            return cls(stamp, loaded_at, versions, toppings, pizzas, keys)
+
+    def refreshed(self, stamp : str):
+        """
+        Builds a snapshot of the menu as it is now, reading only the pizzas changed since this one when possible.
+        @param stamp: The versions stamp read before any of the data.
+        @return The new snapshot.
+        """
+        loaded_at = timezone.now()
+        versions = _readVersions()
+        if _version(versions, TOPPINGS_VERSION) != _version(self.versions, TOPPINGS_VERSION):
+            return MenuSnapshot.load(stamp)
+
+        changed = {
+            int(name[len(pizzaVersionName("")):])
+            for name in MenuVersion.objects.filter(
+                name__startswith=pizzaVersionName(""), updated__gte=self.loaded_at - REFRESH_OVERLAP
+            ).values_list("name", flat=True)
+        }
+        if len(changed) > MAX_INCREMENTAL_PIZZAS:
+            return MenuSnapshot.load(stamp)
+
+        pizzas = dict(self.pizzas)
+        keys = list(self.keys)
+        for pk in changed & pizzas.keys():
+            del keys[bisect_left(keys, (pizzas.pop(pk)[0], pk))]
+        if changed:
+            try:
+                found = _readPizzas(
+                    Pizza.objects.filter(id__in=changed),
+                    Pizza.toppings.through.objects.filter(pizza_id__in=changed),
+                    self.toppings,
+                )
+            except StaleSnapshot:
+                return MenuSnapshot.load(stamp)
+            for pk, (name, topping_ids) in found.items():
+                pizzas[pk] = (name, topping_ids)
+                insort(keys, (name, pk))
+        # Deleting a pizza drops its counter, so deletions only show up as pizzas too many. Their ids alone are
+        # enough to find them.
+        deleted = set()
+        if Pizza.objects.count() != len(pizzas):
+            existing = set(Pizza.objects.values_list("id", flat=True).iterator(chunk_size=10000))
+            deleted = pizzas.keys() - existing
+            for pk in deleted:
+                del keys[bisect_left(keys, (pizzas.pop(pk)[0], pk))]
+            if len(existing) != len(pizzas):
+                return MenuSnapshot.load(stamp)
+        snapshot = MenuSnapshot(stamp, loaded_at, versions, self.toppings, pizzas, keys)
+        if self.topping_pizzas is not None:
+            snapshot.topping_pizzas = _updatedToppingPizzas(self.topping_pizzas, self.pizzas, pizzas, changed | deleted)
+        return snapshot
+
+    def conditionalGetResponse(self, request, names, salt : str = ""):
+        """
+        Answers a conditional GET from the counters read with this snapshot, like `versioning.conditionalGetResponse`
+        but without a query. `names` may include `MENU_VERSION` and `TOPPINGS_VERSION`.
+        """
+        rows = [self.versions[name] for name in names if name in self.versions]
+        return conditionalGetFromRows(request, rows, names, salt)
+
+    def pizza(self, pk : int):
+        """
+        @return The pizza with id `pk`, or `None` if there is none.
+        """
+        name, topping_ids = self.pizzas.get(pk, (None, None))
+        if name is None:
+            return None
+        return SnapshotPizza(pk, name, [SnapshotTopping(topping_id, self.toppings[topping_id]) for topping_id in topping_ids])
+
+    def pizzaRows(self) -> SortedRows:
+        """
+        @return Every pizza in `(name, id)` order, to be paged through like `Pizza.objects.order_by("name", "id")`.
+        """
+        return SortedRows(self.keys, self._loadPizzas)
+
+    def filteredPizzaRows(self, all_of=(), any_of=(), none_of=()) -> SortedRows:
+        """
+        Selects the same pizzas as `Pizza.objects.with_topping_filter`, from memory.
+        @return The pizzas with every topping in `all_of`, at least one in `any_of` and none in `none_of`, in
+        `(name, id)` order.
+        """
+        if not (all_of or any_of or none_of):
+            return self.pizzaRows()
+        topping_pizzas = self.toppingPizzas()
+        matched = None
+        # Narrowed down from the topping with the fewest pizzas, so the sets built stay small.
+        for topping_id in sorted(set(all_of), key=lambda topping_id: len(topping_pizzas.get(topping_id, ()))):
+            matched = set(topping_pizzas.get(topping_id, ())) if matched is None else \
+                matched.intersection(topping_pizzas.get(topping_id, ()))
+        if any_of:
+            found = set().union(*[topping_pizzas.get(topping_id, ()) for topping_id in set(any_of)])
+            matched = found if matched is None else matched & found
+        excluded = set().union(*[topping_pizzas.get(topping_id, ()) for topping_id in set(none_of)])
+        if matched is not None:
+            return SortedRows(sorted((self.pizzas[pk][0], pk) for pk in matched - excluded), self._loadPizzas)
+        # Usually most of the menu, so it is copied in runs between the excluded pizzas rather than tested key by key.
+        keys = []
+        start = 0
+        for position in sorted(bisect_left(self.keys, (self.pizzas[pk][0], pk)) for pk in excluded):
+            keys += self.keys[start:position]
+            start = position + 1
+        keys += self.keys[start:]
+        return SortedRows(keys, self._loadPizzas)
+
+    def toppingPizzas(self) -> dict:
+        """
+        @return Topping id to an array of the ids of the pizzas using it, built on the first call.
+        """
+        if self.topping_pizzas is None:
+            topping_pizzas = defaultdict(lambda: array("q"))
+            for pk, (_, topping_ids) in self.pizzas.items():
+                for topping_id in topping_ids:
+                    topping_pizzas[topping_id].append(pk)
+            # Requests on other threads may build it too, and any of the equal copies can be kept.
+            self.topping_pizzas = dict(topping_pizzas)
+        return self.topping_pizzas
+
+    def _loadPizzas(self, keys : list) -> list:
+        return [self.pizza(pk) for _, pk in keys]
+
+def _readVersions() -> dict:
+    return {row.name: row for row in MenuVersion.objects.filter(name__in=(MENU_VERSION, TOPPINGS_VERSION))}
+
+def _version(versions : dict, name : str) -> int:
+    return versions[name].version if name in versions else 0
+
+def _updatedToppingPizzas(topping_pizzas : dict, old_pizzas : dict, new_pizzas : dict, changed : set) -> dict:
+    """
+    Helper method carrying `MenuSnapshot.toppingPizzas` over to a refreshed snapshot, rebuilding only the toppings
+    that the changed pizzas had or have.
+    @param changed: The ids of the pizzas added, changed or deleted since `old_pizzas`.
+    @return Topping id to an array of the ids of the pizzas using it, in `new_pizzas`.
+    """
+    touched = {
+        topping_id
+        for pizzas in (old_pizzas, new_pizzas) for pk in changed if pk in pizzas
+        for topping_id in pizzas[pk][1]
+    }
+    updated = dict(topping_pizzas)
+    for topping_id in touched:
+        kept = array("q", (pk for pk in topping_pizzas.get(topping_id, ()) if pk not in changed))
+        kept.extend(pk for pk in changed if pk in new_pizzas and topping_id in new_pizzas[pk][1])
+        updated[topping_id] = kept
+    return updated
+
+def _readPizzas(pizzas, links, toppings : dict) -> dict:
+    """
+    Helper method reading pizzas and their topping ids into the snapshot's compact form.
+    @param pizzas: The pizzas to read.
+    @param links: The pizza to topping rows of those pizzas.
+    @param toppings: Topping id to name, which orders each pizza's toppings.
+    @return Pizza id to `(name, array of topping ids)`.
+    """
+    topping_ids = defaultdict(list)
+    for pizza_id, topping_id in links.values_list("pizza_id", "topping_id").iterator(chunk_size=10000):
+        if topping_id not in toppings:
+            raise StaleSnapshot()
+        topping_ids[pizza_id].append(topping_id)
+    return {
+        pk: (name, array("q", sorted(topping_ids.get(pk, ()), key=lambda topping_id: (toppings[topping_id], topping_id))))
+        for pk, name in pizzas.values_list("id", "name").iterator(chunk_size=10000)
+    }
+
+_SNAPSHOT = None
+_SNAPSHOT_LOCK = threading.Lock()
+
+def menuSnapshot() -> MenuSnapshot:
+    """
+    Helper method returning this process's menu snapshot, refreshing it first if the menu has changed since.
+    @return The current snapshot. Costs no queries when it was already current.
+    """
+    global _SNAPSHOT
+    # Read before the data, so a change made while loading leaves the snapshot under an old stamp.
+    stamp = versionsStamp()
+    snapshot = _SNAPSHOT
+    if snapshot is not None and snapshot.stamp == stamp:
+        return snapshot
+    with _SNAPSHOT_LOCK:
+        # Another thread may have refreshed it while this one waited.
+        snapshot = _SNAPSHOT
+        if snapshot is None:
+            snapshot = MenuSnapshot.load(stamp)
+        elif snapshot.stamp != stamp:
+            snapshot = snapshot.refreshed(stamp)
+        _SNAPSHOT = snapshot
+    return snapshot
+
+def dropMenuSnapshot():
+    """
+    Helper method discarding this process's snapshot, so the next request loads the whole menu again.
+    """
+    global _SNAPSHOT
+    with _SNAPSHOT_LOCK:
+        _SNAPSHOT = None
@@ -0,0 +1,48 @@
+from django import template
+
+from PizzaManager.caching import (
+    MENU_TAG, ROW_VERSIONS, cacheTagsFor, cacheTimeout, getCached, rowTagVersions, setCached,
+)
+
+register = template.Library()
+
+class CachedFragmentNode(template.Node):
+    def __init__(self, nodelist, name, instance):
+        self.nodelist = nodelist
+        self.name = name
+        self.instance = instance
+
+    def render(self, context):
+        if not cacheTimeout():
+            return self.nodelist.render(context)
+
+        instance = self.instance.resolve(context)
+        key = "fragment:" + str(self.name.resolve(context)) + ":" + str(instance.pk)
+        content = getCached(key)
+        if content is None:
+            tags = cacheTagsFor(instance)
+            if ROW_VERSIONS in context:
+                # A cached page has already read its rows' versions, and creating any of them kept it from being
+                # stored. Its fragments follow the same decision rather than trusting versions the page created.
+                page_versions = context[ROW_VERSIONS]
+                versions = None if page_versions is None else {tag: page_versions[tag] for tag in tags + [MENU_TAG]}
+            else:
+                # The view has already loaded `instance`, so its versions only count if they existed before.
+                versions = rowTagVersions(tags)
+            content = self.nodelist.render(context)
+            if versions is not None:
+                setCached(key, content, versions)
+        return content
+
+@register.tag
+def cachedfragment(parser, token):
+    """
+    Caches the enclosed template fragment for one pizza or topping until that object, or anything it shows, changes.
+    Usage: `{% cachedfragment "pizza_card" pizza %} ... {% endcachedfragment %}`
+    """
+    bits = token.split_contents()
+    if len(bits) != 3:
+        raise template.TemplateSyntaxError("'cachedfragment' takes a fragment name and the object being rendered.")
+    nodelist = parser.parse(("endcachedfragment",))
+    parser.delete_first_token()
+    return CachedFragmentNode(nodelist, parser.compile_filter(bits[1]), parser.compile_filter(bits[2]))
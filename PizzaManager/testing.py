@@ -0,0 +1,63 @@
+"""
+Test helpers shared by the PizzaManager test suite.
+"""
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from .models import Pizza
+
+QUERY_BUDGET_SIZES = (1, 12)
+
+class QueryBudgetMixin:
+    """
+    TestCase mixin for holding a view to a fixed number of queries however much data it is shown.
+    """
+
+    def assertQueryBudget(self, budget : int, setup, request, sizes=QUERY_BUDGET_SIZES):
+        """
+        Checks that a request runs at most `budget` queries, and the same number at every data size, so a cost that
+        grows with the number of rows fails even while it is still under budget.
+        @param budget: The most queries the request may run.
+        @param setup: Callable receiving each size in `sizes`. It builds data of that size, outside the count, and
+        returns whatever `request` needs.
+        @param request: Callable receiving the value `setup` returned. It sends the request and returns the response.
+        @param sizes: The data sizes to check, smallest first.
+        @return The responses, one per size.
+        """
+        counts = []
+        responses = []
+        for size in sizes:
+            prepared = setup(size)
+            with CaptureQueriesContext(connection) as queries:
+                response = request(prepared)
+                if getattr(response, "streaming", False):
+                    b"".join(response.streaming_content)
+            counts.append(len(queries))
+            responses.append(response)
+            if len(queries) > budget:
+                self.fail(
+                    "%d queries run at size %d, over the budget of %d:\n%s"
+                    % (len(queries), size, budget, self._formatQueries(queries))
+                )
+        if len(set(counts)) > 1:
+            self.fail(
+                "Query count grows with the data: %s queries at sizes %s. Queries at size %d:\n%s"
+                % (counts, list(sizes), sizes[-1], self._formatQueries(queries))
+            )
+        return responses
+
+    def _formatQueries(self, queries) -> str:
+        return "\n".join("%d. %s" % (index, query["sql"]) for index, query in enumerate(queries.captured_queries, 1))
+
+class PizzaMenuMixin:
+    """
+    TestCase mixin for building pizzas and reading back their toppings.
+    """
+
+    def createPizza(self, name : str, *toppings) -> Pizza:
+        pizza = Pizza.objects.create(name=name)
+        pizza.toppings.add(*toppings)
+        return pizza
+
+    def toppingNames(self, pizza) -> list:
+        return sorted(pizza.toppings.values_list("name", flat=True))
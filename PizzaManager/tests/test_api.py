@@ -0,0 +1,94 @@
+from django.test import TestCase, Client
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.urls import reverse
+
+from PizzaManager.models import Topping, Pizza
+
+HTTP_OK = 200
+HTTP_BAD_REQUEST = 400
+
+# Create your tests here.
+class TestApi(TestCase):
+    """
+    Tests that confirm the JSON read API serves pizzas and toppings a page at a time.
+    """
+
+    @classmethod
+    def setUpClass(self):
+        teardown_test_environment()
+        setup_test_environment()
+        return super().setUpClass()
+
+    def setUp(self):
+        self.client = Client()
+        self.cheese = Topping.objects.create(name="Cheese")
+        self.olive = Topping.objects.create(name="Olive")
+        for index in range(5):
+            pizza = Pizza.objects.create(name="Pizza " + str(index))
+            pizza.toppings.add(self.olive, self.cheese)
+        return super().setUp()
+
+    ##############################################################################
+    ###          It should serve pizzas with their toppings as JSON            ###
+    ##############################################################################
+
+    def test_pizzas_with_toppings(self):
+        response = self.client.get(reverse("PizzaManager:Pizza API"))
+        self.assertEqual(response.status_code, HTTP_OK)
+        results = response.json()["results"]
+        self.assertEqual([pizza["name"] for pizza in results], ["Pizza " + str(index) for index in range(5)])
+        self.assertEqual(results[0]["toppings"], [
+            {"id": self.cheese.id, "name": "Cheese"},
+            {"id": self.olive.id, "name": "Olive"},
+        ])
+        self.assertIsNone(response.json()["next"])
+
+    def test_pizzas_query_count(self):
+        # One query for the page of pizzas and one prefetch for all of their toppings.
+        with self.assertNumQueries(2):
+            self.client.get(reverse("PizzaManager:Pizza API"))
+        with self.assertNumQueries(1):
+            self.client.get(reverse("PizzaManager:Pizza API"), {"fields": "id,name"})
+
+    def test_pizzas_field_selection(self):
+        response = self.client.get(reverse("PizzaManager:Pizza API"), {"fields": "name"})
+        self.assertEqual(response.status_code, HTTP_OK)
+        self.assertEqual(response.json()["results"][0], {"name": "Pizza 0"})
+
+    def test_unknown_field(self):
+        response = self.client.get(reverse("PizzaManager:Pizza API"), {"fields": "name,price"})
+        self.assertEqual(response.status_code, HTTP_BAD_REQUEST)
+
+    def test_toppings(self):
+        response = self.client.get(reverse("PizzaManager:Toppings API"))
+        self.assertEqual(response.status_code, HTTP_OK)
+        self.assertEqual(response.json()["results"], [
+            {"id": self.cheese.id, "name": "Cheese"},
+            {"id": self.olive.id, "name": "Olive"},
+        ])
+
+    ##############################################################################
+    ###              It should page through results with a cursor              ###
+    ##############################################################################
+
+    def test_cursor_pagination(self):
+        url = reverse("PizzaManager:Pizza API")
+        firstPage = self.client.get(url, {"limit": 2, "fields": "name"}).json()
+        self.assertEqual(firstPage["results"], [{"name": "Pizza 0"}, {"name": "Pizza 1"}])
+        self.assertIsNone(firstPage["previous"])
+
+        secondPage = self.client.get(url, {"limit": 2, "fields": "name", "cursor": firstPage["next"]}).json()
+        self.assertEqual(secondPage["results"], [{"name": "Pizza 2"}, {"name": "Pizza 3"}])
+
+        lastPage = self.client.get(url, {"limit": 2, "fields": "name", "cursor": secondPage["next"]}).json()
+        self.assertEqual(lastPage["results"], [{"name": "Pizza 4"}])
+        self.assertIsNone(lastPage["next"])
+
+        backPage = self.client.get(url, {"limit": 2, "fields": "name", "cursor": lastPage["previous"]}).json()
+        self.assertEqual(backPage["results"], secondPage["results"])
+
+    def test_invalid_cursor_and_limit(self):
+        url = reverse("PizzaManager:Pizza API")
+        self.assertEqual(self.client.get(url, {"cursor": "not a cursor"}).status_code, HTTP_BAD_REQUEST)
+        self.assertEqual(self.client.get(url, {"limit": 0}).status_code, HTTP_BAD_REQUEST)
+        self.assertEqual(self.client.get(url, {"limit": "many"}).status_code, HTTP_BAD_REQUEST)
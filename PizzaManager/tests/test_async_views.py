@@ -0,0 +1,142 @@
+from asgiref.sync import async_to_sync
+from django.core.cache import cache
+from django.http import Http404
+from django.test import AsyncRequestFactory, TestCase, override_settings
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.urls import reverse
+
+from PizzaManager import async_views
+from PizzaManager.menu_io import iterMenuExport
+from PizzaManager.models import Topping, Pizza
+from PizzaManager.pagination import encodeCursor
+
+HTTP_OK = 200
+HTTP_NOT_MODIFIED = 304
+
+# Create your tests here.
+@override_settings(OVERVIEW_CACHE_TIMEOUT=0)
+class TestAsyncViews(TestCase):
+    """
+    Tests that confirm the async views served under ASGI render the same pages as the synchronous ones.
+    """
+
+    @classmethod
+    def setUpClass(self):
+        teardown_test_environment()
+        setup_test_environment()
+        return super().setUpClass()
+
+    def setUp(self):
+        self.factory = AsyncRequestFactory()
+        cache.clear()
+        self.cheese = Topping.objects.create(name="Cheese")
+        self.olive = Topping.objects.create(name="Olive")
+        self.pizza = Pizza.objects.create(name="Margherita")
+        self.pizza.toppings.add(self.cheese)
+        for index in range(6):
+            Pizza.objects.create(name="Pizza " + str(index))
+        return super().setUp()
+
+    def get(self, view, url_name, *args, data=None, **headers):
+        # The views are awaited on an event loop as under ASGI, while the test itself stays synchronous so that
+        # assertNumQueries can wrap it.
+        return async_to_sync(view)(self.factory.get(reverse(url_name, args=args), data, headers=headers), *args)
+
+    ##############################################################################
+    ###          It should render the overview pages through the async ORM     ###
+    ##############################################################################
+
+    def test_pizza_overview(self):
+        # Menu version, count, pizzas and their prefetched toppings, as in the synchronous view.
+        with self.assertNumQueries(4):
+            response = self.get(async_views.pizza_overview, "PizzaManager:Pizza Overview")
+        self.assertContains(response, "Margherita")
+        self.assertContains(response, "Cheese")
+        self.assertNotContains(response, "Pizza 5")
+
+        response = self.get(async_views.pizza_overview, "PizzaManager:Pizza Overview", data={"page": "last"})
+        self.assertContains(response, "Pizza 5")
+        self.assertNotContains(response, "Margherita")
+
+    def test_toppings_overview(self):
+        response = self.get(async_views.toppings_overview, "PizzaManager:Toppings Overview")
+        self.assertContains(response, "Cheese")
+        self.assertContains(response, "Olive")
+
+    def test_overview_invalid_page(self):
+        with self.assertRaises(Http404):
+            self.get(async_views.pizza_overview, "PizzaManager:Pizza Overview", data={"page": "9"})
+        with self.assertRaises(Http404):
+            self.get(async_views.pizza_overview, "PizzaManager:Pizza Overview", data={"cursor": "nonsense"})
+
+    def test_overview_keyset_pagination(self):
+        cursor = encodeCursor("Pizza 3", 0)
+        # Menu version, pizzas and their prefetched toppings, without counting the table.
+        with self.assertNumQueries(3):
+            response = self.get(async_views.pizza_overview, "PizzaManager:Pizza Overview", data={"cursor": cursor})
+        self.assertContains(response, "Pizza 3")
+        self.assertNotContains(response, "Pizza 2")
+
+    def test_overview_cached(self):
+        with self.settings(OVERVIEW_CACHE_TIMEOUT=300):
+            # The first visit creates the versions of the pizzas' tags, so only the second is stored.
+            for _ in range(2):
+                self.get(async_views.pizza_overview, "PizzaManager:Pizza Overview")
+            with self.assertNumQueries(1):
+                response = self.get(async_views.pizza_overview, "PizzaManager:Pizza Overview")
+        self.assertContains(response, "Margherita")
+
+    def test_overview_not_modified(self):
+        response = self.get(async_views.toppings_overview, "PizzaManager:Toppings Overview")
+        with self.assertNumQueries(1):
+            response = self.get(async_views.toppings_overview, "PizzaManager:Toppings Overview",
+                                      if_none_match=response["ETag"])
+        self.assertEqual(response.status_code, HTTP_NOT_MODIFIED)
+
+    ##############################################################################
+    ###             It should render the pizza editor through the async ORM    ###
+    ##############################################################################
+
+    def test_pizza_editor(self):
+        response = self.get(async_views.pizza_editor, "PizzaManager:Pizza Editor", self.pizza.id)
+        self.assertContains(response, "Margherita")
+        self.assertContains(response, "Olive")
+        self.assertIn("ETag", response)
+
+    def test_pizza_editor_missing(self):
+        with self.assertRaises(Http404):
+            self.get(async_views.pizza_editor, "PizzaManager:Pizza Editor", 999)
+
+    def test_pizza_editor_changes_use_synchronous_view(self):
+        request = self.factory.post(reverse("PizzaManager:Pizza Editor", args=[self.pizza.id]),
+                                    {"pizza_name_change": "", "new_name": "Marinara"})
+        request._dont_enforce_csrf_checks = True
+        async_to_sync(async_views.pizza_editor)(request, self.pizza.id)
+        self.assertTrue(Pizza.objects.filter(name="Marinara").exists())
+
+    ##############################################################################
+    ###           It should stream the menu export without buffering it       ###
+    ##############################################################################
+
+    def test_menu_export(self):
+        for menu_format in ("csv", "jsonl"):
+            response = self.get(async_views.menu_export, "PizzaManager:Menu Export", data={"format": menu_format})
+            self.assertTrue(response.is_async)
+            self.assertEqual(response["Content-Disposition"], 'attachment; filename="menu.' + menu_format + '"')
+
+            async def read():
+                return b"".join([line async for line in response.streaming_content])
+            self.assertEqual(async_to_sync(read)().decode(), "".join(iterMenuExport(menu_format)))
+
+    def test_menu_export_sends_rows_as_read(self):
+        response = self.get(async_views.menu_export, "PizzaManager:Menu Export", data={"format": "jsonl"})
+
+        async def readFirstLine():
+            return await anext(aiter(response.streaming_content))
+        # Only the toppings have been queried when the first line goes out, not the pizzas and their toppings.
+        with self.assertNumQueries(1):
+            self.assertEqual(async_to_sync(readFirstLine)(), b'{"type": "topping", "name": "Cheese"}\n')
+
+    def test_menu_export_unknown_format(self):
+        with self.assertRaises(Http404):
+            self.get(async_views.menu_export, "PizzaManager:Menu Export", data={"format": "xml"})
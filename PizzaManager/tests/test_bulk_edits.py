@@ -0,0 +1,119 @@
+from django.core.cache import cache
+from django.test import TestCase, Client
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.urls import reverse
+
+from PizzaManager.bulk_edits import applyTopping, matchingPizzas, removeTopping
+from PizzaManager.models import Topping, Pizza
+from PizzaManager.testing import PizzaMenuMixin
+
+HTTP_OK = 200
+
+# Create your tests here.
+class TestBulkEdits(PizzaMenuMixin, TestCase):
+    """
+    Tests that confirm bulk topping changes touch every matching pizza and clones keep every topping.
+    """
+
+    @classmethod
+    def setUpClass(self):
+        teardown_test_environment()
+        setup_test_environment()
+        return super().setUpClass()
+
+    def setUp(self):
+        self.client = Client()
+        cache.clear()
+        self.cheese = Topping.objects.create(name="Cheese")
+        self.basil = Topping.objects.create(name="Basil")
+        return super().setUp()
+
+    ##############################################################################
+    ###       It should add or remove a topping on every matching pizza        ###
+    ##############################################################################
+
+    def test_apply_topping(self):
+        veggie = self.createPizza("Veggie Supreme", self.basil)
+        veggie_lite = self.createPizza("veggie lite", self.cheese)
+        meat = self.createPizza("Meat Lovers")
+
+        self.assertEqual(applyTopping(self.cheese, matchingPizzas("Veggie")), 1)
+        self.assertEqual(self.toppingNames(veggie), ["Basil", "Cheese"])
+        self.assertEqual(self.toppingNames(veggie_lite), ["Cheese"])
+        self.assertEqual(self.toppingNames(meat), [])
+
+        # Pizzas that already have it keep a single link.
+        self.assertEqual(applyTopping(self.cheese, matchingPizzas()), 1)
+        self.assertEqual(self.cheese.pizza_set.count(), 3)
+
+    def test_remove_topping(self):
+        veggie = self.createPizza("Veggie Supreme", self.cheese, self.basil)
+        meat = self.createPizza("Meat Lovers", self.cheese)
+
+        self.assertEqual(removeTopping(self.cheese, matchingPizzas(" veggie ")), 1)
+        self.assertEqual(self.toppingNames(veggie), ["Basil"])
+        self.assertEqual(self.toppingNames(meat), ["Cheese"])
+        self.assertEqual(removeTopping(self.cheese, matchingPizzas()), 1)
+        self.assertEqual(removeTopping(self.cheese, matchingPizzas()), 0)
+
+    def test_bulk_change_refreshes_pages(self):
+        pizza = self.createPizza("Veggie Supreme")
+        editor = self.client.get(reverse("PizzaManager:Pizza Editor", args=[pizza.id]))
+        self.assertNotContains(self.client.get(reverse("PizzaManager:Pizza Overview")), "Cheese")
+
+        applyTopping(self.cheese, matchingPizzas())
+
+        response = self.client.get(reverse("PizzaManager:Pizza Editor", args=[pizza.id]),
+                                   HTTP_IF_NONE_MATCH=editor["ETag"])
+        self.assertEqual(response.status_code, HTTP_OK)
+        self.assertContains(self.client.get(reverse("PizzaManager:Pizza Overview")), "Cheese")
+
+    def test_bulk_change_from_editor(self):
+        veggie = self.createPizza("Veggie Supreme")
+        meat = self.createPizza("Meat Lovers", self.cheese)
+        url = reverse("PizzaManager:Toppings Editor", args=[self.cheese.id])
+
+        response = self.client.post(url, {"topping_bulk_add": "", "pizza_name_contains": "veggie"})
+        self.assertRedirects(response, reverse("PizzaManager:Topping Usage", args=[self.cheese.id]))
+        self.assertEqual(self.toppingNames(veggie), ["Cheese"])
+
+        self.client.post(url, {"topping_bulk_remove": "", "pizza_name_contains": "", "all_pizzas": "all_pizzas"})
+        self.assertEqual(self.toppingNames(veggie), [])
+        self.assertEqual(self.toppingNames(meat), [])
+
+    def test_bulk_change_rejects_blank(self):
+        veggie = self.createPizza("Veggie Supreme")
+        url = reverse("PizzaManager:Toppings Editor", args=[self.cheese.id])
+        for name_contains in ("", "   "):
+            response = self.client.post(url, {"topping_bulk_add": "", "pizza_name_contains": name_contains})
+            self.assertContains(response, "Received blank.")
+            self.assertContains(response, "No pizzas changed.")
+        response = self.client.post(url, {"topping_bulk_remove": ""})
+        self.assertContains(response, "No pizzas changed.")
+        self.assertEqual(self.toppingNames(veggie), [])
+
+    ##############################################################################
+    ###               It should clone a pizza along with its toppings          ###
+    ##############################################################################
+
+    def test_clone_pizza(self):
+        pizza = self.createPizza("Margherita", self.cheese, self.basil)
+        response = self.client.post(reverse("PizzaManager:Pizza Editor", args=[pizza.id]),
+                                    {"pizza_clone": "", "clone_name": "Margherita Special"})
+        clone = Pizza.objects.get(name="Margherita Special")
+        self.assertRedirects(response, reverse("PizzaManager:Pizza Editor", args=[clone.id]))
+        self.assertEqual(self.toppingNames(clone), ["Basil", "Cheese"])
+        self.assertEqual(self.toppingNames(pizza), ["Basil", "Cheese"])
+        self.assertContains(self.client.get(reverse("PizzaManager:Pizza Overview")), "Margherita Special")
+
+    def test_clone_errors(self):
+        pizza = self.createPizza("Margherita", self.cheese)
+        url = reverse("PizzaManager:Pizza Editor", args=[pizza.id])
+        for clone_name, message in (
+            ("  ", "Received blank. No pizza created."),
+            ("Marg!", "Please do not include any special characters in the pizza name. No pizza created."),
+            ("Margherita", "A pizza with this name already exists. Please enter a unique name. No pizza created."),
+        ):
+            response = self.client.post(url, {"pizza_clone": "", "clone_name": clone_name})
+            self.assertEqual(response.context["error_message"], message)
+        self.assertEqual(Pizza.objects.count(), 1)
@@ -0,0 +1,138 @@
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.test import TestCase, Client
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.urls import reverse
+
+from PizzaManager import views
+from PizzaManager.models import Topping, Pizza
+from PizzaManager.templatetags import menu_cache
+
+HTTP_OK = 200
+
+# Create your tests here.
+class TestCaching(TestCase):
+    """
+    Tests that confirm overview pages are served from the cache until something they show changes.
+    """
+
+    @classmethod
+    def setUpClass(self):
+        teardown_test_environment()
+        setup_test_environment()
+        return super().setUpClass()
+
+    def setUp(self):
+        self.client = Client()
+        cache.clear()
+        # Page 1 holds Pizza 0 to Pizza 4 with Cheese, page 2 holds Pizza 5 with Anchovy.
+        self.cheese = Topping.objects.create(name="Cheese")
+        self.anchovy = Topping.objects.create(name="Anchovy")
+        for index in range(5):
+            Pizza.objects.create(name="Pizza " + str(index)).toppings.add(self.cheese)
+        self.anchovy_pizza = Pizza.objects.create(name="Pizza 5")
+        self.anchovy_pizza.toppings.add(self.anchovy)
+        return super().setUp()
+
+    def getPage(self, url_name, page=1):
+        response = self.client.get(reverse(url_name), {"page": page})
+        self.assertEqual(response.status_code, HTTP_OK)
+        return response
+
+    def warmPage(self, url_name, page=1):
+        """
+        Helper method visiting a page until it is cached. The first visit creates the versions of the tags of the
+        rows it shows, which could have been invalidated after the rows were read, so only the second is stored.
+        """
+        self.getPage(url_name, page)
+        self.getPage(url_name, page)
+
+    def renameDuring(self, target, attribute):
+        """
+        Helper method renaming Anchovy to Sardine once `attribute` of `target` has listed the tags of rows already
+        read, but before their versions are read.
+        """
+        original = getattr(target, attribute)
+        def renameAfter(*args, **kwargs):
+            tags = original(*args, **kwargs)
+            if self.anchovy.name == "Anchovy":
+                self.anchovy.name = "Sardine"
+                self.anchovy.save()
+            return tags
+        return patch.object(target, attribute, renameAfter)
+
+    ##############################################################################
+    ###         It should serve repeat visits to a page from the cache         ###
+    ##############################################################################
+
+    def test_repeat_visits_cached(self):
+        for url_name in ("PizzaManager:Pizza Overview", "PizzaManager:Toppings Overview"):
+            self.warmPage(url_name)
+            # Only the menu version lookup used for conditional GETs reaches the database.
+            with self.assertNumQueries(1):
+                self.assertContains(self.getPage(url_name), "Cheese")
+
+    ##############################################################################
+    ###    It should only drop the cached pages affected by a model change     ###
+    ##############################################################################
+
+    def test_topping_rename_invalidates_pages_showing_it(self):
+        self.warmPage("PizzaManager:Pizza Overview", 1)
+        self.warmPage("PizzaManager:Pizza Overview", 2)
+        self.warmPage("PizzaManager:Toppings Overview")
+
+        self.anchovy.name = "Sardine"
+        self.anchovy.save()
+
+        # The first pizza page does not show the topping, so it stays cached.
+        with self.assertNumQueries(1):
+            self.getPage("PizzaManager:Pizza Overview", 1)
+        self.assertContains(self.getPage("PizzaManager:Pizza Overview", 2), "Sardine")
+        self.assertContains(self.getPage("PizzaManager:Toppings Overview"), "Sardine")
+
+    def test_topping_link_change_invalidates_pizza_page(self):
+        self.getPage("PizzaManager:Pizza Overview", 2)
+        self.anchovy_pizza.toppings.add(self.cheese)
+        self.assertContains(self.getPage("PizzaManager:Pizza Overview", 2), "Cheese")
+
+        self.getPage("PizzaManager:Pizza Overview", 2)
+        self.cheese.pizza_set.remove(self.anchovy_pizza)
+        self.assertNotContains(self.getPage("PizzaManager:Pizza Overview", 2), "Cheese")
+
+    def test_topping_delete_invalidates_pizza_page(self):
+        self.getPage("PizzaManager:Pizza Overview", 2)
+        self.anchovy.delete()
+        self.assertContains(self.getPage("PizzaManager:Pizza Overview", 2), "This pizza has no toppings.")
+
+    def test_new_pizza_invalidates_pizza_pages(self):
+        self.getPage("PizzaManager:Pizza Overview", 1)
+        Pizza.objects.create(name="A New Pizza")
+        self.assertContains(self.getPage("PizzaManager:Pizza Overview", 1), "A New Pizza")
+
+    ##############################################################################
+    ###     It should not store rows that changed before their tags were read  ###
+    ##############################################################################
+
+    def test_rename_before_page_tags_are_read(self):
+        # Creates the versions of the rows' tags without storing the page.
+        self.getPage("PizzaManager:Pizza Overview", 2)
+        with self.renameDuring(views.PizzaOverview, "get_cache_tags"):
+            self.assertContains(self.getPage("PizzaManager:Pizza Overview", 2), "Anchovy")
+        self.assertContains(self.getPage("PizzaManager:Pizza Overview", 2), "Sardine")
+
+    @patch("PizzaManager.views.PizzaOverview.usesPageCache", return_value=False)
+    def test_rename_before_fragment_tags_are_read(self, uses_page_cache):
+        # Creates the versions of the pizza card's tags without storing the card.
+        self.getPage("PizzaManager:Pizza Overview", 2)
+        with self.renameDuring(menu_cache, "cacheTagsFor"):
+            self.assertContains(self.getPage("PizzaManager:Pizza Overview", 2), "Anchovy")
+        self.assertContains(self.getPage("PizzaManager:Pizza Overview", 2), "Sardine")
+
+    ##############################################################################
+    ###     It should keep a card for every pizza on the benchmark menus       ###
+    ##############################################################################
+
+    def test_cache_holds_benchmark_menu(self):
+        # About 2.2 entries per pizza on the 100,000 pizza menus seeded in benchmarks/.
+        self.assertGreaterEqual(cache._max_entries, 220000)
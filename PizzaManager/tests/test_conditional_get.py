@@ -0,0 +1,108 @@
+from django.core.cache import cache
+from django.test import TestCase, Client
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.urls import reverse
+from django.utils.http import http_date
+
+from PizzaManager.models import MenuVersion, Topping, Pizza
+from PizzaManager.versioning import pizzaVersionName
+
+HTTP_OK = 200
+HTTP_NOT_MODIFIED = 304
+HTTP_NOT_FOUND = 404
+
+# Create your tests here.
+class TestConditionalGet(TestCase):
+    """
+    Tests that confirm unchanged pages are answered with 304 Not Modified from the menu version counters alone.
+    """
+
+    @classmethod
+    def setUpClass(self):
+        teardown_test_environment()
+        setup_test_environment()
+        return super().setUpClass()
+
+    def setUp(self):
+        self.client = Client()
+        cache.clear()
+        self.cheese = Topping.objects.create(name="Cheese")
+        self.olive = Topping.objects.create(name="Olive")
+        self.pizza = Pizza.objects.create(name="Margherita")
+        self.pizza.toppings.add(self.cheese)
+        self.other_pizza = Pizza.objects.create(name="Funghi")
+        return super().setUp()
+
+    def assertNotModified(self, url, etag):
+        # The only query is the lookup of the version counters the page depends on.
+        with self.assertNumQueries(1):
+            response = self.client.get(url, headers={"if-none-match": etag})
+        self.assertEqual(response.status_code, HTTP_NOT_MODIFIED)
+        self.assertEqual(response["ETag"], etag)
+
+    ##############################################################################
+    ###      It should answer unchanged overview reloads with 304 responses     ###
+    ##############################################################################
+
+    def test_overview_not_modified(self):
+        for url_name in ("PizzaManager:Pizza Overview", "PizzaManager:Toppings Overview"):
+            url = reverse(url_name)
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, HTTP_OK)
+            self.assertNotModified(url, response["ETag"])
+
+    def test_overview_modified_after_change(self):
+        url = reverse("PizzaManager:Pizza Overview")
+        etag = self.client.get(url)["ETag"]
+        self.cheese.name = "Mozzarella"
+        self.cheese.save()
+        response = self.client.get(url, headers={"if-none-match": etag})
+        self.assertEqual(response.status_code, HTTP_OK)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_overview_if_modified_since(self):
+        url = reverse("PizzaManager:Toppings Overview")
+        last_modified = self.client.get(url)["Last-Modified"]
+        response = self.client.get(url, headers={"if-modified-since": last_modified})
+        self.assertEqual(response.status_code, HTTP_NOT_MODIFIED)
+
+        response = self.client.get(url, headers={"if-modified-since": http_date(0)})
+        self.assertEqual(response.status_code, HTTP_OK)
+
+    ##############################################################################
+    ###  It should track each pizza editor separately from the rest of the menu ###
+    ##############################################################################
+
+    def test_pizza_editor_not_modified(self):
+        url = reverse("PizzaManager:Pizza Editor", args=[self.pizza.id])
+        etag = self.client.get(url)["ETag"]
+        self.assertNotModified(url, etag)
+
+        # Changes to another pizza leave this editor untouched.
+        self.other_pizza.toppings.add(self.olive)
+        self.assertNotModified(url, etag)
+
+        self.pizza.toppings.add(self.olive)
+        response = self.client.get(url, headers={"if-none-match": etag})
+        self.assertEqual(response.status_code, HTTP_OK)
+
+    def test_pizza_editor_modified_after_topping_rename(self):
+        url = reverse("PizzaManager:Pizza Editor", args=[self.pizza.id])
+        etag = self.client.get(url)["ETag"]
+        self.olive.name = "Black Olive"
+        self.olive.save()
+        response = self.client.get(url, headers={"if-none-match": etag})
+        self.assertEqual(response.status_code, HTTP_OK)
+        self.assertContains(response, "Black Olive")
+
+    def test_pizza_editor_after_delete(self):
+        # Seeded and imported pizzas have no counter of their own until they first change.
+        pizza = Pizza.objects.bulk_create([Pizza(name="Seeded")])[0]
+        self.assertFalse(MenuVersion.objects.filter(name=pizzaVersionName(pizza.id)).exists())
+        url = reverse("PizzaManager:Pizza Editor", args=[pizza.id])
+        etag = self.client.get(url)["ETag"]
+        self.assertNotModified(url, etag)
+
+        pizza.delete()
+        response = self.client.get(url, headers={"if-none-match": etag})
+        self.assertEqual(response.status_code, HTTP_NOT_FOUND)
@@ -0,0 +1,93 @@
+import os
+import tempfile
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection, transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext, setup_test_environment, teardown_test_environment
+
+from PizzaManager.backends.sqlite3.base import DatabaseWrapper
+from PizzaManager.database import sqlitePragmas
+from PizzaManager.models import Topping
+
+# Create your tests here.
+class TestSqlitePragmas(TestCase):
+    """
+    Tests that confirm every SQLite connection is switched to the configured pragmas.
+    """
+
+    @classmethod
+    def setUpClass(self):
+        teardown_test_environment()
+        setup_test_environment()
+        return super().setUpClass()
+
+    def pragma(self, database, name):
+        with database.cursor() as cursor:
+            cursor.execute("PRAGMA " + name)
+            return cursor.fetchone()[0]
+
+    ##############################################################################
+    ###            It should apply the configured pragmas on connect           ###
+    ##############################################################################
+
+    def test_pragmas_applied(self):
+        self.assertEqual(self.pragma(connection, "busy_timeout"), 5000)
+        # NORMAL
+        self.assertEqual(self.pragma(connection, "synchronous"), 1)
+        self.assertEqual(self.pragma(connection, "cache_size"), -20000)
+
+    def test_file_database_uses_wal(self):
+        # The test database lives in memory, which has no journal to switch, so a file database is opened here.
+        with tempfile.TemporaryDirectory() as directory:
+            database = DatabaseWrapper(dict(connection.settings_dict, NAME=os.path.join(directory, "db.sqlite3")))
+            try:
+                self.assertEqual(self.pragma(database, "journal_mode"), "wal")
+            finally:
+                database.close()
+
+    ##############################################################################
+    ###             It should only accept plain words and numbers              ###
+    ##############################################################################
+
+    def test_blank_pragmas_skipped(self):
+        with self.settings(SQLITE_PRAGMAS={"journal_mode": "", "busy_timeout": " 100 "}):
+            self.assertEqual(sqlitePragmas(), {"busy_timeout": "100"})
+
+    def test_invalid_pragma_rejected(self):
+        with self.settings(SQLITE_PRAGMAS={"cache_size": "1; DROP TABLE PizzaManager_pizza"}):
+            with self.assertRaises(ImproperlyConfigured):
+                sqlitePragmas()
+
+class TestSqliteTransactions(TransactionTestCase):
+    """
+    Tests that confirm transactions take the SQLite write lock as soon as they begin.
+    """
+
+    @classmethod
+    def setUpClass(self):
+        teardown_test_environment()
+        setup_test_environment()
+        return super().setUpClass()
+
+    def captureBegin(self):
+        with CaptureQueriesContext(connection) as queries:
+            with transaction.atomic():
+                Topping.objects.create(name="Cheese")
+        return queries[0]["sql"]
+
+    ##############################################################################
+    ###           It should begin transactions in the configured mode          ###
+    ##############################################################################
+
+    def test_immediate_transactions(self):
+        self.assertEqual(self.captureBegin(), "BEGIN IMMEDIATE")
+
+    @override_settings(SQLITE_TRANSACTION_MODE="deferred")
+    def test_deferred_transactions(self):
+        self.assertEqual(self.captureBegin(), "BEGIN DEFERRED")
+
+    @override_settings(SQLITE_TRANSACTION_MODE="LATER")
+    def test_invalid_transaction_mode(self):
+        with self.assertRaises(ImproperlyConfigured):
+            self.captureBegin()
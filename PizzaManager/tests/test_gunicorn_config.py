@@ -0,0 +1,134 @@
+import os
+import runpy
+import tempfile
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from django.conf import settings
+from django.test import TestCase
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+CONFIG_PATH = os.path.join(settings.BASE_DIR, "gunicorn.conf.py")
+SIZING_VARIABLES = (
+    "WEB_CONCURRENCY", "GUNICORN_THREADS", "DJANGO_MENU_SNAPSHOT", "DJANGO_CACHE_DIR", "PROMETHEUS_MULTIPROC_DIR",
+)
+
+# Create your tests here.
+class TestGunicornConfig(TestCase):
+    """
+    Tests that confirm gunicorn.conf.py sizes the server from the cores it may use and resets workers after forking.
+    """
+
+    @classmethod
+    def setUpClass(self):
+        teardown_test_environment()
+        setup_test_environment()
+        return super().setUpClass()
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        return super().setUp()
+
+    def loadConfig(self, cores=4, **environ):
+        """
+        Helper method reading gunicorn.conf.py as gunicorn would, on `cores` cores with only `environ` set.
+        Temporary directories it makes are made inside the test's own. The environment it leaves behind is kept as
+        `self.environ`.
+        """
+        cleaned = {name: value for name, value in os.environ.items() if name not in SIZING_VARIABLES}
+        with patch.dict(os.environ, dict(cleaned, **environ), clear=True), \
+                patch("os.sched_getaffinity", return_value=set(range(cores)), create=True), \
+                patch("tempfile.tempdir", self.directory.name):
+            config = runpy.run_path(CONFIG_PATH)
+            self.environ = dict(os.environ)
+        return config
+
+    ##############################################################################
+    ###         It should size workers and threads from the CPU count          ###
+    ##############################################################################
+
+    def test_sizes_from_cores(self):
+        for cores, workers in ((1, 3), (2, 5), (8, 17)):
+            config = self.loadConfig(cores)
+            self.assertEqual((config["workers"], config["threads"]), (workers, 1))
+
+    def test_snapshot_sizing(self):
+        # Fewer workers, each holding a copy of the menu, with threads making up the difference.
+        config = self.loadConfig(8, DJANGO_MENU_SNAPSHOT="True")
+        self.assertEqual((config["workers"], config["threads"]), (9, 2))
+
+    def test_environment_overrides(self):
+        config = self.loadConfig(
+            8, WEB_CONCURRENCY="3", GUNICORN_THREADS="4", GUNICORN_MAX_REQUESTS="0", GUNICORN_PRELOAD="False",
+            GUNICORN_TIMEOUT="90",
+        )
+        self.assertEqual((config["workers"], config["threads"]), (3, 4))
+        self.assertEqual(config["max_requests"], 0)
+        self.assertFalse(config["preload_app"])
+        self.assertEqual(config["timeout"], 90)
+
+    def test_preloads_and_recycles_workers(self):
+        config = self.loadConfig()
+        self.assertTrue(config["preload_app"])
+        self.assertEqual((config["max_requests"], config["max_requests_jitter"]), (2000, 200))
+
+    ##############################################################################
+    ###      It should share the cache and metrics between every worker        ###
+    ##############################################################################
+
+    def test_shares_cache_and_metrics_between_workers(self):
+        config = self.loadConfig(4)
+        for variable in ("DJANGO_CACHE_DIR", "PROMETHEUS_MULTIPROC_DIR"):
+            self.assertTrue(os.path.isdir(self.environ[variable]))
+            self.assertEqual(os.path.dirname(self.environ[variable]), self.directory.name)
+        self.assertEqual(len(config["CREATED_DIRECTORIES"]), 2)
+
+        config["on_exit"](server=None)
+        self.assertEqual(os.listdir(self.directory.name), [])
+
+    def test_keeps_configured_directories(self):
+        config = self.loadConfig(4, DJANGO_CACHE_DIR="/srv/cache", PROMETHEUS_MULTIPROC_DIR="/srv/metrics")
+        self.assertEqual(self.environ["DJANGO_CACHE_DIR"], "/srv/cache")
+        self.assertEqual(self.environ["PROMETHEUS_MULTIPROC_DIR"], "/srv/metrics")
+        self.assertEqual(config["CREATED_DIRECTORIES"], [])
+
+    def test_single_worker_keeps_its_own_cache(self):
+        config = self.loadConfig(4, WEB_CONCURRENCY="1")
+        self.assertNotIn("DJANGO_CACHE_DIR", self.environ)
+        self.assertNotIn("PROMETHEUS_MULTIPROC_DIR", self.environ)
+        self.assertEqual(config["CREATED_DIRECTORIES"], [])
+
+    def test_refuses_unshared_workers(self):
+        # `--workers 4` on the command line, after the config file read WEB_CONCURRENCY=1.
+        config = self.loadConfig(4, WEB_CONCURRENCY="1")
+        with patch.dict(os.environ, clear=True):
+            with self.assertRaisesMessage(RuntimeError, "DJANGO_CACHE_DIR and PROMETHEUS_MULTIPROC_DIR"):
+                config["on_starting"](SimpleNamespace(cfg=SimpleNamespace(workers=4)))
+            config["on_starting"](SimpleNamespace(cfg=SimpleNamespace(workers=1)))
+            os.environ.update(DJANGO_CACHE_DIR="/srv/cache", PROMETHEUS_MULTIPROC_DIR="/srv/metrics")
+            config["on_starting"](SimpleNamespace(cfg=SimpleNamespace(workers=4)))
+
+    ##############################################################################
+    ###              It should reset what workers inherit on fork              ###
+    ##############################################################################
+
+    def test_post_fork_closes_connections(self):
+        config = self.loadConfig()
+        with patch("django.db.connections.close_all") as close_all:
+            config["post_fork"](server=None, worker=SimpleNamespace(pid=1234))
+        close_all.assert_called_once_with()
+
+    def test_child_exit_marks_worker_dead(self):
+        config = self.loadConfig(PROMETHEUS_MULTIPROC_DIR=self.directory.name)
+        with patch.dict(os.environ, {"PROMETHEUS_MULTIPROC_DIR": self.directory.name}), \
+                patch("prometheus_client.multiprocess.mark_process_dead") as mark_process_dead:
+            config["child_exit"](server=None, worker=SimpleNamespace(pid=1234))
+        mark_process_dead.assert_called_once_with(1234)
+
+    def test_child_exit_without_shared_metrics(self):
+        config = self.loadConfig(WEB_CONCURRENCY="1")
+        with patch.dict(os.environ), patch("prometheus_client.multiprocess.mark_process_dead") as mark_process_dead:
+            os.environ.pop("PROMETHEUS_MULTIPROC_DIR", None)
+            config["child_exit"](server=None, worker=SimpleNamespace(pid=1234))
+        mark_process_dead.assert_not_called()
@@ -0,0 +1,153 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase, Client
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.urls import reverse
+
+from PizzaManager.management.reporting import peakMemoryMB
+from PizzaManager.menu_io import importMenuRows, parseMenuRows
+from PizzaManager.models import Topping, Pizza
+
+HTTP_OK = 200
+HTTP_NOT_FOUND = 404
+
+# Create your tests here.
+class TestMenuImportExport(TestCase):
+    """
+    Tests that confirm whole menus can be streamed out and bulk imported back in.
+    """
+
+    @classmethod
+    def setUpClass(self):
+        teardown_test_environment()
+        setup_test_environment()
+        return super().setUpClass()
+
+    def setUp(self):
+        self.client = Client()
+        cheese = Topping.objects.create(name="Cheese")
+        olive = Topping.objects.create(name="Olive")
+        Topping.objects.create(name="Anchovy")
+        pizza = Pizza.objects.create(name="Margherita")
+        pizza.toppings.add(cheese, olive)
+        return super().setUp()
+
+    def writeMenuFile(self, suffix, contents):
+        menu_file = tempfile.NamedTemporaryFile("w", suffix=suffix, delete=False)
+        menu_file.write(contents)
+        menu_file.close()
+        self.addCleanup(os.remove, menu_file.name)
+        return menu_file.name
+
+    ##############################################################################
+    ###            It should stream the whole menu out as CSV or JSONL         ###
+    ##############################################################################
+
+    def test_export_csv(self):
+        response = self.client.get(reverse("PizzaManager:Menu Export"))
+        self.assertEqual(response.status_code, HTTP_OK)
+        self.assertTrue(response.streaming)
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines, [
+            "type,name,toppings",
+            "topping,Anchovy,",
+            "topping,Cheese,",
+            "topping,Olive,",
+            "pizza,Margherita,Cheese;Olive",
+        ])
+
+    def test_export_jsonl(self):
+        response = self.client.get(reverse("PizzaManager:Menu Export"), {"format": "jsonl"})
+        self.assertEqual(response.status_code, HTTP_OK)
+        rows = [json.loads(line) for line in b"".join(response.streaming_content).decode().splitlines()]
+        self.assertEqual(len(rows), 4)
+        self.assertEqual(rows[-1], {"type": "pizza", "name": "Margherita", "toppings": ["Cheese", "Olive"]})
+
+    def test_export_unknown_format(self):
+        response = self.client.get(reverse("PizzaManager:Menu Export"), {"format": "xml"})
+        self.assertEqual(response.status_code, HTTP_NOT_FOUND)
+
+    ##############################################################################
+    ###          It should bulk import menus in chunks from CSV or JSONL       ###
+    ##############################################################################
+
+    def test_import_csv(self):
+        path = self.writeMenuFile(".csv", "\n".join([
+            "type,name,toppings",
+            "topping,Basil,",
+            "pizza,Margherita,Basil",
+            "pizza,Funghi,Cheese;Mushroom",
+            "pizza,Bad$Name,Cheese",
+        ]) + "\n")
+        output = StringIO()
+        call_command("import_menu", path, "--chunk-size", "2", stdout=output)
+
+        self.assertIn("rows/sec", output.getvalue())
+        if peakMemoryMB() is not None:
+            self.assertIn("Peak memory:", output.getvalue())
+        self.assertEqual(
+            sorted(Pizza.objects.get(name="Margherita").toppings.values_list("name", flat=True)),
+            ["Basil", "Cheese", "Olive"],
+        )
+        self.assertEqual(
+            sorted(Pizza.objects.get(name="Funghi").toppings.values_list("name", flat=True)),
+            ["Cheese", "Mushroom"],
+        )
+        self.assertFalse(Pizza.objects.filter(name="Bad$Name").exists())
+
+    def test_import_export_round_trip(self):
+        response = self.client.get(reverse("PizzaManager:Menu Export"), {"format": "jsonl"})
+        path = self.writeMenuFile(".jsonl", b"".join(response.streaming_content).decode())
+        Pizza.objects.all().delete()
+        Topping.objects.all().delete()
+
+        call_command("import_menu", path, stdout=StringIO())
+        self.assertEqual(Topping.objects.count(), 3)
+        self.assertEqual(
+            sorted(Pizza.objects.get(name="Margherita").toppings.values_list("name", flat=True)),
+            ["Cheese", "Olive"],
+        )
+
+    def test_import_counts_only_new_links(self):
+        path = self.writeMenuFile(".jsonl", "\n".join([
+            '{"type": "pizza", "name": "Margherita", "toppings": ["Cheese", "Olive", "Anchovy"]}',
+            '{"type": "pizza", "name": "Funghi", "toppings": ["Cheese"]}',
+        ]) + "\n")
+        for pizzas, links in ((1, 2), (0, 0)):
+            with open(path, encoding="utf-8") as menu_file:
+                totals = importMenuRows(parseMenuRows(menu_file, "jsonl"))
+            # Margherita already had Cheese and Olive, and the second import adds nothing.
+            self.assertEqual((totals["pizzas"], totals["links"]), (pizzas, links))
+
+    def test_import_malformed_jsonl(self):
+        path = self.writeMenuFile(".jsonl", "\n".join([
+            '{"type": "topping", "name": "Basil"}',
+            "",
+            '{"type": "topping", "name": "Sage"',
+        ]) + "\n")
+        with self.assertRaisesMessage(CommandError, "Line 3 is not valid JSON"):
+            call_command("import_menu", path, stdout=StringIO())
+
+        path = self.writeMenuFile(".jsonl", '["topping", "Basil"]\n')
+        with self.assertRaisesMessage(CommandError, "Line 1 is not a JSON object."):
+            call_command("import_menu", path, stdout=StringIO())
+
+    def test_import_mistyped_jsonl(self):
+        for line, message in (
+            ('{"type": "pizza", "name": null}', "Line 2 needs a type and name given as strings."),
+            ('{"type": 1, "name": "Hawaii"}', "Line 2 needs a type and name given as strings."),
+            ('{"type": "pizza", "name": "Hawaii", "toppings": "Ham"}',
+             "Line 2 needs its toppings given as a list of strings."),
+            ('{"type": "pizza", "name": "Hawaii", "toppings": ["Ham", 3]}',
+             "Line 2 needs its toppings given as a list of strings."),
+        ):
+            path = self.writeMenuFile(".jsonl", '{"type": "topping", "name": "Basil"}\n' + line + "\n")
+            with self.assertRaisesMessage(CommandError, message):
+                call_command("import_menu", path, stdout=StringIO())
+        self.assertFalse(Pizza.objects.filter(name="Hawaii").exists())
+        self.assertFalse(Topping.objects.filter(name__in=["H", "a", "m"]).exists())
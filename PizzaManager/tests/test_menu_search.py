@@ -0,0 +1,173 @@
+from unittest.mock import patch
+
+from django.db import connection
+from django.test import TestCase, Client, override_settings
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.urls import reverse
+
+from PizzaManager.models import Topping, Pizza
+from PizzaManager.search import searchNames, searchWords
+
+HTTP_OK = 200
+HTTP_NOT_MODIFIED = 304
+HTTP_BAD_REQUEST = 400
+
+# Create your tests here.
+class TestMenuSearch(TestCase):
+    """
+    Tests that confirm the overview search finds pizzas and toppings by the starts of the words in their names, best
+    match first.
+    """
+
+    @classmethod
+    def setUpClass(self):
+        teardown_test_environment()
+        setup_test_environment()
+        return super().setUpClass()
+
+    def setUp(self):
+        self.client = Client()
+        for name in ("Pepper", "Pepperoni", "Roasted Red Pepper", "Jalapeño", "Onion"):
+            Topping.objects.create(name=name)
+        for name in ("Pepperoni Rolls", "Margherita", "Spicy Pepper Feast"):
+            Pizza.objects.create(name=name)
+        return super().setUp()
+
+    def search(self, **params):
+        return self.client.get(reverse("PizzaManager:Menu Search"), params)
+
+    def names(self, **params):
+        return [match["name"] for match in self.search(**params).json()["results"]]
+
+    ##############################################################################
+    ###       It should match the starts of words, in any order, ranked        ###
+    ##############################################################################
+
+    def test_prefix_search(self):
+        # Names made mostly of the word searched for come first, ties in name order.
+        self.assertEqual(self.names(kind="toppings", q="pep"), ["Pepper", "Pepperoni", "Roasted Red Pepper"])
+        self.assertEqual(self.names(kind="toppings", q="PEPPERONI"), ["Pepperoni"])
+        self.assertEqual(self.names(kind="toppings", q="eroni"), [])
+
+    def test_every_word_must_match(self):
+        self.assertEqual(self.names(kind="toppings", q="pep ro"), ["Roasted Red Pepper"])
+        self.assertEqual(self.names(kind="toppings", q="red roast"), ["Roasted Red Pepper"])
+        self.assertEqual(self.names(kind="pizzas", q="rolls pepperoni"), ["Pepperoni Rolls"])
+
+    def test_accents_are_ignored(self):
+        self.assertEqual(self.names(kind="toppings", q="jalapeno"), ["Jalapeño"])
+
+    def test_pizzas_by_default(self):
+        self.assertEqual(self.names(q="pep"), ["Pepperoni Rolls", "Spicy Pepper Feast"])
+        result = self.search(q="Margherita").json()["results"][0]
+        self.assertEqual(result, {"id": Pizza.objects.get(name="Margherita").id, "name": "Margherita"})
+
+    def test_search_syntax_is_not_interpreted(self):
+        for text in ('"pep', "pep OR onion", "pep*", "NOT pep", "name:pep", "(pep"):
+            response = self.search(kind="toppings", q=text)
+            self.assertEqual(response.status_code, HTTP_OK, text)
+        self.assertEqual(self.names(kind="toppings", q="pep OR onion"), [])
+        self.assertEqual(self.names(kind="toppings", q="-_- !!"), [])
+
+    def test_search_words(self):
+        self.assertEqual(searchWords("  Red-Pepper  flakes_2 "), ["red", "pepper", "flakes", "2"])
+        self.assertEqual(len(searchWords("a " * 20)), 8)
+
+    ##############################################################################
+    ###             It should follow every change to a name                    ###
+    ##############################################################################
+
+    def test_index_follows_saves_and_deletes(self):
+        topping = Topping.objects.get(name="Onion")
+        topping.name = "Red Onion"
+        topping.save()
+        self.assertEqual(self.names(kind="toppings", q="red"), ["Red Onion", "Roasted Red Pepper"])
+        topping.delete()
+        self.assertEqual(self.names(kind="toppings", q="red"), ["Roasted Red Pepper"])
+        self.assertEqual(self.names(kind="toppings", q="onion"), [])
+
+    def test_index_follows_bulk_changes(self):
+        # Bulk writes send no model signals, which is why the index is kept by triggers.
+        Pizza.objects.bulk_create([Pizza(name="Hawaiian"), Pizza(name="Hawaiian Deluxe")])
+        self.assertEqual(self.names(q="haw"), ["Hawaiian", "Hawaiian Deluxe"])
+        Pizza.objects.filter(name="Hawaiian").update(name="Aloha")
+        self.assertEqual(self.names(q="haw"), ["Hawaiian Deluxe"])
+        self.assertEqual(self.names(q="aloha"), ["Aloha"])
+        Pizza.objects.filter(name__startswith="Hawaiian").delete()
+        self.assertEqual(self.names(q="haw"), [])
+
+    ##############################################################################
+    ###            It should cap the results and report what was cut           ###
+    ##############################################################################
+
+    def test_limit(self):
+        data = self.search(kind="toppings", q="pep", limit=2).json()
+        self.assertEqual([match["name"] for match in data["results"]], ["Pepper", "Pepperoni"])
+        self.assertTrue(data["more"])
+        self.assertFalse(self.search(kind="toppings", q="pep", limit=3).json()["more"])
+
+    def test_invalid_requests(self):
+        for limit in ("0", "26", "many"):
+            self.assertEqual(self.search(q="pep", limit=limit).status_code, HTTP_BAD_REQUEST)
+        self.assertEqual(self.search(kind="sauces", q="pep").status_code, HTTP_BAD_REQUEST)
+
+    def test_empty_and_overlong_searches(self):
+        self.assertEqual(self.search(q="").json(), {"results": [], "more": False})
+        self.assertEqual(self.search(q="p" * 51).json(), {"results": [], "more": False})
+
+    ##############################################################################
+    ###       It should search the index and answer repeats from versions      ###
+    ##############################################################################
+
+    def test_search_uses_index(self):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'EXPLAIN QUERY PLAN SELECT rowid, name FROM "PizzaManager_pizza_search" '
+                'WHERE "PizzaManager_pizza_search" MATCH %s LIMIT 1000', ['"pep"*']
+            )
+            plan = " ".join(str(row[-1]) for row in cursor.fetchall())
+        self.assertIn("VIRTUAL TABLE INDEX", plan)
+
+    @patch("PizzaManager.search.MAX_RANKED_MATCHES", 2)
+    def test_ranking_is_capped(self):
+        # Only the two oldest matches are ranked, so "Roasted Red Pepper" is left out even with room for it.
+        self.assertEqual(self.names(kind="toppings", q="pep"), ["Pepper", "Pepperoni"])
+
+    def test_repeated_search(self):
+        response = self.search(q="pep")
+        response = self.client.get(reverse("PizzaManager:Menu Search"), {"q": "pep"},
+                                   HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(response.status_code, HTTP_NOT_MODIFIED)
+
+        Pizza.objects.create(name="Pepper Jack")
+        response = self.client.get(reverse("PizzaManager:Menu Search"), {"q": "pep"},
+                                   HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(response.status_code, HTTP_OK)
+        self.assertIn("Pepper Jack", [match["name"] for match in response.json()["results"]])
+
+    ##############################################################################
+    ###         It should fall back to LIKE without full text search          ###
+    ##############################################################################
+
+    @override_settings(FULL_TEXT_SEARCH=False)
+    def test_like_fallback(self):
+        # Matches anywhere in the name, with names starting with the first word first.
+        self.assertEqual(self.names(kind="toppings", q="pep"), ["Pepper", "Pepperoni", "Roasted Red Pepper"])
+        self.assertEqual(self.names(kind="toppings", q="oni"), ["Onion", "Pepperoni"])
+        self.assertEqual(self.names(kind="toppings", q="red pep"), ["Roasted Red Pepper"])
+        self.assertEqual(searchNames(Topping, "pep", 1), [{"id": Topping.objects.get(name="Pepper").id, "name": "Pepper"}])
+
+    ##############################################################################
+    ###             It should put a search box on both overviews               ###
+    ##############################################################################
+
+    def test_overviews_have_search_boxes(self):
+        response = self.client.get(reverse("PizzaManager:Pizza Overview"))
+        self.assertContains(response, 'id="menu_search_input"')
+        self.assertContains(response, reverse("PizzaManager:Menu Search") + "?kind=pizzas")
+        self.assertContains(response, reverse("PizzaManager:Pizza Editor", args=[0]))
+
+        response = self.client.get(reverse("PizzaManager:Toppings Overview"))
+        self.assertContains(response, 'id="menu_search_input"')
+        self.assertContains(response, reverse("PizzaManager:Menu Search") + "?kind=toppings")
+        self.assertContains(response, reverse("PizzaManager:Toppings Editor", args=[0]))
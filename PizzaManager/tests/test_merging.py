@@ -0,0 +1,119 @@
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase, Client
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.urls import reverse
+
+from PizzaManager.merging import MergeError, mergeToppings
+from PizzaManager.models import Topping, Pizza
+from PizzaManager.testing import PizzaMenuMixin
+
+HTTP_OK = 200
+
+# Create your tests here.
+class TestMergeToppings(PizzaMenuMixin, TestCase):
+    """
+    Tests that confirm merging toppings moves every pizza onto the topping kept.
+    """
+
+    @classmethod
+    def setUpClass(self):
+        teardown_test_environment()
+        setup_test_environment()
+        return super().setUpClass()
+
+    def setUp(self):
+        self.client = Client()
+        cache.clear()
+        self.target = Topping.objects.create(name="Pepperoni")
+        self.source = Topping.objects.create(name="pepperoni ")
+        self.other_source = Topping.objects.create(name="Peperoni")
+        self.basil = Topping.objects.create(name="Basil")
+        return super().setUp()
+
+    ##############################################################################
+    ###      It should move every pizza onto the topping kept, exactly once    ###
+    ##############################################################################
+
+    def test_merge_toppings(self):
+        only_source = self.createPizza("Only Source", self.source, self.basil)
+        both = self.createPizza("Both", self.target, self.source)
+        two_sources = self.createPizza("Two Sources", self.source, self.other_source)
+        untouched = self.createPizza("Untouched", self.basil)
+
+        totals = mergeToppings(self.target, [self.source, self.other_source])
+
+        self.assertEqual(totals, {"moved": 2, "duplicates": 2, "deleted": 2})
+        self.assertEqual(self.toppingNames(only_source), ["Basil", "Pepperoni"])
+        self.assertEqual(self.toppingNames(both), ["Pepperoni"])
+        self.assertEqual(self.toppingNames(two_sources), ["Pepperoni"])
+        self.assertEqual(self.toppingNames(untouched), ["Basil"])
+        self.assertQuerySetEqual(Topping.objects.order_by("name"), [self.basil, self.target])
+
+    def test_merge_rejects_target_as_source(self):
+        with self.assertRaisesRegex(MergeError, "into itself"):
+            mergeToppings(self.target, [self.source, self.target])
+        with self.assertRaises(MergeError):
+            mergeToppings(self.target, [])
+        self.assertTrue(Topping.objects.filter(pk=self.source.pk).exists())
+
+    def test_merge_rolls_back_together(self):
+        pizza = self.createPizza("Both", self.target, self.source)
+        with patch("PizzaManager.merging.bumpVersions", side_effect=RuntimeError("Simulated failure.")):
+            with self.assertRaises(RuntimeError):
+                mergeToppings(self.target, [self.source])
+        # The links dropped and the sources deleted before the failure were restored with it.
+        self.assertEqual(self.toppingNames(pizza), ["Pepperoni", "pepperoni "])
+        self.assertTrue(Topping.objects.filter(pk=self.source.pk).exists())
+
+    def test_merge_refreshes_pages(self):
+        pizza = self.createPizza("Both", self.source)
+        editor = self.client.get(reverse("PizzaManager:Pizza Editor", args=[pizza.id]))
+        self.client.get(reverse("PizzaManager:Pizza Overview"))
+
+        mergeToppings(self.target, [self.source])
+
+        response = self.client.get(reverse("PizzaManager:Pizza Editor", args=[pizza.id]),
+                                   HTTP_IF_NONE_MATCH=editor["ETag"])
+        self.assertEqual(response.status_code, HTTP_OK)
+        self.assertNotContains(self.client.get(reverse("PizzaManager:Pizza Overview")), "pepperoni ")
+
+    ##############################################################################
+    ###         It should merge from the topping editor and the command line   ###
+    ##############################################################################
+
+    def test_merge_from_editor(self):
+        pizza = self.createPizza("Only Source", self.source)
+        response = self.client.post(reverse("PizzaManager:Toppings Editor", args=[self.source.id]),
+                                    {"topping_merge": "", "merge_into": "Pepperoni"})
+        self.assertRedirects(response, reverse("PizzaManager:Toppings Editor", args=[self.target.id]))
+        self.assertEqual(self.toppingNames(pizza), ["Pepperoni"])
+        self.assertFalse(Topping.objects.filter(pk=self.source.pk).exists())
+
+    def test_merge_from_editor_errors(self):
+        response = self.client.post(reverse("PizzaManager:Toppings Editor", args=[self.source.id]),
+                                    {"topping_merge": "", "merge_into": "Anchovies"})
+        self.assertEqual(response.context["error_message"],
+                         "You have attempted to merge into a topping that does not exist. No toppings merged.")
+        response = self.client.post(reverse("PizzaManager:Toppings Editor", args=[self.source.id]),
+                                    {"topping_merge": "", "merge_into": "pepperoni "})
+        self.assertEqual(response.context["error_message"],
+                         "A topping cannot be merged into itself. No toppings merged.")
+        self.assertTrue(Topping.objects.filter(pk=self.source.pk).exists())
+
+    def test_merge_command(self):
+        pizza = self.createPizza("Two Sources", self.source, self.other_source)
+        output = StringIO()
+        call_command("merge_toppings", "Pepperoni", "pepperoni ", "Peperoni", stdout=output)
+        self.assertIn("Merged 2 toppings into 'Pepperoni': 1 pizza links moved and 1 duplicates dropped", output.getvalue())
+        self.assertEqual(self.toppingNames(pizza), ["Pepperoni"])
+
+    def test_merge_command_errors(self):
+        with self.assertRaisesRegex(CommandError, "No topping named 'Anchovies'"):
+            call_command("merge_toppings", "Pepperoni", "Anchovies", stdout=StringIO())
+        with self.assertRaisesRegex(CommandError, "into itself"):
+            call_command("merge_toppings", "Pepperoni", "Pepperoni", stdout=StringIO())
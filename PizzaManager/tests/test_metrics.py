@@ -0,0 +1,146 @@
+import os
+import subprocess
+import sys
+import tempfile
+
+from django.conf import settings
+from django.core.cache import cache
+from django.test import TestCase, Client, override_settings
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.urls import reverse
+from prometheus_client import REGISTRY
+
+from PizzaManager.metrics import OTHER_ERROR_KIND, errorKind, exposition, metricsRegistry
+from PizzaManager.models import Topping, Pizza
+
+HTTP_OK = 200
+HTTP_FORBIDDEN = 403
+
+# Create your tests here.
+class TestMetrics(TestCase):
+    """
+    Tests that confirm /metrics reports requests, queries, cache lookups and error replies.
+    """
+
+    @classmethod
+    def setUpClass(self):
+        teardown_test_environment()
+        setup_test_environment()
+        return super().setUpClass()
+
+    def setUp(self):
+        self.client = Client()
+        cache.clear()
+        self.pizza = Pizza.objects.create(name="Margherita")
+        self.pizza.toppings.add(Topping.objects.create(name="Cheese"))
+        return super().setUp()
+
+    def sample(self, name, **labels):
+        # Metrics live for the whole test run, so tests compare values before and after a request.
+        return REGISTRY.get_sample_value(name, labels) or 0
+
+    ##############################################################################
+    ###          It should serve metrics in the Prometheus text format         ###
+    ##############################################################################
+
+    def test_metrics_endpoint(self):
+        self.client.get(reverse("PizzaManager:Pizza Overview"))
+        response = self.client.get(reverse("PizzaManager:Metrics"))
+        self.assertEqual(response.status_code, HTTP_OK)
+        self.assertTrue(response["Content-Type"].startswith("text/plain"))
+        content = response.content.decode()
+        for name in ("pizzamanager_requests_total", "pizzamanager_request_duration_seconds_bucket",
+                     "pizzamanager_db_queries_total", "pizzamanager_cache_lookups_total"):
+            self.assertIn(name, content)
+        self.assertIn('url_name="PizzaManager:Pizza Overview"', content)
+
+    @override_settings(METRICS_TOKEN="secret")
+    def test_metrics_token(self):
+        self.assertEqual(self.client.get(reverse("PizzaManager:Metrics")).status_code, HTTP_FORBIDDEN)
+        response = self.client.get(reverse("PizzaManager:Metrics"), HTTP_AUTHORIZATION="Bearer secret")
+        self.assertEqual(response.status_code, HTTP_OK)
+
+    ##############################################################################
+    ###       It should count and time requests by URL name and method         ###
+    ##############################################################################
+
+    @override_settings(OVERVIEW_CACHE_TIMEOUT=0)
+    def test_request_metrics(self):
+        labels = {"url_name": "PizzaManager:Pizza Editor", "method": "GET"}
+        requests = self.sample("pizzamanager_requests_total", status="200", **labels)
+        observed = self.sample("pizzamanager_request_duration_seconds_count", **labels)
+        queries = self.sample("pizzamanager_db_queries_total", **labels)
+
+        self.client.get(reverse("PizzaManager:Pizza Editor", args=[self.pizza.id]))
+
+        self.assertEqual(self.sample("pizzamanager_requests_total", status="200", **labels), requests + 1)
+        self.assertEqual(self.sample("pizzamanager_request_duration_seconds_count", **labels), observed + 1)
+        # Versions, pizza, its toppings and the topping list.
+        self.assertEqual(self.sample("pizzamanager_db_queries_total", **labels), queries + 4)
+
+    def test_unmatched_requests(self):
+        labels = {"url_name": "unmatched", "method": "GET", "status": "404"}
+        before = self.sample("pizzamanager_requests_total", **labels)
+        self.client.get("/no-such-page/")
+        self.assertEqual(self.sample("pizzamanager_requests_total", **labels), before + 1)
+
+    ##############################################################################
+    ###                  It should count cache hits and misses                 ###
+    ##############################################################################
+
+    def test_cache_metrics(self):
+        hits = self.sample("pizzamanager_cache_lookups_total", result="hit")
+        misses = self.sample("pizzamanager_cache_lookups_total", result="miss")
+        self.client.get(reverse("PizzaManager:Toppings Overview"))
+        self.client.get(reverse("PizzaManager:Toppings Overview"))
+        self.assertEqual(self.sample("pizzamanager_cache_lookups_total", result="miss"), misses + 1)
+        self.assertEqual(self.sample("pizzamanager_cache_lookups_total", result="hit"), hits + 1)
+
+    ##############################################################################
+    ###            It should count error replies by the kind of error          ###
+    ##############################################################################
+
+    def test_error_reply_metrics(self):
+        labels = {"view": "pizza", "kind": "duplicate_topping"}
+        before = self.sample("pizzamanager_error_replies_total", **labels)
+        self.client.post(reverse("PizzaManager:Pizza Editor", args=[self.pizza.id]),
+                         {"pizza_topping_add": "", "toppings_options": "Cheese"})
+        self.assertEqual(self.sample("pizzamanager_error_replies_total", **labels), before + 1)
+
+        labels = {"view": "topping", "kind": "blank_name"}
+        before = self.sample("pizzamanager_error_replies_total", **labels)
+        self.client.post(reverse("PizzaManager:Topping Create"), {"topping_new": "", "new_topping_name": ""})
+        self.assertEqual(self.sample("pizzamanager_error_replies_total", **labels), before + 1)
+
+    def test_error_kinds(self):
+        self.assertEqual(errorKind("A pizza with this name already exists. Please enter a unique name."),
+                         "duplicate_name")
+        self.assertEqual(errorKind("Please do not include any special characters in the pizza name."),
+                         "special_characters")
+        self.assertEqual(errorKind("Please keep the pizza name to 50 characters or fewer."), "long_name")
+        self.assertEqual(errorKind("This topping is being replaced with itself. No change made."), "same_topping")
+        self.assertEqual(errorKind("You have attempted to alter a pizza that does not exist."), "missing_pizza")
+        self.assertEqual(errorKind("Something new."), OTHER_ERROR_KIND)
+
+    ##############################################################################
+    ###          It should add up the metrics of every worker process          ###
+    ##############################################################################
+
+    def test_multiprocess_metrics(self):
+        record = (
+            "from PizzaManager.metrics import recordRequest, recordCacheLookup;"
+            "recordRequest('PizzaManager:index', 'GET', 200, 0.01, 2, 0.001);"
+            "recordCacheLookup(hit=True)"
+        )
+        with tempfile.TemporaryDirectory() as directory:
+            env = dict(os.environ, PROMETHEUS_MULTIPROC_DIR=directory)
+            for worker in range(2):
+                subprocess.run([sys.executable, "-c", record], cwd=settings.BASE_DIR, env=env, check=True)
+
+            registry = metricsRegistry(directory)
+            labels = {"url_name": "PizzaManager:index", "method": "GET"}
+            self.assertEqual(registry.get_sample_value("pizzamanager_requests_total", dict(labels, status="200")), 2)
+            self.assertEqual(registry.get_sample_value("pizzamanager_db_queries_total", labels), 4)
+            self.assertEqual(registry.get_sample_value("pizzamanager_request_duration_seconds_count", labels), 2)
+            self.assertEqual(registry.get_sample_value("pizzamanager_cache_lookups_total", {"result": "hit"}), 2)
+            self.assertIn(b"pizzamanager_requests_total", exposition(registry)[0])
@@ -1,13 +1,21 @@
-from django.test import TestCase, Client
-from django.test.utils import setup_test_environment, teardown_test_environment
+from unittest.mock import patch
+
+from django.db import IntegrityError, connection
+from django.test import TestCase, Client, override_settings
+from django.test.utils import CaptureQueriesContext, setup_test_environment, teardown_test_environment
 from django.urls import reverse
 
 from PizzaManager.models import Topping, Pizza
+from PizzaManager.pagination import _keysetQuery, encodeCursor
 
 HTTP_OK = 200
 HTTP_REDIRECT = 302
+HTTP_NOT_FOUND = 404
 
 # Create your tests here.
+# These tests inspect `response.context`, which pages served from the overview cache do not carry, so the cache is
+# turned off here and covered by test_caching.py instead.
+@override_settings(OVERVIEW_CACHE_TIMEOUT=0)
 class TestPizzas(TestCase):
     """
     Tests that confirm each of the requirements for Pizza functionality are satisfied.
@@ -48,6 +56,59 @@ class TestPizzas(TestCase):
         # Verify that the pizza sent has the same toppings as the one in the database.
         self.assertEqual(response.context["pizzas_list"][0].toppings, pizza.toppings)
 
+    def test_list_available_pizzas_query_count(self):
+        """
+        This test will ensure the overview costs the same number of queries no matter how many pizzas
+        and toppings are on the page (menu version, count, pizzas and one prefetch for their toppings).
+        """
+        toppings = [Topping.objects.create(name="Topping " + str(index)) for index in range(4)]
+        pizza = Pizza.objects.create(name="Pizza 0")
+        pizza.toppings.add(toppings[0])
+        with self.assertNumQueries(4):
+            response = self.client.get(reverse("PizzaManager:Pizza Overview"))
+        self.assertEqual(response.status_code, HTTP_OK)
+
+        for index in range(1, 5):
+            pizza = Pizza.objects.create(name="Pizza " + str(index))
+            pizza.toppings.add(*toppings)
+        with self.assertNumQueries(4):
+            response = self.client.get(reverse("PizzaManager:Pizza Overview"))
+        self.assertEqual(response.status_code, HTTP_OK)
+        self.assertEqual(len(response.context["pizzas_list"]), 5)
+        self.assertEqual(response.context["pizzas_list"][4].topping_count, 4)
+
+    def test_list_available_pizzas_keyset_pagination(self):
+        """
+        This test will ensure a cursor page of pizzas skips the COUNT query and still prefetches toppings.
+        """
+        topping = Topping.objects.create(name="Test Topping")
+        for index in range(7):
+            Pizza.objects.create(name="Pizza " + str(index)).toppings.add(topping)
+
+        with self.assertNumQueries(3):
+            firstPageResponse = self.client.get(reverse("PizzaManager:Pizza Overview"), {"cursor": ""})
+        self.assertEqual(len(firstPageResponse.context["pizzas_list"]), 5)
+
+        with self.assertNumQueries(3):
+            secondPageResponse = self.client.get(reverse("PizzaManager:Pizza Overview"),
+                                                 {"cursor": firstPageResponse.context["page_obj"].next_cursor})
+        self.assertEqual([pizza.name for pizza in secondPageResponse.context["pizzas_list"]], ["Pizza 5", "Pizza 6"])
+        self.assertContains(secondPageResponse, topping)
+
+    def test_keyset_pagination_seeks_name_index(self):
+        """
+        This test will ensure cursor pages start from the cursor in the unique name index rather than scanning up to it.
+        """
+        for model, index in ((Pizza, "sqlite_autoindex_PizzaManager_pizza_1"),
+                             (Topping, "sqlite_autoindex_PizzaManager_topping_1")):
+            for backwards, seek in ((False, "(name>?)"), (True, "(name<?)")):
+                page, _ = _keysetQuery(model.objects.values("id", "name"), 5, encodeCursor("M", 1, backwards))
+                sql, params = page.query.sql_with_params()
+                with connection.cursor() as cursor:
+                    cursor.execute("EXPLAIN QUERY PLAN " + sql, params)
+                    plan = " ".join(str(row[-1]) for row in cursor.fetchall())
+                self.assertIn("SEARCH " + model._meta.db_table + " USING COVERING INDEX " + index + " " + seek, plan)
+
     ##############################################################################
     ###    It should allow me to create a new pizza and add toppings to it     ###
     ##############################################################################
@@ -82,6 +143,40 @@ class TestPizzas(TestCase):
         self.assertContains(createPizzaResponse, topping1)
         self.assertContains(createPizzaResponse, topping2)
 
+    def test_add_pizza_query_count_independent_of_toppings(self):
+        """
+        This test will ensure creating a pizza costs the same number of queries with 1 or 20 toppings.
+        """
+        toppings = [Topping.objects.create(name="Topping " + str(index)) for index in range(20)]
+        with CaptureQueriesContext(connection) as oneToppingQueries:
+            self.client.post("/pizza/new", {
+                "new_pizza_name": "SmallPizza",
+                "pizza_new": "pizza_new",
+                "toppings_options": toppings[:1]
+            })
+        with CaptureQueriesContext(connection) as manyToppingsQueries:
+            pizzaPostResponse = self.client.post("/pizza/new", {
+                "new_pizza_name": "LargePizza",
+                "pizza_new": "pizza_new",
+                "toppings_options": toppings
+            })
+        self.assertRedirects(pizzaPostResponse, reverse("PizzaManager:Pizza Overview"))
+        self.assertEqual(len(manyToppingsQueries), len(oneToppingQueries))
+        self.assertEqual(Pizza.objects.get(name="LargePizza").toppings.count(), 20)
+
+    def test_add_pizza_unknown_topping_rolls_back(self):
+        """
+        This test will ensure a pizza referencing a missing topping is not left behind half-built.
+        """
+        topping = Topping.objects.create(name="TestTopping")
+        pizzaPostResponse = self.client.post("/pizza/new", {
+            "new_pizza_name": "TestPizza",
+            "pizza_new": "pizza_new",
+            "toppings_options": [topping, "MissingTopping"]
+        })
+        self.assertEqual(pizzaPostResponse.status_code, HTTP_NOT_FOUND)
+        self.assertFalse(Pizza.objects.filter(name="TestPizza").exists())
+
     ##############################################################################
     ###             It should allow me to delete an existing pizza             ###
     ##############################################################################
@@ -253,3 +348,106 @@ class TestPizzas(TestCase):
         self.assertEqual(failPizzaRenameResponse.status_code, HTTP_OK)
         self.assertEqual(failPizzaRenameResponse.context["error_message"], 
                          "A pizza with this name already exists. Please enter a unique name. Name unchanged.")
+
+    ##############################################################################
+    ###       It should allow me to make several changes to a pizza at once    ###
+    ##############################################################################
+
+    def createBatchPizza(self):
+        for name in ("Cheese", "Basil", "Ham", "Olives", "Onion"):
+            Topping.objects.create(name=name)
+        pizza = Pizza.objects.create(name="TestPizza")
+        pizza.toppings.add(*Topping.objects.filter(name__in=["Cheese", "Basil", "Ham"]))
+        return pizza
+
+    def test_batch_edit_pizza(self):
+        pizza = self.createBatchPizza()
+        response = self.client.post(reverse("PizzaManager:Pizza Editor", args=[pizza.id]), {
+            "batch_new_name": "Renamed Pizza",
+            "batch_add": ["Olives", ""],
+            "batch_remove": ["Basil"],
+            "batch_swap_from": ["Ham"],
+            "batch_swap_to": ["Onion"],
+            "pizza_batch_edit": "pizza_batch_edit",
+        })
+        self.assertRedirects(response, reverse("PizzaManager:Pizza Editor", args=[pizza.id]))
+        pizza.refresh_from_db()
+        self.assertEqual(pizza.name, "Renamed Pizza")
+        self.assertEqual(set(pizza.toppings.values_list("name", flat=True)), {"Cheese", "Olives", "Onion"})
+
+    def test_batch_edit_reports_every_problem(self):
+        pizza = self.createBatchPizza()
+        Pizza.objects.create(name="Other Pizza")
+        response = self.client.post(reverse("PizzaManager:Pizza Editor", args=[pizza.id]), {
+            "batch_new_name": "Other Pizza",
+            "batch_add": ["Cheese", "Anchovies"],
+            "batch_remove": ["Olives"],
+            "batch_swap_from": ["Basil"],
+            "batch_swap_to": ["Basil"],
+            "pizza_batch_edit": "pizza_batch_edit",
+        })
+        self.assertEqual(response.status_code, HTTP_OK)
+        self.assertEqual(response.context["error_message"], " ".join([
+            "A pizza with this name already exists.",
+            "The topping Basil is being replaced with itself.",
+            "The topping Olives is not on this pizza.",
+            "The toppping Cheese is already on this pizza.",
+            "You have attempted to alter a topping that does not exist: Anchovies.",
+            "No changes made.",
+        ]))
+        # Nothing was applied, not even the changes that were valid on their own.
+        pizza.refresh_from_db()
+        self.assertEqual(pizza.name, "TestPizza")
+        self.assertEqual(set(pizza.toppings.values_list("name", flat=True)), {"Cheese", "Basil", "Ham"})
+
+    def test_batch_and_single_renames_check_names_alike(self):
+        pizza = self.createBatchPizza()
+        url = reverse("PizzaManager:Pizza Editor", args=[pizza.id])
+        for new_name, problem in (
+            ("P" * 51, "Please keep the pizza name to 50 characters or fewer."),
+            ("Pizza!", "Please do not include any special characters in the pizza name."),
+        ):
+            response = self.client.post(url, {"pizza_name_change": "", "new_name": new_name})
+            self.assertEqual(response.context["error_message"], problem + " Name unchanged.")
+            response = self.client.post(url, {"pizza_batch_edit": "", "batch_new_name": new_name})
+            self.assertEqual(response.context["error_message"], problem + " No changes made.")
+        pizza.refresh_from_db()
+        self.assertEqual(pizza.name, "TestPizza")
+
+        # Both save the name exactly as typed.
+        self.client.post(url, {"pizza_batch_edit": "", "batch_new_name": " Spaced Pizza " + "P" * 36})
+        pizza.refresh_from_db()
+        self.assertEqual(pizza.name, " Spaced Pizza " + "P" * 36)
+        self.client.post(url, {"pizza_name_change": "", "new_name": " Spaced Pizza 2 "})
+        pizza.refresh_from_db()
+        self.assertEqual(pizza.name, " Spaced Pizza 2 ")
+
+    def test_batch_edit_repeated_topping(self):
+        pizza = self.createBatchPizza()
+        response = self.client.post(reverse("PizzaManager:Pizza Editor", args=[pizza.id]), {
+            "batch_add": ["Olives"],
+            "batch_swap_from": ["Ham"],
+            "batch_swap_to": ["Olives"],
+            "pizza_batch_edit": "pizza_batch_edit",
+        })
+        self.assertEqual(response.context["error_message"],
+                         "The topping Olives is changed more than once. No changes made.")
+        self.assertFalse(pizza.toppings.filter(name="Olives").exists())
+
+    def test_batch_edit_rolls_back_together(self):
+        pizza = self.createBatchPizza()
+
+        def failingAdd(*args, **kwargs):
+            raise IntegrityError("Simulated failure while linking toppings.")
+
+        with patch.object(type(pizza.toppings), "add", failingAdd), self.assertRaises(IntegrityError):
+            self.client.post(reverse("PizzaManager:Pizza Editor", args=[pizza.id]), {
+                "batch_new_name": "Renamed Pizza",
+                "batch_add": ["Olives"],
+                "batch_remove": ["Basil"],
+                "pizza_batch_edit": "pizza_batch_edit",
+            })
+        # The rename and the removal made before the failure were rolled back with it.
+        pizza.refresh_from_db()
+        self.assertEqual(pizza.name, "TestPizza")
+        self.assertTrue(pizza.toppings.filter(name="Basil").exists())
@@ -0,0 +1,317 @@
+from django.core.cache import cache
+from django.test import TestCase, Client, override_settings
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.urls import reverse
+
+from PizzaManager.models import Topping, Pizza
+from PizzaManager.pagination import encodeCursor
+from PizzaManager.testing import QueryBudgetMixin
+
+HTTP_OK = 200
+HTTP_FOUND = 302
+
+# Create your tests here.
+# Rendered pages are not cached here, so every budget covers building the page from the database.
+@override_settings(OVERVIEW_CACHE_TIMEOUT=0)
+class TestQueryBudgets(QueryBudgetMixin, TestCase):
+    """
+    Tests that confirm every view runs a fixed number of queries, whether the menu holds one row or many.
+    """
+
+    @classmethod
+    def setUpClass(self):
+        teardown_test_environment()
+        setup_test_environment()
+        return super().setUpClass()
+
+    def setUp(self):
+        self.client = Client()
+        self.menus_built = 0
+        cache.clear()
+        return super().setUp()
+
+    def buildMenu(self, size):
+        """
+        Adds `size` toppings and `size` pizzas, each pizza carrying every one of those toppings.
+        @return The new pizzas and toppings.
+        """
+        self.menus_built += 1
+        prefix = "Menu " + str(self.menus_built)
+        toppings = [Topping.objects.create(name=prefix + " Topping " + str(index)) for index in range(size)]
+        pizzas = [Pizza.objects.create(name=prefix + " Pizza " + str(index)) for index in range(size)]
+        for pizza in pizzas:
+            pizza.toppings.add(*toppings)
+        return pizzas, toppings
+
+    def get(self, url, data=None, status=HTTP_OK):
+        response = self.client.get(url, data)
+        self.assertEqual(response.status_code, status)
+        return response
+
+    def post(self, url, data, status=HTTP_FOUND):
+        response = self.client.post(url, data)
+        self.assertEqual(response.status_code, status)
+        return response
+
+    ##############################################################################
+    ###           It should render each page in a fixed number of queries      ###
+    ##############################################################################
+
+    def test_index_budget(self):
+        self.assertQueryBudget(0, self.buildMenu, lambda menu: self.get(reverse("PizzaManager:index")))
+
+    def test_toppings_overview_budget(self):
+        # Menu version, count and page.
+        self.assertQueryBudget(3, self.buildMenu, lambda menu: self.get(reverse("PizzaManager:Toppings Overview")))
+        # Menu version and page.
+        self.assertQueryBudget(2, self.buildMenu,
+                               lambda menu: self.get(reverse("PizzaManager:Toppings Overview"), {"cursor": ""}))
+
+    def test_pizza_overview_budget(self):
+        # Menu version, count, page and the page's toppings.
+        self.assertQueryBudget(4, self.buildMenu, lambda menu: self.get(reverse("PizzaManager:Pizza Overview")))
+        self.assertQueryBudget(3, self.buildMenu,
+                               lambda menu: self.get(reverse("PizzaManager:Pizza Overview"), {"cursor": ""}))
+        # Filtering adds no queries of its own beyond naming the filtered toppings.
+        self.assertQueryBudget(5, self.buildMenu, lambda menu: self.get(
+            reverse("PizzaManager:Pizza Overview"), {"all_of": menu[1][0].id, "none_of": menu[1][-1].id}
+        ))
+
+    def test_pizza_create_page_budget(self):
+        self.assertQueryBudget(1, self.buildMenu, lambda menu: self.get(reverse("PizzaManager:Pizza Create")))
+
+    def test_topping_create_page_budget(self):
+        self.assertQueryBudget(0, self.buildMenu, lambda menu: self.get(reverse("PizzaManager:Topping Create")))
+
+    def test_menu_export_budget(self):
+        self.assertQueryBudget(3, self.buildMenu, lambda menu: self.get(reverse("PizzaManager:Menu Export")))
+
+    def test_api_budget(self):
+        self.assertQueryBudget(2, self.buildMenu, lambda menu: self.get(reverse("PizzaManager:Pizza API")))
+        self.assertQueryBudget(1, self.buildMenu,
+                               lambda menu: self.get(reverse("PizzaManager:Pizza API"), {"fields": "id,name"}))
+        self.assertQueryBudget(2, self.buildMenu, lambda menu: self.get(
+            reverse("PizzaManager:Pizza API"), {"any_of": ",".join(str(topping.id) for topping in menu[1])}
+        ))
+        self.assertQueryBudget(1, self.buildMenu, lambda menu: self.get(
+            reverse("PizzaManager:Toppings API"), {"cursor": encodeCursor(menu[1][0].name, 0)}
+        ))
+
+    def test_topping_search_budget(self):
+        # The topping list's version and the matches.
+        self.assertQueryBudget(2, self.buildMenu, lambda menu: self.get(
+            reverse("PizzaManager:Topping Search"), {"q": "Menu " + str(self.menus_built) + " Topping"}
+        ))
+
+    def test_menu_search_budget(self):
+        # The menu's version and the matches, for pizzas and for toppings.
+        for kind in ("pizzas", "toppings"):
+            self.assertQueryBudget(2, self.buildMenu, lambda menu: self.get(
+                reverse("PizzaManager:Menu Search"), {"kind": kind, "q": "menu " + str(self.menus_built)}
+            ))
+
+    ##############################################################################
+    ###        It should run every topping change in a fixed number of queries ###
+    ##############################################################################
+
+    def test_toppings_editor_page_budget(self):
+        # Topping and the number of pizzas using it.
+        self.assertQueryBudget(2, self.buildMenu, lambda menu: self.get(
+            reverse("PizzaManager:Toppings Editor", args=[menu[1][0].id])
+        ))
+
+    def test_topping_usage_budget(self):
+        # Topping, count and page.
+        self.assertQueryBudget(3, self.buildMenu, lambda menu: self.get(
+            reverse("PizzaManager:Topping Usage", args=[menu[1][0].id])
+        ))
+        self.assertQueryBudget(3, self.buildMenu, lambda menu: self.get(
+            reverse("PizzaManager:Topping Usage", args=[menu[1][0].id]), {"cursor": ""}
+        ))
+        self.assertQueryBudget(3, self.buildMenu, lambda menu: self.get(
+            reverse("PizzaManager:Topping Usage API", args=[menu[1][0].id]), {"fields": "id,name"}
+        ))
+
+    def test_topping_rename_budget(self):
+        # Topping, duplicate check, the update inside its savepoint and the version bump.
+        self.assertQueryBudget(6, self.buildMenu, lambda menu: self.post(
+            reverse("PizzaManager:Toppings Editor", args=[menu[1][0].id]),
+            {"topping_name_change": "", "new_name": menu[1][0].name + " Renamed"},
+        ))
+
+    def test_topping_delete_budget(self):
+        # Topping, its pizza links, the topping itself and the version bump.
+        self.assertQueryBudget(4, self.buildMenu, lambda menu: self.post(
+            reverse("PizzaManager:Toppings Editor", args=[menu[1][0].id]), {"topping_delete": ""}
+        ))
+
+    def test_topping_create_budget(self):
+        # Duplicate check, the insert inside its savepoint and the version bump.
+        self.assertQueryBudget(5, self.buildMenu, lambda menu: self.post(
+            reverse("PizzaManager:Topping Create"),
+            {"topping_new": "", "new_topping_name": menu[1][0].name + " New"},
+        ))
+
+    def test_topping_merge_budget(self):
+        def setup(size):
+            toppings = self.buildMenu(size)[1]
+            return toppings[0], Topping.objects.create(name="Menu " + str(self.menus_built) + " Merged")
+
+        # Both toppings, then inside one transaction the duplicate links dropped, the rest moved, the source deleted
+        # along with any links left and the version bumps.
+        self.assertQueryBudget(11, setup, lambda prepared: self.post(
+            reverse("PizzaManager:Toppings Editor", args=[prepared[0].id]),
+            {"topping_merge": "", "merge_into": prepared[1].name},
+        ))
+
+    def test_topping_bulk_add_budget(self):
+        def setup(size):
+            self.buildMenu(size)
+            return Topping.objects.create(name="Menu " + str(self.menus_built) + " Bulk")
+
+        # Topping, then every matching pizza linked at once and the version bump.
+        self.assertQueryBudget(5, setup, lambda topping: self.post(
+            reverse("PizzaManager:Toppings Editor", args=[topping.id]),
+            {"topping_bulk_add": "", "pizza_name_contains": "Menu " + str(self.menus_built) + " Pizza"},
+        ))
+
+    def test_topping_bulk_remove_budget(self):
+        # Topping, then every matching pizza's link deleted at once and the version bump.
+        self.assertQueryBudget(5, self.buildMenu, lambda menu: self.post(
+            reverse("PizzaManager:Toppings Editor", args=[menu[1][0].id]),
+            {"topping_bulk_remove": "", "pizza_name_contains": "Menu " + str(self.menus_built) + " Pizza"},
+        ))
+
+    ##############################################################################
+    ###         It should run every pizza change in a fixed number of queries  ###
+    ##############################################################################
+
+    def test_pizza_editor_page_budget(self):
+        # Versions, pizza, its toppings and the topping list, which both topping forms share.
+        self.assertQueryBudget(4, self.buildMenu, lambda menu: self.get(
+            reverse("PizzaManager:Pizza Editor", args=[menu[0][0].id])
+        ))
+
+    def test_pizza_editor_typeahead_page_budget(self):
+        # Versions, the pizza and its toppings, without the topping list.
+        with self.settings(TOPPING_TYPEAHEAD=True):
+            self.assertQueryBudget(3, self.buildMenu, lambda menu: self.get(
+                reverse("PizzaManager:Pizza Editor", args=[menu[0][0].id])
+            ))
+
+    def test_pizza_rename_budget(self):
+        # Pizza, duplicate check, the update inside its savepoint and the version bump.
+        self.assertQueryBudget(6, self.buildMenu, lambda menu: self.post(
+            reverse("PizzaManager:Pizza Editor", args=[menu[0][0].id]),
+            {"pizza_name_change": "", "new_name": menu[0][0].name + " Renamed"},
+        ))
+
+    def test_pizza_delete_budget(self):
+        def setup(size):
+            # A pizza deleted before, so the deletion counter exists as it does on any menu in use.
+            Pizza.objects.create(name="Menu " + str(self.menus_built) + " Deleted").delete()
+            return self.buildMenu(size)
+
+        # Pizza, its topping links, the pizza itself, the version bump and dropping its version.
+        self.assertQueryBudget(5, setup, lambda menu: self.post(
+            reverse("PizzaManager:Pizza Editor", args=[menu[0][0].id]), {"pizza_delete": ""}
+        ))
+
+    def test_pizza_topping_add_budget(self):
+        def setup(size):
+            pizzas, toppings = self.buildMenu(size)
+            pizzas[0].toppings.remove(toppings[0])
+            return pizzas[0], toppings[0]
+
+        # Pizza, duplicate check, topping, then the link and version bump.
+        self.assertQueryBudget(6, setup, lambda prepared: self.post(
+            reverse("PizzaManager:Pizza Editor", args=[prepared[0].id]),
+            {"pizza_topping_add": "", "toppings_options": prepared[1].name},
+        ))
+
+    def test_pizza_topping_swap_budget(self):
+        def setup(size):
+            pizzas, toppings = self.buildMenu(size)
+            new_topping = Topping.objects.create(name="Menu " + str(self.menus_built) + " Swap")
+            return pizzas[0], toppings[0], new_topping
+
+        # Pizza and duplicate check, then a removal and an addition of a link, each with its version bump.
+        self.assertQueryBudget(9, setup, lambda prepared: self.post(
+            reverse("PizzaManager:Pizza Editor", args=[prepared[0].id]),
+            {"pizza_topping_change": "", "prior_topping": prepared[1].name, "toppings_options": prepared[2].name},
+        ))
+
+    def test_pizza_topping_remove_budget(self):
+        # Pizza, topping, the link and the version bump.
+        self.assertQueryBudget(4, self.buildMenu, lambda menu: self.post(
+            reverse("PizzaManager:Pizza Editor", args=[menu[0][0].id]),
+            {"pizza_topping_delete": "", "deleted_topping": menu[1][0].name},
+        ))
+
+    def test_pizza_create_budget(self):
+        # Duplicate check, the pizza and its versions, then all of its toppings resolved and linked at once.
+        self.assertQueryBudget(14, self.buildMenu, lambda menu: self.post(
+            reverse("PizzaManager:Pizza Create"),
+            {"pizza_new": "", "new_pizza_name": menu[0][0].name + " New",
+             "toppings_options": [topping.name for topping in menu[1]]},
+        ))
+
+    def test_pizza_batch_edit_budget(self):
+        def setup(size):
+            pizzas, toppings = self.buildMenu(size)
+            prefix = "Menu " + str(self.menus_built)
+            new_toppings = [Topping.objects.create(name=prefix + " New " + str(index)) for index in range(size)]
+            return pizzas[0], toppings, new_toppings
+
+        # Pizza, duplicate name check, every named topping and the pizza's toppings. Then, inside one transaction, the
+        # rename in its savepoint, one removal and one addition covering all of the toppings, each with its version bump.
+        self.assertQueryBudget(15, setup, lambda prepared: self.post(
+            reverse("PizzaManager:Pizza Editor", args=[prepared[0].id]),
+            {"pizza_batch_edit": "", "batch_new_name": prepared[0].name + " Renamed",
+             "batch_remove": [topping.name for topping in prepared[1]],
+             "batch_add": [topping.name for topping in prepared[2]]},
+        ))
+
+    def test_pizza_clone_budget(self):
+        # Pizza, duplicate check, the clone with its new version counter, then every link copied at once and the
+        # version bump.
+        self.assertQueryBudget(15, self.buildMenu, lambda menu: self.post(
+            reverse("PizzaManager:Pizza Editor", args=[menu[0][0].id]),
+            {"pizza_clone": "", "clone_name": menu[0][0].name + " Clone"},
+        ))
+
+    def test_create_cancel_budget(self):
+        self.assertQueryBudget(0, self.buildMenu, lambda menu: self.post(
+            reverse("PizzaManager:Pizza Create"), {"cancel_pizza_new": ""}
+        ))
+        self.assertQueryBudget(0, self.buildMenu, lambda menu: self.post(
+            reverse("PizzaManager:Topping Create"), {"cancel_topping_new": ""}
+        ))
+
+    ##############################################################################
+    ###          It should keep error replies to a fixed number of queries     ###
+    ##############################################################################
+
+    def test_pizza_error_reply_budget(self):
+        # Error pages rendered from the editor and creation forms still list every topping with one query.
+        self.assertQueryBudget(4, self.buildMenu, lambda menu: self.post(
+            reverse("PizzaManager:Pizza Editor", args=[menu[0][0].id]),
+            {"pizza_topping_add": "", "toppings_options": menu[1][0].name},
+            status=HTTP_OK,
+        ))
+        self.assertQueryBudget(4, self.buildMenu, lambda menu: self.post(
+            reverse("PizzaManager:Pizza Create"), {"pizza_new": "", "new_pizza_name": menu[0][0].name},
+            status=HTTP_OK,
+        ))
+
+    ##############################################################################
+    ###     It should fail a budget when queries grow with the number of rows  ###
+    ##############################################################################
+
+    def test_budget_catches_per_row_queries(self):
+        def listToppingsPerPizza(menu):
+            # Reads each pizza's toppings separately, one query per pizza.
+            return [list(pizza.toppings.all()) for pizza in Pizza.objects.all()]
+
+        with self.assertRaisesRegex(AssertionError, "grows with the data"):
+            self.assertQueryBudget(100, self.buildMenu, listToppingsPerPizza)
@@ -0,0 +1,81 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db.models import Count
+from django.test import TestCase
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from PizzaManager.management.reporting import peakMemoryMB
+from PizzaManager.models import Topping, Pizza
+from PizzaManager.validation import hasSpecialChar
+
+# Create your tests here.
+class TestSeedMenu(TestCase):
+    """
+    Tests that confirm the seed_menu command fills the database with a valid generated menu.
+    """
+
+    @classmethod
+    def setUpClass(self):
+        teardown_test_environment()
+        setup_test_environment()
+        return super().setUpClass()
+
+    def seed(self, *args):
+        output = StringIO()
+        call_command("seed_menu", *args, stdout=output)
+        return output.getvalue()
+
+    ##############################################################################
+    ###         It should create exactly the menu size that was asked for      ###
+    ##############################################################################
+
+    def test_seed_counts(self):
+        output = self.seed("--pizzas", "25", "--toppings", "10", "--toppings-per-pizza", "4", "--chunk-size", "7")
+        self.assertEqual(Topping.objects.count(), 10)
+        self.assertEqual(Pizza.objects.count(), 25)
+        self.assertEqual(Pizza.toppings.through.objects.count(), 100)
+        # Every pizza gets distinct toppings.
+        self.assertEqual(set(Pizza.objects.annotate(total=Count("toppings")).values_list("total", flat=True)), {4})
+        self.assertIn("rows/sec", output)
+        self.assertIn("Seeded 10 toppings, 25 pizzas and 100 topping links", output)
+        if peakMemoryMB() is not None:
+            self.assertIn("Peak memory:", output)
+
+    def test_seed_names_valid(self):
+        self.seed("--pizzas", "50", "--toppings", "20")
+        for name in list(Topping.objects.values_list("name", flat=True)) + list(Pizza.objects.values_list("name", flat=True)):
+            self.assertFalse(hasSpecialChar(name), name)
+            self.assertLessEqual(len(name), 50)
+
+    ##############################################################################
+    ###         It should repeat menus by seed and grow them when rerun        ###
+    ##############################################################################
+
+    def test_seed_repeatable(self):
+        self.seed("--pizzas", "10", "--toppings", "10", "--seed", "3")
+        first = sorted(Pizza.objects.values_list("name", "toppings__name"))
+        Pizza.objects.all().delete()
+        Topping.objects.all().delete()
+        self.seed("--pizzas", "10", "--toppings", "10", "--seed", "3")
+        self.assertEqual(sorted(Pizza.objects.values_list("name", "toppings__name")), first)
+
+    def test_seed_twice_grows_menu(self):
+        self.seed("--pizzas", "10", "--toppings", "10", "--seed", "3")
+        self.seed("--pizzas", "10", "--toppings", "10", "--seed", "3")
+        self.assertEqual(Topping.objects.count(), 20)
+        self.assertEqual(Pizza.objects.count(), 20)
+
+    ##############################################################################
+    ###               It should reject menus that cannot be built              ###
+    ##############################################################################
+
+    def test_seed_invalid_arguments(self):
+        with self.assertRaises(CommandError):
+            self.seed("--pizzas", "5", "--toppings", "3", "--toppings-per-pizza", "4")
+        with self.assertRaises(CommandError):
+            self.seed("--pizzas", "-1")
+        with self.assertRaises(CommandError):
+            self.seed("--chunk-size", "0")
+        self.assertFalse(Pizza.objects.exists())
@@ -0,0 +1,161 @@
+from unittest.mock import patch
+
+from asgiref.sync import async_to_sync
+from django.core.cache import cache
+from django.test import AsyncRequestFactory, TestCase, Client, override_settings
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.urls import reverse
+
+from PizzaManager import async_views
+from PizzaManager.bulk_edits import applyTopping, matchingPizzas
+from PizzaManager.models import Topping, Pizza
+from PizzaManager.snapshot import MenuSnapshot, dropMenuSnapshot, menuSnapshot
+
+HTTP_OK = 200
+HTTP_NOT_MODIFIED = 304
+HTTP_NOT_FOUND = 404
+
+# Create your tests here.
+@override_settings(MENU_SNAPSHOT=True, OVERVIEW_CACHE_TIMEOUT=0)
+class TestMenuSnapshot(TestCase):
+    """
+    Tests that confirm the chef screens are served from the in-process menu snapshot, which follows every change.
+    """
+
+    @classmethod
+    def setUpClass(self):
+        teardown_test_environment()
+        setup_test_environment()
+        return super().setUpClass()
+
+    def setUp(self):
+        self.client = Client()
+        cache.clear()
+        dropMenuSnapshot()
+        self.cheese = Topping.objects.create(name="Cheese")
+        self.basil = Topping.objects.create(name="Basil")
+        self.ham = Topping.objects.create(name="Ham")
+        for index in range(12):
+            pizza = Pizza.objects.create(name="Pizza " + str(index).zfill(2))
+            pizza.toppings.add(*[self.cheese, self.basil, self.ham][:index % 4])
+        return super().setUp()
+
+    def tearDown(self):
+        # The snapshot outlives the test's transaction, so the next test must not see this menu.
+        dropMenuSnapshot()
+        return super().tearDown()
+
+    def overview(self, **params):
+        return self.client.get(reverse("PizzaManager:Pizza Overview"), params)
+
+    def api(self, **params):
+        return self.client.get(reverse("PizzaManager:Pizza API"), params).json()
+
+    def shownPizzas(self, response):
+        return [(pizza.name, [topping.name for topping in pizza.toppings.all()])
+                for pizza in response.context["pizzas_list"]]
+
+    ##############################################################################
+    ###        It should serve the same pages as the database, without it      ###
+    ##############################################################################
+
+    def test_overview_matches_database(self):
+        for params in ({}, {"page": "2"}, {"page": "last"}, {"cursor": ""}):
+            from_snapshot = self.overview(**params)
+            with self.settings(MENU_SNAPSHOT=False):
+                from_database = self.overview(**params)
+            self.assertEqual(self.shownPizzas(from_snapshot),
+                             [(name, sorted(toppings)) for name, toppings in self.shownPizzas(from_database)])
+        self.assertContains(self.overview(page="1"), "This pizza has no toppings.")
+
+    def test_overview_keyset_pages(self):
+        first = self.overview(cursor="")
+        second = self.overview(cursor=first.context["page_obj"].next_cursor)
+        self.assertEqual([pizza.name for pizza in second.context["pizzas_list"]],
+                         ["Pizza 05", "Pizza 06", "Pizza 07", "Pizza 08", "Pizza 09"])
+        back = self.overview(cursor=second.context["page_obj"].previous_cursor)
+        self.assertEqual(self.shownPizzas(back), self.shownPizzas(first))
+        self.assertEqual(self.overview(cursor="not a cursor").status_code, HTTP_NOT_FOUND)
+
+    def test_api_matches_database(self):
+        next_cursor = self.api(limit="5")["next"]
+        for params in ({}, {"limit": "5"}, {"limit": "5", "fields": "name"}, {"limit": "5", "cursor": next_cursor}):
+            from_snapshot = self.api(**params)
+            with self.settings(MENU_SNAPSHOT=False):
+                self.assertEqual(from_snapshot, self.api(**params))
+
+    def test_zero_queries_once_loaded(self):
+        self.overview()
+        with self.assertNumQueries(0):
+            self.assertEqual(self.overview(page="2").status_code, HTTP_OK)
+            self.assertEqual(len(self.api(limit="5")["results"]), 5)
+        response = self.overview()
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse("PizzaManager:Pizza Overview"), HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(response.status_code, HTTP_NOT_MODIFIED)
+
+    def test_async_overview(self):
+        self.overview()
+        request = AsyncRequestFactory().get(reverse("PizzaManager:Pizza Overview"))
+        with self.assertNumQueries(0):
+            response = async_to_sync(async_views.pizza_overview)(request)
+        self.assertContains(response, "Pizza 04")
+
+    ##############################################################################
+    ###            It should follow every change, reading only what moved      ###
+    ##############################################################################
+
+    def test_pizza_changes_refresh_incrementally(self):
+        snapshot = menuSnapshot()
+        pizza = Pizza.objects.get(name="Pizza 00")
+        pizza.name = "Pizza Zero"
+        pizza.save()
+        pizza.toppings.add(self.ham)
+        Pizza.objects.get(name="Pizza 01").delete()
+        Pizza.objects.create(name="Pizza 99").toppings.add(self.cheese)
+
+        with patch.object(MenuSnapshot, "load", side_effect=AssertionError("Reloaded the whole menu.")):
+            # The counters, the changed pizzas and their toppings, then the count and ids that find the deleted one.
+            with self.assertNumQueries(6):
+                refreshed = menuSnapshot()
+        self.assertIsNot(refreshed, snapshot)
+        self.assertEqual([name for name, _ in refreshed.keys][-2:], ["Pizza 99", "Pizza Zero"])
+        self.assertNotIn("Pizza 01", [name for name, _ in refreshed.keys])
+        self.assertEqual(len(refreshed.keys), Pizza.objects.count())
+        self.assertEqual([topping.name for topping in refreshed.pizza(pizza.id).toppings.all()], ["Ham"])
+        # The old snapshot is left as it was for requests still reading it.
+        self.assertEqual(snapshot.pizza(pizza.id).name, "Pizza 00")
+
+    def test_refresh_keeps_topping_filters(self):
+        # Gathered for the first filtered request only.
+        self.overview()
+        self.assertIsNone(menuSnapshot().topping_pizzas)
+        self.overview(all_of=self.ham.id)
+        self.assertIsNotNone(menuSnapshot().topping_pizzas)
+        pizza = Pizza.objects.get(name="Pizza 03")
+        pizza.toppings.remove(self.ham)
+        Pizza.objects.get(name="Pizza 02").delete()
+        Pizza.objects.create(name="Pizza 99").toppings.add(self.basil, self.ham)
+
+        refreshed = menuSnapshot()
+        loaded = MenuSnapshot.load("")
+        self.assertEqual({topping_id: sorted(pks) for topping_id, pks in refreshed.topping_pizzas.items()},
+                         {topping_id: sorted(pks) for topping_id, pks in loaded.toppingPizzas().items()})
+        rows = refreshed.filteredPizzaRows(all_of=[self.basil.id], none_of=[self.ham.id])
+        self.assertEqual([pizza.name for pizza in rows[:len(rows)]], ["Pizza 03", "Pizza 06", "Pizza 10"])
+
+    def test_topping_changes_reload(self):
+        self.overview()
+        self.cheese.name = "Mozzarella"
+        self.cheese.save()
+        applyTopping(self.ham, matchingPizzas("Pizza 00"))
+        shown = dict(self.shownPizzas(self.overview()))
+        self.assertEqual(shown["Pizza 00"], ["Ham"])
+        self.assertEqual(shown["Pizza 01"], ["Mozzarella"])
+
+    def test_lost_stamp(self):
+        snapshot = menuSnapshot()
+        cache.clear()
+        refreshed = menuSnapshot()
+        self.assertIsNot(refreshed, snapshot)
+        self.assertEqual(refreshed.keys, snapshot.keys)
@@ -0,0 +1,81 @@
+import json
+import re
+
+from asgiref.sync import async_to_sync
+from django.core.cache import cache
+from django.test import AsyncClient, TestCase, Client, override_settings
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.urls import reverse
+
+from PizzaManager.models import Topping, Pizza
+
+HTTP_OK = 200
+
+# Create your tests here.
+@override_settings(OVERVIEW_CACHE_TIMEOUT=0)
+class TestServerTiming(TestCase):
+    """
+    Tests that confirm every response reports its total, middleware, database and template time.
+    """
+
+    @classmethod
+    def setUpClass(self):
+        teardown_test_environment()
+        setup_test_environment()
+        return super().setUpClass()
+
+    def setUp(self):
+        self.client = Client()
+        cache.clear()
+        self.pizza = Pizza.objects.create(name="Margherita")
+        self.pizza.toppings.add(Topping.objects.create(name="Cheese"))
+        return super().setUp()
+
+    def parseServerTiming(self, response):
+        metrics = {}
+        for metric in response["Server-Timing"].split(", "):
+            name, *parameters = metric.split(";")
+            metrics[name] = dict(parameter.split("=", 1) for parameter in parameters)
+        return metrics
+
+    ##############################################################################
+    ###        It should break each request's time down in Server-Timing       ###
+    ##############################################################################
+
+    def test_server_timing_header(self):
+        response = self.client.get(reverse("PizzaManager:Pizza Overview"))
+        self.assertEqual(response.status_code, HTTP_OK)
+        metrics = self.parseServerTiming(response)
+        self.assertEqual(set(metrics), {"total", "middleware", "db", "template"})
+        # Menu version, count, pizzas and their toppings.
+        self.assertEqual(metrics["db"]["desc"], '"4 queries"')
+        self.assertGreater(float(metrics["template"]["dur"]), 0)
+        self.assertLessEqual(float(metrics["db"]["dur"]), float(metrics["total"]["dur"]))
+
+    def test_server_timing_without_queries(self):
+        metrics = self.parseServerTiming(self.client.get(reverse("PizzaManager:index")))
+        self.assertEqual(metrics["db"]["desc"], '"0 queries"')
+
+    def test_server_timing_async(self):
+        # Served through Django's ASGI handler, so the view runs in a thread of its own.
+        response = async_to_sync(AsyncClient().get)(reverse("PizzaManager:Pizza Editor", args=[self.pizza.id]))
+        metrics = self.parseServerTiming(response)
+        # Queries run in the threads serving the request still count towards it.
+        self.assertEqual(metrics["db"]["desc"], '"4 queries"')
+
+    ##############################################################################
+    ###       It should log each request's timing tagged with its URL name     ###
+    ##############################################################################
+
+    def test_timing_log_line(self):
+        with self.assertLogs("PizzaManager.timing", "INFO") as logs:
+            self.client.post(reverse("PizzaManager:Pizza Editor", args=[self.pizza.id]),
+                             {"pizza_name_change": "", "new_name": "Marinara"})
+        record = json.loads(re.sub(r"^INFO:PizzaManager.timing:", "", logs.output[0]))
+        self.assertEqual(record["url_name"], "PizzaManager:Pizza Editor")
+        self.assertEqual(record["method"], "POST")
+        self.assertEqual(record["status"], 302)
+        self.assertGreater(record["queries"], 0)
+        self.assertEqual(set(record), {
+            "url_name", "method", "path", "status", "total_ms", "middleware_ms", "db_ms", "queries", "template_ms",
+        })
@@ -0,0 +1,202 @@
+from asgiref.sync import async_to_sync
+from django.core.cache import cache
+from django.db import connection
+from django.test import AsyncRequestFactory, TestCase, Client, override_settings
+from django.test.utils import CaptureQueriesContext, setup_test_environment, teardown_test_environment
+from django.urls import reverse
+
+from PizzaManager import async_views
+from PizzaManager.models import Topping, Pizza
+from PizzaManager.snapshot import MenuSnapshot, dropMenuSnapshot
+from PizzaManager.testing import PizzaMenuMixin
+
+HTTP_OK = 200
+HTTP_BAD_REQUEST = 400
+HTTP_NOT_FOUND = 404
+
+# Create your tests here.
+class TestToppingFilters(PizzaMenuMixin, TestCase):
+    """
+    Tests that confirm pizzas can be filtered by the toppings they must have, may have and must not have, in one query.
+    """
+
+    @classmethod
+    def setUpClass(self):
+        teardown_test_environment()
+        setup_test_environment()
+        return super().setUpClass()
+
+    def setUp(self):
+        self.client = Client()
+        cache.clear()
+        self.mushroom = Topping.objects.create(name="Mushroom")
+        self.olive = Topping.objects.create(name="Olive")
+        self.anchovies = Topping.objects.create(name="Anchovies")
+        self.ham = Topping.objects.create(name="Ham")
+        self.createPizza("Forest", self.mushroom, self.olive)
+        self.createPizza("Mediterranean", self.mushroom, self.olive, self.anchovies)
+        self.createPizza("Funghi", self.mushroom)
+        self.createPizza("Olive Oil", self.olive, self.ham)
+        self.createPizza("Plain")
+        return super().setUp()
+
+    def filtered(self, **filters):
+        return list(Pizza.objects.with_topping_filter(**filters).order_by("name").values_list("name", flat=True))
+
+    def overviewNames(self, response):
+        return [pizza.name for pizza in response.context["pizzas_list"]]
+
+    ##############################################################################
+    ###     It should match all of, any of and none of the toppings given      ###
+    ##############################################################################
+
+    def test_all_of(self):
+        self.assertEqual(self.filtered(all_of=[self.mushroom.id, self.olive.id]), ["Forest", "Mediterranean"])
+        self.assertEqual(self.filtered(all_of=[self.mushroom.id, self.mushroom.id]),
+                         ["Forest", "Funghi", "Mediterranean"])
+        self.assertEqual(self.filtered(all_of=[self.mushroom.id, 999]), [])
+
+    def test_any_of(self):
+        self.assertEqual(self.filtered(any_of=[self.anchovies.id, self.ham.id]), ["Mediterranean", "Olive Oil"])
+        self.assertEqual(self.filtered(any_of=[999]), [])
+
+    def test_none_of(self):
+        self.assertEqual(self.filtered(none_of=[self.mushroom.id]), ["Olive Oil", "Plain"])
+        self.assertEqual(self.filtered(none_of=[999]),
+                         ["Forest", "Funghi", "Mediterranean", "Olive Oil", "Plain"])
+
+    def test_combined(self):
+        # Mushrooms and olives but no anchovies.
+        self.assertEqual(self.filtered(all_of=[self.mushroom.id, self.olive.id], none_of=[self.anchovies.id]),
+                         ["Forest"])
+        self.assertEqual(self.filtered(any_of=[self.olive.id, self.ham.id], none_of=[self.anchovies.id]),
+                         ["Forest", "Olive Oil"])
+
+    def test_one_indexed_query(self):
+        queryset = Pizza.objects.with_topping_filter(
+            all_of=[self.mushroom.id, self.olive.id], any_of=[self.olive.id, self.ham.id], none_of=[self.anchovies.id]
+        ).order_by("name", "id")
+        with CaptureQueriesContext(connection) as queries:
+            list(queryset)
+        self.assertEqual(len(queries), 1)
+
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute("EXPLAIN QUERY PLAN " + sql, params)
+            plan = [str(row[-1]) for row in cursor.fetchall()]
+        # The pizza to topping table is only ever searched through an index, never scanned.
+        self.assertFalse([step for step in plan if step.startswith("SCAN") and "pizza_toppings" in step])
+        self.assertTrue([step for step in plan if "pizza_toppings_topping_pizza_idx" in step])
+
+    ##############################################################################
+    ###           It should filter the overview and the API by topping ids     ###
+    ##############################################################################
+
+    def test_overview_filters(self):
+        response = self.client.get(reverse("PizzaManager:Pizza Overview"),
+                                   {"all_of": str(self.mushroom.id) + "," + str(self.olive.id),
+                                    "none_of": self.anchovies.id})
+        self.assertEqual(self.overviewNames(response), ["Forest"])
+        self.assertContains(response, "Showing pizzas with all of Mushroom, Olive; none of Anchovies.")
+
+        response = self.client.get(reverse("PizzaManager:Pizza Overview"), {"any_of": [self.ham.id, self.anchovies.id]})
+        self.assertEqual(self.overviewNames(response), ["Mediterranean", "Olive Oil"])
+
+        response = self.client.get(reverse("PizzaManager:Pizza Overview"), {"all_of": [self.anchovies.id, self.ham.id]})
+        self.assertContains(response, "No pizzas match these toppings.")
+
+    def test_overview_pages_keep_filters(self):
+        for index in range(6):
+            self.createPizza("Truffle " + str(index), self.mushroom)
+        response = self.client.get(reverse("PizzaManager:Pizza Overview"), {"all_of": self.mushroom.id})
+        self.assertContains(response, "?page=2&amp;all_of=" + str(self.mushroom.id))
+        second = self.client.get(reverse("PizzaManager:Pizza Overview"), {"all_of": self.mushroom.id, "page": 2})
+        self.assertEqual(self.overviewNames(second), ["Truffle 2", "Truffle 3", "Truffle 4", "Truffle 5"])
+
+        response = self.client.get(reverse("PizzaManager:Pizza Overview"), {"all_of": self.mushroom.id, "cursor": ""})
+        self.assertContains(response, "&amp;all_of=" + str(self.mushroom.id))
+
+    def test_overview_filter_follows_changes(self):
+        url = reverse("PizzaManager:Pizza Overview")
+        self.assertEqual(self.overviewNames(self.client.get(url, {"all_of": self.ham.id})), ["Olive Oil"])
+        Pizza.objects.get(name="Plain").toppings.add(self.ham)
+        # A pizza newly matching shows up, though no tag of the page before changed.
+        self.assertEqual(self.overviewNames(self.client.get(url, {"all_of": self.ham.id})), ["Olive Oil", "Plain"])
+
+    def test_invalid_overview_filter(self):
+        for value in ("mushroom", "1;2", "-1"):
+            response = self.client.get(reverse("PizzaManager:Pizza Overview"), {"all_of": value})
+            self.assertEqual(response.status_code, HTTP_NOT_FOUND)
+
+    def test_api_filters(self):
+        response = self.client.get(reverse("PizzaManager:Pizza API"), {
+            "all_of": self.mushroom.id, "none_of": self.olive.id, "fields": "name",
+        })
+        self.assertEqual(response.json()["results"], [{"name": "Funghi"}])
+
+        response = self.client.get(reverse("PizzaManager:Pizza API"), {"any_of": self.anchovies.id})
+        self.assertEqual([topping["name"] for topping in response.json()["results"][0]["toppings"]],
+                         ["Anchovies", "Mushroom", "Olive"])
+
+    def test_invalid_api_filter(self):
+        for value in ("olive", "²", "1,٣", "-1"):
+            response = self.client.get(reverse("PizzaManager:Pizza API"), {"any_of": value})
+            self.assertEqual(response.status_code, HTTP_BAD_REQUEST)
+            self.assertEqual(response.json()["error"], "Topping filters take topping ids separated by commas.")
+
+        response = self.client.get(reverse("PizzaManager:Pizza API"), {"any_of": ",".join(map(str, range(1, 52)))})
+        self.assertEqual(response.json()["error"], "Please filter by at most 50 toppings at a time.")
+
+    def asyncOverview(self, **params):
+        request = AsyncRequestFactory().get(reverse("PizzaManager:Pizza Overview"), params)
+        return async_to_sync(async_views.pizza_overview)(request)
+
+    def test_async_overview_filters(self):
+        response = self.asyncOverview(none_of=self.mushroom.id)
+        self.assertContains(response, "Olive Oil")
+        self.assertNotContains(response, "Funghi")
+        self.assertContains(response, "Showing pizzas with none of Mushroom.")
+        self.assertContains(response, 'id="clear_filters"')
+
+        response = self.asyncOverview(all_of=str(self.anchovies.id) + "," + str(self.ham.id))
+        self.assertContains(response, "No pizzas match these toppings.")
+
+    def test_async_overview_pages_keep_filters(self):
+        for index in range(6):
+            self.createPizza("Truffle " + str(index), self.mushroom)
+        response = self.asyncOverview(all_of=self.mushroom.id)
+        self.assertContains(response, "?page=2&amp;all_of=" + str(self.mushroom.id))
+        response = self.asyncOverview(all_of=self.mushroom.id, cursor="")
+        self.assertContains(response, "&amp;all_of=" + str(self.mushroom.id))
+
+    @override_settings(MENU_SNAPSHOT=True)
+    def test_filters_with_snapshot(self):
+        dropMenuSnapshot()
+        try:
+            self.client.get(reverse("PizzaManager:Pizza Overview"))
+            # Filtered from the snapshot, topping names included, without a query.
+            with self.assertNumQueries(0):
+                response = self.client.get(reverse("PizzaManager:Pizza Overview"), {"none_of": self.mushroom.id})
+            self.assertEqual(self.overviewNames(response), ["Olive Oil", "Plain"])
+            self.assertContains(response, "Showing pizzas with none of Mushroom.")
+            with self.assertNumQueries(0):
+                response = self.client.get(reverse("PizzaManager:Pizza API"), {"any_of": self.ham.id, "fields": "name"})
+            self.assertEqual(response.json()["results"], [{"name": "Olive Oil"}])
+
+            Pizza.objects.get(name="Plain").toppings.add(self.ham)
+            response = self.client.get(reverse("PizzaManager:Pizza API"), {"any_of": self.ham.id, "fields": "name"})
+            self.assertEqual(response.json()["results"], [{"name": "Olive Oil"}, {"name": "Plain"}])
+        finally:
+            dropMenuSnapshot()
+
+    def test_snapshot_filters_match_database(self):
+        snapshot = MenuSnapshot.load("")
+        missing = Topping.objects.order_by("-id")[0].id + 1
+        ids = [self.mushroom.id, self.olive.id, self.anchovies.id, self.ham.id, missing]
+        for filters in (
+            {"all_of": ids[:2]}, {"all_of": [ids[3], missing]}, {"any_of": ids[2:4]}, {"any_of": [missing]},
+            {"none_of": ids[:1]}, {"none_of": [missing]}, {"all_of": ids[:1], "any_of": ids[1:3], "none_of": ids[3:4]},
+            {"any_of": ids[:2], "none_of": ids[2:]}, {},
+        ):
+            rows = snapshot.filteredPizzaRows(**filters)
+            self.assertEqual([pizza.name for pizza in rows[:len(rows)]], self.filtered(**filters), filters)
@@ -0,0 +1,127 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, Client, override_settings
+from django.test.utils import CaptureQueriesContext, setup_test_environment, teardown_test_environment
+from django.urls import reverse
+from prometheus_client import REGISTRY
+
+from PizzaManager.models import Topping, Pizza
+from PizzaManager.topping_names import STAMP_KEY, TOPPING_NAMES, toppingId, toppingIds
+
+# Create your tests here.
+class TestToppingNameCache(TestCase):
+    """
+    Tests that confirm topping names are resolved from each process's cache until a topping changes anywhere.
+    """
+
+    @classmethod
+    def setUpClass(self):
+        teardown_test_environment()
+        setup_test_environment()
+        return super().setUpClass()
+
+    def setUp(self):
+        self.client = Client()
+        cache.clear()
+        TOPPING_NAMES.forget()
+        self.cheese = Topping.objects.create(name="Cheese")
+        self.basil = Topping.objects.create(name="Basil")
+        return super().setUp()
+
+    def countQueries(self, lookup):
+        with CaptureQueriesContext(connection) as queries:
+            result = lookup()
+        return result, len(queries)
+
+    def sample(self, result):
+        return REGISTRY.get_sample_value("pizzamanager_topping_name_lookups_total", {"result": result}) or 0
+
+    ##############################################################################
+    ###         It should resolve repeated names without querying again        ###
+    ##############################################################################
+
+    def test_repeated_lookups(self):
+        ids, queries = self.countQueries(lambda: toppingIds(["Cheese", "Basil", "Anchovies"]))
+        self.assertEqual(ids, {"Cheese": self.cheese.id, "Basil": self.basil.id})
+        self.assertEqual(queries, 1)
+
+        self.assertEqual(self.countQueries(lambda: toppingId("Cheese")), (self.cheese.id, 0))
+        # Names matching no topping are never kept, so they are looked up each time.
+        self.assertEqual(self.countQueries(lambda: toppingId("Anchovies")), (None, 1))
+
+    def test_lookups_are_counted(self):
+        hits, misses = self.sample("hit"), self.sample("miss")
+        toppingIds(["Cheese", "Basil"])
+        toppingIds(["Cheese", "Basil"])
+        self.assertEqual(self.sample("hit"), hits + 2)
+        self.assertEqual(self.sample("miss"), misses + 2)
+
+    @override_settings(TOPPING_NAME_CACHE_SIZE=2)
+    def test_least_recently_used_evicted(self):
+        onion = Topping.objects.create(name="Onion")
+        toppingIds(["Cheese", "Basil"])
+        toppingId("Cheese")
+        toppingId("Onion")
+        # Basil was used least recently, so it made room for Onion.
+        self.assertEqual(self.countQueries(lambda: toppingIds(["Cheese", "Onion"])),
+                         ({"Cheese": self.cheese.id, "Onion": onion.id}, 0))
+        self.assertEqual(self.countQueries(lambda: toppingId("Basil")), (self.basil.id, 1))
+
+    @override_settings(TOPPING_NAME_CACHE_SIZE=0)
+    def test_disabled(self):
+        toppingId("Cheese")
+        self.assertEqual(self.countQueries(lambda: toppingId("Cheese")), (self.cheese.id, 1))
+
+    ##############################################################################
+    ###            It should forget names when any topping changes             ###
+    ##############################################################################
+
+    def test_rename_and_delete(self):
+        toppingIds(["Cheese", "Basil"])
+        self.cheese.name = "Mozzarella"
+        self.cheese.save()
+        self.assertEqual(toppingIds(["Cheese", "Mozzarella"]), {"Mozzarella": self.cheese.id})
+
+        self.basil.delete()
+        self.assertIsNone(toppingId("Basil"))
+
+    def test_change_in_another_process(self):
+        toppingId("Cheese")
+        # Another worker replaced the stamp after saving a topping.
+        cache.set(STAMP_KEY, "changed elsewhere", None)
+        self.assertEqual(self.countQueries(lambda: toppingId("Cheese")), (self.cheese.id, 1))
+        self.assertEqual(self.countQueries(lambda: toppingId("Cheese")), (self.cheese.id, 0))
+
+    def test_lost_stamp(self):
+        toppingId("Cheese")
+        # Losing the shared cache, such as on a restart, also loses whatever was invalidated.
+        cache.clear()
+        self.assertEqual(self.countQueries(lambda: toppingId("Cheese")), (self.cheese.id, 1))
+
+    ##############################################################################
+    ###           It should save the editor's topping lookups once warm        ###
+    ##############################################################################
+
+    def test_editor_uses_cache(self):
+        pizza = Pizza.objects.create(name="Margherita")
+        pizza.toppings.add(self.cheese)
+        url = reverse("PizzaManager:Pizza Editor", args=[pizza.id])
+        toppingIds(["Cheese", "Basil"])
+
+        _, warm = self.countQueries(lambda: self.client.post(
+            url, {"pizza_topping_change": "", "prior_topping": "Cheese", "toppings_options": "Basil"}
+        ))
+        TOPPING_NAMES.forget()
+        _, cold = self.countQueries(lambda: self.client.post(
+            url, {"pizza_topping_change": "", "prior_topping": "Basil", "toppings_options": "Cheese"}
+        ))
+        self.assertEqual(cold - warm, 1)
+        self.assertEqual(list(pizza.toppings.all()), [self.cheese])
+
+    def test_editor_missing_topping(self):
+        pizza = Pizza.objects.create(name="Margherita")
+        pizza.toppings.add(self.cheese)
+        response = self.client.post(reverse("PizzaManager:Pizza Editor", args=[pizza.id]),
+                                    {"pizza_topping_change": "", "prior_topping": "Cheese", "toppings_options": "Ham"})
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(list(pizza.toppings.all()), [self.cheese])
@@ -0,0 +1,168 @@
+from asgiref.sync import async_to_sync
+from django.db import connection
+from django.test import AsyncRequestFactory, TestCase, Client, override_settings
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.urls import reverse
+
+from PizzaManager import async_views
+from PizzaManager.models import Topping, Pizza
+
+HTTP_OK = 200
+HTTP_NOT_MODIFIED = 304
+HTTP_BAD_REQUEST = 400
+
+# Create your tests here.
+class TestToppingSearch(TestCase):
+    """
+    Tests that confirm the topping search finds toppings by prefix with a capped, indexed lookup.
+    """
+
+    @classmethod
+    def setUpClass(self):
+        teardown_test_environment()
+        setup_test_environment()
+        return super().setUpClass()
+
+    def setUp(self):
+        self.client = Client()
+        for name in ("Cheese", "cheddar", "Chives", "Pepperoni", "Peppers", "Onion"):
+            Topping.objects.create(name=name)
+        return super().setUp()
+
+    def search(self, **params):
+        return self.client.get(reverse("PizzaManager:Topping Search"), params)
+
+    ##############################################################################
+    ###            It should find toppings by prefix, ignoring case            ###
+    ##############################################################################
+
+    def test_prefix_search(self):
+        response = self.search(q="ch")
+        self.assertEqual(response.status_code, HTTP_OK)
+        self.assertEqual([topping["name"] for topping in response.json()["results"]], ["cheddar", "Cheese", "Chives"])
+        self.assertFalse(response.json()["more"])
+
+        self.assertEqual([topping["name"] for topping in self.search(q="PEPPER").json()["results"]],
+                         ["Pepperoni", "Peppers"])
+        self.assertEqual(self.search(q="Zucchini").json()["results"], [])
+
+    def test_search_results_carry_ids(self):
+        result = self.search(q="Onion").json()["results"][0]
+        self.assertEqual(result, {"id": Topping.objects.get(name="Onion").id, "name": "Onion"})
+
+    def test_empty_prefix(self):
+        # An empty search lists toppings from the start of the alphabet.
+        results = self.search().json()["results"]
+        self.assertEqual(len(results), Topping.objects.count())
+        self.assertEqual(results[0]["name"], "cheddar")
+
+    ##############################################################################
+    ###            It should cap the results and report what was cut           ###
+    ##############################################################################
+
+    def test_limit(self):
+        data = self.search(q="c", limit=2).json()
+        self.assertEqual([topping["name"] for topping in data["results"]], ["cheddar", "Cheese"])
+        self.assertTrue(data["more"])
+
+    def test_invalid_limit(self):
+        for limit in ("0", "26", "many"):
+            self.assertEqual(self.search(q="c", limit=limit).status_code, HTTP_BAD_REQUEST)
+
+    def test_overlong_prefix(self):
+        self.assertEqual(self.search(q="c" * 51).json(), {"results": [], "more": False})
+
+    ##############################################################################
+    ###         It should search an index and answer repeats from versions     ###
+    ##############################################################################
+
+    def test_search_uses_index(self):
+        sql, params = Topping.objects.with_name_prefix("ch").values("id", "name")[:11].query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute("EXPLAIN QUERY PLAN " + sql, params)
+            plan = " ".join(str(row[-1]) for row in cursor.fetchall())
+        self.assertIn("topping_name_lower_idx", plan)
+        self.assertNotIn("TEMP B-TREE", plan)
+
+    def test_repeated_search(self):
+        response = self.search(q="ch")
+        response = self.client.get(reverse("PizzaManager:Topping Search"), {"q": "ch"},
+                                   HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(response.status_code, HTTP_NOT_MODIFIED)
+
+        Topping.objects.create(name="Chorizo")
+        response = self.client.get(reverse("PizzaManager:Topping Search"), {"q": "ch"},
+                                   HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(response.status_code, HTTP_OK)
+        self.assertIn("Chorizo", [topping["name"] for topping in response.json()["results"]])
+
+@override_settings(TOPPING_TYPEAHEAD=True)
+class TestToppingTypeahead(TestCase):
+    """
+    Tests that confirm typeahead mode keeps the topping list out of the pizza editor and creation pages.
+    """
+
+    @classmethod
+    def setUpClass(self):
+        teardown_test_environment()
+        setup_test_environment()
+        return super().setUpClass()
+
+    def setUp(self):
+        self.client = Client()
+        self.pizza = Pizza.objects.create(name="Margherita")
+        self.pizza.toppings.add(Topping.objects.create(name="Cheese"))
+        return super().setUp()
+
+    def addToppings(self, size):
+        first = Topping.objects.count()
+        Topping.objects.bulk_create(Topping(name="Extra " + str(first + index)) for index in range(size))
+
+    ##############################################################################
+    ###        It should render the editors without listing every topping      ###
+    ##############################################################################
+
+    def test_editor_uses_search(self):
+        self.addToppings(5)
+        response = self.client.get(reverse("PizzaManager:Pizza Editor", args=[self.pizza.id]))
+        self.assertEqual(response.status_code, HTTP_OK)
+        self.assertContains(response, reverse("PizzaManager:Topping Search"))
+        self.assertContains(response, 'list="topping_matches"', count=3)
+        self.assertNotContains(response, "Extra")
+
+    def test_editor_size_is_fixed(self):
+        url = reverse("PizzaManager:Pizza Editor", args=[self.pizza.id])
+        small = len(self.client.get(url).content)
+        self.addToppings(200)
+        self.assertEqual(len(self.client.get(url).content), small)
+
+    def test_async_editor_uses_search(self):
+        self.addToppings(5)
+        request = AsyncRequestFactory().get(reverse("PizzaManager:Pizza Editor", args=[self.pizza.id]))
+        response = async_to_sync(async_views.pizza_editor)(request, self.pizza.id)
+        self.assertContains(response, 'list="topping_matches"', count=3)
+        self.assertNotContains(response, "Extra")
+
+    def test_create_page_uses_search(self):
+        self.addToppings(5)
+        response = self.client.get(reverse("PizzaManager:Pizza Create"))
+        self.assertContains(response, 'list="topping_matches"', count=1)
+        self.assertNotContains(response, "Extra")
+
+    def test_error_reply_uses_search(self):
+        self.addToppings(5)
+        response = self.client.post(reverse("PizzaManager:Pizza Editor", args=[self.pizza.id]),
+                                    {"pizza_topping_add": "", "toppings_options": "Cheese"})
+        self.assertContains(response, "already on this pizza")
+        self.assertNotContains(response, "Extra")
+
+    ##############################################################################
+    ###              It should accept toppings typed into the search           ###
+    ##############################################################################
+
+    def test_add_typed_topping(self):
+        self.addToppings(1)
+        response = self.client.post(reverse("PizzaManager:Pizza Editor", args=[self.pizza.id]),
+                                    {"pizza_topping_add": "", "toppings_options": "Extra 1"})
+        self.assertRedirects(response, reverse("PizzaManager:Pizza Editor", args=[self.pizza.id]))
+        self.assertTrue(self.pizza.toppings.filter(name="Extra 1").exists())
@@ -1,13 +1,18 @@
-from django.test import TestCase, Client
-from django.test.utils import setup_test_environment, teardown_test_environment
+from django.db import IntegrityError, connection, transaction
+from django.test import TestCase, Client, override_settings
+from django.test.utils import CaptureQueriesContext, setup_test_environment, teardown_test_environment
 from django.urls import reverse
 
-from PizzaManager.models import Topping
+from PizzaManager.models import Topping, Pizza
 
 HTTP_OK = 200
 HTTP_REDIRECT = 302
+HTTP_NOT_FOUND = 404
 
 # Create your tests here.
+# These tests inspect `response.context`, which pages served from the overview cache do not carry, so the cache is
+# turned off here and covered by test_caching.py instead.
+@override_settings(OVERVIEW_CACHE_TIMEOUT=0)
 class TestToppings(TestCase):
     """
     Tests that confirm each of the requirements for Topping functionality are satisfied.
@@ -50,6 +55,39 @@ class TestToppings(TestCase):
         self.assertEqual(response.status_code, HTTP_OK)
         self.assertQuerySetEqual(response.context["toppings_list"], [topping])
 
+    def test_list_toppings_keyset_pagination(self):
+        """
+        This test will ensure the overview can page by cursor without counting or offsetting the table.
+        """
+        for index in range(12):
+            Topping.objects.create(name="Topping " + str(index).zfill(2))
+
+        with CaptureQueriesContext(connection) as firstPageQueries:
+            firstPageResponse = self.client.get(reverse("PizzaManager:Toppings Overview"), {"cursor": ""})
+        self.assertEqual(firstPageResponse.status_code, HTTP_OK)
+        # One lookup of the topping list version and one query for the page itself.
+        self.assertEqual(len(firstPageQueries), 2)
+        self.assertFalse(any("COUNT" in query["sql"] for query in firstPageQueries))
+        self.assertEqual([topping.name for topping in firstPageResponse.context["toppings_list"]],
+                         ["Topping " + str(index).zfill(2) for index in range(10)])
+        self.assertFalse(firstPageResponse.context["page_obj"].has_previous())
+
+        secondPageResponse = self.client.get(reverse("PizzaManager:Toppings Overview"),
+                                             {"cursor": firstPageResponse.context["page_obj"].next_cursor})
+        self.assertEqual([topping.name for topping in secondPageResponse.context["toppings_list"]],
+                         ["Topping 10", "Topping 11"])
+        self.assertFalse(secondPageResponse.context["page_obj"].has_next())
+        self.assertContains(secondPageResponse, "?cursor=" + secondPageResponse.context["page_obj"].previous_cursor)
+
+    @override_settings(KEYSET_PAGINATION=True)
+    def test_list_toppings_keyset_pagination_setting(self):
+        """
+        This test will ensure the setting turns on keyset pagination for requests without a cursor.
+        """
+        response = self.client.get(reverse("PizzaManager:Toppings Overview"))
+        self.assertEqual(response.status_code, HTTP_OK)
+        self.assertTrue(response.context["keyset_pagination"])
+
     ##############################################################################
     ###                It should allow me to add a new topping                 ###
     ##############################################################################
@@ -191,4 +229,78 @@ class TestToppings(TestCase):
         })
         self.assertEqual(duplicateToppingResponse.status_code, HTTP_OK)
         self.assertEqual(duplicateToppingResponse.context["error_message"], 
-                         "A topping with this name already exists. Please enter a unique name. Name unchanged.")
\ No newline at end of file
+                         "A topping with this name already exists. Please enter a unique name. Name unchanged.")
+
+    def test_duplicate_toppings_rejected_by_database(self):
+        """
+        This test will ensure the unique index on the topping name rejects duplicates that bypass the views.
+        """
+        Topping.objects.create(name="TestTopping")
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Topping.objects.create(name="TestTopping")
+        self.assertEqual(Topping.objects.filter(name="TestTopping").count(), 1)
+
+    ##############################################################################
+    ###     It should show me which pizzas use a topping before I delete it    ###
+    ##############################################################################
+
+    def createUsedTopping(self, pizzas):
+        topping = Topping.objects.create(name="Basil")
+        other = Topping.objects.create(name="Olives")
+        for index in range(pizzas):
+            pizza = Pizza.objects.create(name="Pizza " + str(index).zfill(2))
+            pizza.toppings.add(topping)
+        Pizza.objects.create(name="Olive Pizza").toppings.add(other)
+        return topping
+
+    def test_delete_confirmation_shows_impact(self):
+        topping = self.createUsedTopping(3)
+        response = self.client.get(reverse("PizzaManager:Toppings Editor", args=[topping.id]))
+        self.assertEqual(response.context["pizza_count"], 3)
+        self.assertContains(response, "Used by 3 pizzas")
+        self.assertContains(response, "removed from the <b>3</b> pizzas using it")
+
+        unused = Topping.objects.create(name="Capers")
+        response = self.client.get(reverse("PizzaManager:Toppings Editor", args=[unused.id]))
+        self.assertContains(response, "Used by 0 pizzas")
+        self.assertNotContains(response, "delete_impact")
+
+    def test_topping_usage_page(self):
+        topping = self.createUsedTopping(12)
+        response = self.client.get(reverse("PizzaManager:Topping Usage", args=[topping.id]))
+        self.assertEqual(response.status_code, HTTP_OK)
+        self.assertEqual(response.context["pizza_count"], 12)
+        self.assertEqual([pizza.name for pizza in response.context["pizzas_list"]],
+                         ["Pizza " + str(index).zfill(2) for index in range(10)])
+        self.assertContains(response, "Used by 12 pizzas")
+        self.assertNotContains(response, "Olive Pizza")
+
+        response = self.client.get(reverse("PizzaManager:Topping Usage", args=[topping.id]), {"cursor": ""})
+        self.assertEqual(response.context["pizza_count"], 12)
+        response = self.client.get(reverse("PizzaManager:Topping Usage", args=[topping.id]),
+                                   {"cursor": response.context["page_obj"].next_cursor})
+        self.assertEqual([pizza.name for pizza in response.context["pizzas_list"]], ["Pizza 10", "Pizza 11"])
+
+    def test_topping_usage_api(self):
+        topping = self.createUsedTopping(3)
+        response = self.client.get(reverse("PizzaManager:Topping Usage API", args=[topping.id]),
+                                   {"fields": "name", "limit": 2})
+        self.assertEqual(response.json()["count"], 3)
+        self.assertEqual(response.json()["results"], [{"name": "Pizza 00"}, {"name": "Pizza 01"}])
+        response = self.client.get(reverse("PizzaManager:Topping Usage API", args=[topping.id]),
+                                   {"fields": "name", "cursor": response.json()["next"]})
+        self.assertEqual(response.json()["results"], [{"name": "Pizza 02"}])
+        self.assertIsNone(response.json()["next"])
+
+    def test_topping_usage_unknown_topping(self):
+        self.assertEqual(self.client.get(reverse("PizzaManager:Topping Usage", args=[99])).status_code, HTTP_NOT_FOUND)
+        self.assertEqual(self.client.get(reverse("PizzaManager:Topping Usage API", args=[99])).status_code,
+                         HTTP_NOT_FOUND)
+
+    def test_topping_usage_uses_index(self):
+        topping = self.createUsedTopping(3)
+        sql, params = Pizza.objects.filter(toppings=topping).values("id", "name").query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute("EXPLAIN QUERY PLAN " + sql, params)
+            plan = " ".join(str(row[-1]) for row in cursor.fetchall())
+        self.assertIn("COVERING INDEX pizza_toppings_topping_pizza_idx", plan)
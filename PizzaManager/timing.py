@@ -0,0 +1,90 @@
+"""
+Per-request timing of database queries and template rendering, reported by `middleware.ServerTimingMiddleware`.
+
+The timer for the request being served lives in a context variable, which asgiref carries into the threads that
+run sync code for async views. Queries are timed by an execute wrapper installed on every database connection when
+it is created, and templates by the `TimedDjangoTemplates` backend. Both do nothing outside a request.
+"""
+import time
+from contextvars import ContextVar
+
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.template.backends.django import DjangoTemplates
+
+_current_timer = ContextVar("pizzamanager_request_timer", default=None)
+
+class RequestTimer:
+    """
+    Running totals for one request. Times are in seconds.
+    """
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.view_started = None
+        self.db_time = 0.0
+        self.queries = 0
+        self.template_time = 0.0
+
+def startTimer() -> tuple:
+    """
+    Helper method starting a timer for the current request.
+    @return The timer and the token to pass to `stopTimer` when the request is done.
+    """
+    timer = RequestTimer()
+    return timer, _current_timer.set(timer)
+
+def stopTimer(token):
+    _current_timer.reset(token)
+
+def currentTimer():
+    return _current_timer.get()
+
+def timeQuery(execute, sql, params, many, context):
+    """
+    Execute wrapper adding each query's duration to the current request's timer.
+    """
+    timer = _current_timer.get()
+    if timer is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timer.db_time += time.perf_counter() - started
+        timer.queries += 1
+
+@receiver(connection_created)
+def install_query_timer(sender, connection, **kwargs):
+    # A connection that is closed and reopened fires this again, so the wrapper is only added once.
+    if timeQuery not in connection.execute_wrappers:
+        connection.execute_wrappers.append(timeQuery)
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """
+    The Django template backend, adding each render's duration to the current request's timer.
+    """
+    def from_string(self, template_code):
+        return TimedTemplate(super().from_string(template_code))
+
+    def get_template(self, template_name):
+        return TimedTemplate(super().get_template(template_name))
+
+class TimedTemplate:
+    """
+    Wraps a backend template so `render` is timed. Everything else is passed through to the wrapped template.
+    """
+    def __init__(self, template):
+        self.wrapped = template
+
+    def __getattr__(self, name):
+        return getattr(self.wrapped, name)
+
+    def render(self, context=None, request=None):
+        timer = _current_timer.get()
+        if timer is None:
+            return self.wrapped.render(context, request)
+        started = time.perf_counter()
+        try:
+            return self.wrapped.render(context, request)
+        finally:
+            timer.template_time += time.perf_counter() - started
@@ -0,0 +1,104 @@
+"""
+A per-process cache from topping name to id, so the pizza editor and creation form resolve the toppings a form
+names without a query each time.
+
+Each process keeps up to `TOPPING_NAME_CACHE_SIZE` names, dropping the least recently used first. The entries carry a
+stamp kept in the shared cache. Saving or deleting a topping replaces the stamp, and every process empties its own
+entries the next time it sees a stamp that differs from the one they were read under. This reaches every gunicorn
+worker as long as the workers share the cache backend (see `DJANGO_CACHE_DIR`). Names that match no topping are not
+kept, so adding a topping never leaves a stale miss behind.
+"""
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db import transaction
+
+from .caching import CACHE_PREFIX, replaceStamp, sharedStamp
+from .metrics import recordToppingNameLookups
+from .models import Topping
+
+STAMP_KEY = CACHE_PREFIX + "topping-names"
+
+class ToppingNameCache:
+    """
+    Bounded least recently used map from topping name to id, emptied whenever the shared stamp changes.
+    """
+
+    def __init__(self):
+        self.entries = OrderedDict()
+        self.stamp = None
+        self.lock = threading.Lock()
+
+    def size(self) -> int:
+        return getattr(settings, "TOPPING_NAME_CACHE_SIZE", 1024)
+
+    def lookup(self, names) -> dict:
+        """
+        Resolves topping names to ids, querying only for the names not already cached.
+        @param names: The topping names to resolve.
+        @return A dict mapping each name that matches a topping to its id. Names matching none are left out.
+        """
+        names = set(names)
+        if not names:
+            return {}
+        if self.size() <= 0:
+            return dict(Topping.objects.filter(name__in=names).values_list("name", "id"))
+
+        # Read before querying, so a change made meanwhile leaves these entries under an old stamp.
+        stamp = sharedStamp(STAMP_KEY)
+        with self.lock:
+            if stamp != self.stamp:
+                self.entries.clear()
+                self.stamp = stamp
+            found = {}
+            for name in names & self.entries.keys():
+                self.entries.move_to_end(name)
+                found[name] = self.entries[name]
+        missing = names - found.keys()
+        recordToppingNameLookups(hits=len(found), misses=len(missing))
+        if not missing:
+            return found
+
+        fetched = dict(Topping.objects.filter(name__in=missing).values_list("name", "id"))
+        with self.lock:
+            if stamp == self.stamp:
+                self.entries.update(fetched)
+                while len(self.entries) > self.size():
+                    self.entries.popitem(last=False)
+        found.update(fetched)
+        return found
+
+    def forget(self):
+        """
+        Empties this process's entries and replaces the shared stamp, so every other process empties theirs.
+        """
+        with self.lock:
+            self.entries.clear()
+            self.stamp = None
+        replaceStamp(STAMP_KEY)
+
+TOPPING_NAMES = ToppingNameCache()
+
+def toppingIds(names) -> dict:
+    """
+    Helper method resolving topping names to ids through the per-process cache.
+    @param names: The topping names to resolve.
+    @return A dict mapping each name that matches a topping to its id.
+    """
+    return TOPPING_NAMES.lookup(names)
+
+def toppingId(name : str):
+    """
+    Helper method resolving one topping name to its id through the per-process cache.
+    @return The topping's id, or `None` if no topping has this name.
+    """
+    return toppingIds([name]).get(name)
+
+def forgetToppingNames():
+    """
+    Helper method dropping every cached topping name, in this process now and in the others on their next lookup.
+    Called again once the change commits, so a lookup made while it was still uncommitted is not kept.
+    """
+    TOPPING_NAMES.forget()
+    transaction.on_commit(TOPPING_NAMES.forget)
@@ -1,14 +1,32 @@
+from django.conf import settings
 from django.urls import path
 
 from . import views
 
+if settings.ASYNC_VIEWS:
+    from . import async_views as read_views
+    toppings_overview = read_views.toppings_overview
+    pizza_overview = read_views.pizza_overview
+else:
+    read_views = views
+    toppings_overview = views.ToppingsOverview.as_view()
+    pizza_overview = views.PizzaOverview.as_view()
+
 app_name = "PizzaManager"
 urlpatterns = [
-    path("", views.index, name="index"),
-    path("toppings/", views.ToppingsOverview.as_view(), name="Toppings Overview"),
+    path("", read_views.index, name="index"),
+    path("toppings/", toppings_overview, name="Toppings Overview"),
     path("toppings/<int:topping_id>/", views.toppings_editor, name="Toppings Editor"),
+    path("toppings/<int:topping_id>/pizzas/", views.ToppingUsage.as_view(), name="Topping Usage"),
     path("toppings/new", views.topping_create, name="Topping Create"),
-    path("pizza/", views.PizzaOverview.as_view(), name="Pizza Overview"),
-    path("pizza/<int:pizza_id>/", views.pizza_editor, name="Pizza Editor"),
+    path("pizza/", pizza_overview, name="Pizza Overview"),
+    path("pizza/<int:pizza_id>/", read_views.pizza_editor, name="Pizza Editor"),
     path("pizza/new", views.pizza_create, name="Pizza Create"),
+    path("menu/export", read_views.menu_export, name="Menu Export"),
+    path("api/pizzas/", views.pizzas_api, name="Pizza API"),
+    path("api/toppings/", views.toppings_api, name="Toppings API"),
+    path("api/toppings/search", views.topping_search, name="Topping Search"),
+    path("api/toppings/<int:topping_id>/pizzas/", views.topping_usage_api, name="Topping Usage API"),
+    path("api/search", views.menu_search, name="Menu Search"),
+    path("metrics", views.metrics, name="Metrics"),
 ]
\ No newline at end of file
@@ -0,0 +1,34 @@
+"""
+Checks on the pizza and topping names typed into the editors or read from menu files.
+"""
+from .models import Topping
+
+def hasSpecialChar(data_to_validate : str) -> bool:
+    """
+    Helper method to make sure the string passed in contains only alpha-numeric characters (blank spaces are permissible).
+    @param data_to_validate: String to be evaluated for special characters.
+    @return `True` if a special character is found. Otherwise returns `False`.
+    """
+    
+    for char in data_to_validate:
+        if not (char.isalnum() or char.isspace()):
+            return True
+
+    return False
+
+def nameProblem(name : str, kind : str) -> str:
+    """
+    Helper method checking a new pizza or topping name, the same way wherever one is typed in or imported.
+    @param name: The name to check, exactly as it would be saved.
+    @param kind: Either "pizza" or "topping", for the message.
+    @return What is wrong with the name, or a blank string if nothing is.
+    """
+    # Pizzas and toppings allow names of the same length, which the database does not enforce itself.
+    max_length = Topping._meta.get_field("name").max_length
+    if name.strip() == "":
+        return "Received blank."
+    if hasSpecialChar(name):
+        return "Please do not include any special characters in the " + kind + " name."
+    if len(name) > max_length:
+        return "Please keep the " + kind + " name to " + str(max_length) + " characters or fewer."
+    return ""
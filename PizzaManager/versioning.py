@@ -0,0 +1,148 @@
+"""
+Menu version counters and the conditional GET (ETag / Last-Modified) support built on them.
+
+Counters are bumped by the signal handlers whenever a topping, pizza or topping link changes. A page looks up the
+counters it depends on in one small query and, if the client already holds that version, answers 304 Not Modified
+before running any of its own queries or rendering a template.
+
+Every bump also replaces a stamp in the shared cache, so in-process copies of the menu can tell they are out of date
+with a cache read instead of a query.
+"""
+import hashlib
+
+from django.db import transaction
+
+from django.db.models import F
+from django.middleware.csrf import get_token
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+from .caching import CACHE_PREFIX, replaceStamp, sharedStamp
+from .models import MenuVersion
+
+MENU_VERSION = "menu"
+TOPPINGS_VERSION = "toppings"
+# Bumped whenever a pizza is deleted. A deleted pizza's own counter is dropped, which leaves it at version 0 like a
+# pizza whose counter was never created, so its editor's ETag would not change without this one.
+PIZZA_DELETIONS_VERSION = "pizza deletions"
+VERSIONS_STAMP_KEY = CACHE_PREFIX + "versions"
+
+def pizzaVersionName(pizza_id) -> str:
+    return "pizza:" + str(pizza_id)
+
+def pizzaEditorVersionNames(pizza_id) -> list:
+    """
+    Helper method listing the counters a pizza's editor depends on: its pizza, every topping, and pizza deletions.
+    """
+    return [pizzaVersionName(pizza_id), TOPPINGS_VERSION, PIZZA_DELETIONS_VERSION]
+
+def bumpVersions(*names):
+    """
+    Helper method to increase the named counters, creating any that do not exist yet.
+    @param names: The counters to bump.
+    """
+    if not names:
+        return
+    now = timezone.now()
+    bumped = MenuVersion.objects.filter(name__in=names).update(version=F("version") + 1, updated=now)
+    if bumped < len(set(names)):
+        existing = set(MenuVersion.objects.filter(name__in=names).values_list("name", flat=True))
+        missing = set(names) - existing
+        MenuVersion.objects.bulk_create(
+            [MenuVersion(name=name, version=0, updated=now) for name in missing],
+            ignore_conflicts=True,
+        )
+        # Bumped after creation so a counter created concurrently by another request still moves on.
+        MenuVersion.objects.filter(name__in=missing).update(version=F("version") + 1, updated=now)
+    # Replaced again once the bump commits, so a copy refreshed while it was still uncommitted is not kept.
+    _replaceVersionsStamp()
+    transaction.on_commit(_replaceVersionsStamp)
+
+def _replaceVersionsStamp():
+    replaceStamp(VERSIONS_STAMP_KEY)
+
+def versionsStamp() -> str:
+    """
+    Helper method reading the stamp that changes whenever any counter is bumped, from the shared cache.
+    @return The current stamp. A lost stamp is replaced by a new one, so it still counts as a change.
+    """
+    return sharedStamp(VERSIONS_STAMP_KEY)
+
+def dropVersions(*names):
+    """
+    Helper method to delete counters for objects that no longer exist.
+    @param names: The counters to delete.
+    """
+    MenuVersion.objects.filter(name__in=names).delete()
+
+def conditionalGetResponse(request, names, salt : str = ""):
+    """
+    Helper method to answer a conditional GET from the named counters alone.
+    @param request: The GET request, possibly carrying `If-None-Match` or `If-Modified-Since`.
+    @param names: The counters the page depends on.
+    @param salt: Anything else the page varies by, mixed into the ETag.
+    @return A tuple of the 304 response (or `None` if the page must be built) and the `(etag, last_modified)`
+    validators to set on the full response with `setConditionalHeaders`.
+    """
+    return _answerConditionalGet(request, MenuVersion.objects.filter(name__in=names), names, salt)
+
+def conditionalGetFromRows(request, rows, names, salt : str = ""):
+    """
+    Version of `conditionalGetResponse` for counters read earlier, such as by the menu snapshot.
+    @param rows: The `MenuVersion` rows read for `names`. Counters without a row count as version 0.
+    """
+    return _answerConditionalGet(request, rows, names, salt)
+
+async def aconditionalGetResponse(request, names, salt : str = ""):
+    """
+    Async version of `conditionalGetResponse`.
+    """
+    rows = [row async for row in MenuVersion.objects.filter(name__in=names)]
+    return _answerConditionalGet(request, rows, names, salt)
+
+def _answerConditionalGet(request, rows, names, salt : str):
+    rows = {row.name: row for row in rows}
+    versions = [name + "." + str(rows[name].version if name in rows else 0) for name in sorted(names)]
+    etag = quote_etag(hashlib.md5(("|".join(versions) + "|" + salt).encode()).hexdigest())
+    last_modified = max((row.updated for row in rows.values()), default=None)
+    last_modified = int(last_modified.timestamp()) if last_modified else None
+    not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if not_modified is not None:
+        setConditionalHeaders(not_modified, (etag, last_modified))
+    return not_modified, (etag, last_modified)
+
+def setConditionalHeaders(response, validators):
+    """
+    Helper method to attach the validators from `conditionalGetResponse` to a freshly built response.
+    @param response: The full 200 response, or the 304 answering a conditional GET.
+    @param validators: The `(etag, last_modified)` tuple.
+    @return The `response`.
+    """
+    etag, last_modified = validators
+    if response.status_code in (200, 304):
+        response.headers.setdefault("ETag", etag)
+        if last_modified is not None:
+            response.headers.setdefault("Last-Modified", http_date(last_modified))
+    return response
+
+def csrfSalt(request) -> str:
+    """
+    Helper method keying pages that embed a CSRF token to the visitor's CSRF secret, so a browser never reuses a page
+    holding a token for a secret it no longer has. First-time visitors get their secret created here, so the ETag
+    of their first page already matches the cookie sent along with it.
+    """
+    get_token(request)
+    return request.META.get("CSRF_COOKIE", "")
+
+class ConditionalGetMixin:
+    """
+    View mixin answering `If-None-Match` and `If-Modified-Since` from the counters listed in `version_names`.
+    """
+    version_names = (MENU_VERSION,)
+
+    def get(self, request, *args, **kwargs):
+        not_modified, validators = conditionalGetResponse(request, self.version_names)
+        if not_modified is not None:
+            return not_modified
+        return setConditionalHeaders(super().get(request, *args, **kwargs), validators)
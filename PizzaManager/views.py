@@ -1,13 +1,56 @@
+from django.conf import settings
 from django.shortcuts import get_object_or_404, render
 
-from django.http import Http404, HttpResponse, HttpResponseRedirect
+from django.db import IntegrityError, transaction
+from django.db.models import Prefetch
+from django.http import (
+    Http404,
+    HttpResponse,
+    HttpResponseForbidden,
+    HttpResponseRedirect,
+    JsonResponse,
+    StreamingHttpResponse,
+)
 
 from django.urls import reverse
+from django.utils.crypto import constant_time_compare
 from django.views import generic
+from django.views.decorators.http import require_GET
 
 import logging
+from collections import Counter
 
+from .bulk_edits import applyTopping, clonePizza, matchingPizzas, removeTopping
+from .caching import CachedPageMixin, cacheTagsFor
+from .menu_io import MENU_FORMATS, iterMenuExport
+from .merging import MergeError, mergeToppings
+from .metrics import exposition, recordErrorReply
 from .models import Topping, Pizza
+from .pagination import InvalidCursor, KeysetPaginationMixin, SortedRows, keysetPage
+from .search import searchNames
+from .snapshot import menuSnapshot
+from .topping_names import toppingId, toppingIds
+from .validation import nameProblem
+from .versioning import (
+    MENU_VERSION,
+    TOPPINGS_VERSION,
+    ConditionalGetMixin,
+    conditionalGetResponse,
+    csrfSalt,
+    pizzaEditorVersionNames,
+    setConditionalHeaders,
+)
+
+API_DEFAULT_PAGE_SIZE = 50
+API_MAX_PAGE_SIZE = 500
+PIZZA_API_FIELDS = ("id", "name", "toppings")
+TOPPING_API_FIELDS = ("id", "name")
+TOPPING_SEARCH_DEFAULT_LIMIT = 10
+TOPPING_SEARCH_MAX_LIMIT = 25
+MENU_SEARCH_DEFAULT_LIMIT = 10
+MENU_SEARCH_MAX_LIMIT = 25
+TOPPING_FILTERS = ("all_of", "any_of", "none_of")
+TOPPING_FILTER_MAX_IDS = 50
 
 # Create your views here.
 def index(request):
@@ -16,13 +59,15 @@ def index(request):
     """
     return HttpResponse(render(request, "PizzaManager/landing_page.html"))
 
-class ToppingsOverview(generic.ListView):
+class ToppingsOverview(ConditionalGetMixin, CachedPageMixin, KeysetPaginationMixin, generic.ListView):
     """
     This is the view responsible for providing a list of all available toppings to the Owner.
     """
     template_name = "PizzaManager/toppings_overview.html"
     context_object_name = "toppings_list"
     paginate_by = 10
+    cache_tags = ("toppings",)
+    version_names = (TOPPINGS_VERSION,)
 
     def get_queryset(self):
         return Topping.objects.all().order_by("name")
@@ -34,43 +79,90 @@ def toppings_editor(request, topping_id):
     topping = get_object_or_404(Topping, pk=topping_id)
 
     if request.method == 'GET':
-        return render(request, "PizzaManager/toppings_editor.html", {"topping": topping})
+        # Shown on the delete confirmation, as deleting the topping takes it off every one of these pizzas.
+        return render(request, "PizzaManager/toppings_editor.html",
+                      {"topping": topping, "pizza_count": topping.pizza_set.count()})
     
     if "topping_name_change" in request.POST:
         topping_name = request.POST["new_name"]
-        if topping_name.strip() != "":
-            if not hasSpecialChar(topping_name):
-                if not any(topping_name == object.name for object in Topping.objects.all()):
-                    topping.name = topping_name
-                    topping.save()
-                else:
-                    return createToppingErrorReply(
-                        request,
-                        topping=topping,
-                        destination="PizzaManager/toppings_editor.html",
-                        error_message="A topping with this name already exists. Please enter a unique name. Name unchanged."
-                    )
-            else:
-                return createToppingErrorReply(
-                    request,
-                    topping=topping,
-                    destination="PizzaManager/toppings_editor.html",
-                    error_message="Please do not include any special characters in the topping name. Name unchanged."
-                )
-        else:
+        problem = nameProblem(topping_name, "topping")
+        if problem:
             return createToppingErrorReply(
                 request,
                 topping=topping,
                 destination="PizzaManager/toppings_editor.html",
-                error_message="Received blank. Name unchanged."
+                error_message=problem + " Name unchanged."
+            )
+        if Topping.objects.filter(name=topping_name).exists() or not saveUniqueName(topping, topping_name):
+            return createToppingErrorReply(
+                request,
+                topping=topping,
+                destination="PizzaManager/toppings_editor.html",
+                error_message="A topping with this name already exists. Please enter a unique name. Name unchanged."
             )
         return HttpResponseRedirect(reverse("PizzaManager:Toppings Overview"))
     elif "topping_delete" in request.POST:
         topping.delete()
         return HttpResponseRedirect(reverse("PizzaManager:Toppings Overview"))
+    elif "topping_merge" in request.POST:
+        target = Topping.objects.filter(name=request.POST.get("merge_into", "")).first()
+        if target is None:
+            return createToppingErrorReply(
+                request,
+                topping=topping,
+                destination="PizzaManager/toppings_editor.html",
+                error_message="You have attempted to merge into a topping that does not exist. No toppings merged."
+            )
+        try:
+            mergeToppings(target, [topping])
+        except MergeError as error:
+            return createToppingErrorReply(
+                request,
+                topping=topping,
+                destination="PizzaManager/toppings_editor.html",
+                error_message=str(error) + " No toppings merged."
+            )
+        # This topping is gone, so the owner carries on from the one it was merged into.
+        return HttpResponseRedirect(reverse("PizzaManager:Toppings Editor", args=(target.id,)))
+    elif "topping_bulk_add" in request.POST or "topping_bulk_remove" in request.POST:
+        name_contains = request.POST.get("pizza_name_contains", "")
+        # A blank filter matches the whole menu, so it must be asked for explicitly.
+        if name_contains.strip() == "" and "all_pizzas" not in request.POST:
+            return createToppingErrorReply(
+                request,
+                topping=topping,
+                destination="PizzaManager/toppings_editor.html",
+                error_message="Received blank. Enter part of a pizza name, or tick \"Every pizza\" to change them all. No pizzas changed."
+            )
+        pizzas = matchingPizzas(name_contains)
+        if "topping_bulk_add" in request.POST:
+            applyTopping(topping, pizzas)
+        else:
+            removeTopping(topping, pizzas)
+        return HttpResponseRedirect(reverse("PizzaManager:Topping Usage", args=(topping.id,)))
     else:
         raise Http404
 
+class ToppingUsage(KeysetPaginationMixin, generic.ListView):
+    """
+    This is the view responsible for listing the pizzas that use a topping, along with how many there are.
+    """
+    template_name = "PizzaManager/topping_usage.html"
+    context_object_name = "pizzas_list"
+    paginate_by = 10
+
+    def get_queryset(self):
+        self.topping = get_object_or_404(Topping, pk=self.kwargs["topping_id"])
+        return toppingUsage(self.topping.pk)
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context["topping"] = self.topping
+        # Numbered pages have already counted the pizzas.
+        paginator = context["paginator"]
+        context["pizza_count"] = paginator.count if paginator else self.object_list.count()
+        return context
+
 def topping_create(request):
     """
     This is the view responsible for adding new toppings.
@@ -80,102 +172,124 @@ def topping_create(request):
 
     if "topping_new" in request.POST:
             topping_name = request.POST["new_topping_name"]
-            if topping_name.strip() != "":
-                if not hasSpecialChar(topping_name):
-                    if not any(topping_name == object.name for object in Topping.objects.all()):
-                        new_topping = Topping(name=topping_name)
-                        new_topping.save()
-                        return HttpResponseRedirect(reverse("PizzaManager:Toppings Overview"))
-                    else:
-                        return createToppingErrorReply(
-                            request,
-                            topping=None,
-                            destination="PizzaManager/topping_new.html",
-                            error_message="A topping with this name already exists. Please enter a unique name. No topping created."
-                        )
-                else:
-                    return createToppingErrorReply(
-                        request,
-                        topping=None,
-                        destination="PizzaManager/topping_new.html",
-                        error_message="Please do not include any special characters in the topping name. No topping created."
-                    )
-            else:
+            problem = nameProblem(topping_name, "topping")
+            if problem:
                 return createToppingErrorReply(
                     request,
                     topping=None,
                     destination="PizzaManager/topping_new.html",
-                    error_message="Received blank. No topping created."
+                    error_message=problem + " No topping created."
                 )
+            if not Topping.objects.filter(name=topping_name).exists() and saveUniqueName(Topping(), topping_name):
+                return HttpResponseRedirect(reverse("PizzaManager:Toppings Overview"))
+            return createToppingErrorReply(
+                request,
+                topping=None,
+                destination="PizzaManager/topping_new.html",
+                error_message="A topping with this name already exists. Please enter a unique name. No topping created."
+            )
     elif "cancel_topping_new" in request.POST:
         return HttpResponseRedirect(reverse("PizzaManager:Toppings Overview"))
     else:
         raise Http404
 
-class PizzaOverview(generic.ListView):
+class PizzaOverview(ConditionalGetMixin, CachedPageMixin, KeysetPaginationMixin, generic.ListView):
     """
     This is the view responsible for providing a list of all available pizzas to the Chef.
     """
     template_name = "PizzaManager/pizza_overview.html"
     context_object_name = "pizzas_list"
     paginate_by = 5
+    cache_tags = ("pizzas",)
+    version_names = (MENU_VERSION,)
+
+    def setup(self, request, *args, **kwargs):
+        super().setup(request, *args, **kwargs)
+        try:
+            self.topping_filters = toppingFilters(request)
+        except ValueError:
+            raise Http404("Invalid topping filter.")
+
+    def usesPageCache(self):
+        # A pizza gaining or losing a topping changes which pizzas a filter matches, which the page's tags do not
+        # follow. Filtered pages are still answered from the menu version.
+        return super().usesPageCache() and not self.topping_filters
+
+    def get(self, request, *args, **kwargs):
+        if not settings.MENU_SNAPSHOT:
+            return super().get(request, *args, **kwargs)
+        # The snapshot read its counters along with the menu, so a current one answers without any query.
+        self.snapshot = menuSnapshot()
+        not_modified, validators = self.snapshot.conditionalGetResponse(request, self.version_names)
+        if not_modified is not None:
+            return not_modified
+        return setConditionalHeaders(super(ConditionalGetMixin, self).get(request, *args, **kwargs), validators)
 
     def get_queryset(self):
-        return Pizza.objects.all().order_by("name")
+        if settings.MENU_SNAPSHOT:
+            return self.snapshot.filteredPizzaRows(**self.topping_filters)
+        if self.topping_filters:
+            return Pizza.objects.with_toppings().with_topping_filter(**self.topping_filters).order_by("name")
+        return Pizza.objects.with_toppings().order_by("name")
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context["filter_query"] = toppingFilterQuery(self.topping_filters)
+        context["filter_summary"] = toppingFilterSummary(
+            self.topping_filters, self.snapshot.toppings if settings.MENU_SNAPSHOT else None
+        )
+        return context
+
+    def get_cache_tags(self, context):
+        return [tag for pizza in context["pizzas_list"] for tag in cacheTagsFor(pizza)]
 
 def pizza_editor(request, pizza_id):
     """
     This is the view responsible for handling all changes that might need to occur to a pizza.
     """
-    pizza = get_object_or_404(Pizza, pk=pizza_id)
-    toppings_list = Topping.objects.all()
-
     #Guard statement to ensure GET requests can be processed quickly.
     if request.method =='GET':
-        return render(request, "PizzaManager/pizza_editor.html",
+        # The editor shows this pizza and every topping, so unchanged reloads are answered from their versions alone.
+        not_modified, validators = conditionalGetResponse(
+            request, pizzaEditorVersionNames(pizza_id), csrfSalt(request)
+        )
+        if not_modified is not None:
+            return not_modified
+        pizza = get_object_or_404(Pizza, pk=pizza_id)
+        return setConditionalHeaders(render(request, "PizzaManager/pizza_editor.html",
                         {
                           "pizza": pizza,
-                          "toppings_list": toppings_list
+                          # Typeahead pickers search for toppings as the user types instead of listing them all.
+                          "toppings_list": None if settings.TOPPING_TYPEAHEAD else Topping.objects.all(),
+                          "topping_typeahead": settings.TOPPING_TYPEAHEAD,
                         }
-                      )
+                      ), validators)
+
+    pizza = get_object_or_404(Pizza, pk=pizza_id)
     
     # Requests, by this point, should be exclusively POST requests and will take time to process.
     try:
         # Process name changes
         if "pizza_name_change" in request.POST:
             new_name = request.POST["new_name"]
-            # Check if the new name is an empty string or composed of all white space.
-            if new_name.strip() != "":
-                # Check for special characters.
-                if not hasSpecialChar(new_name):
-                    # Check for any duplicate entries that already exist.
-                    if not any(new_name == object.name for object in Pizza.objects.all()):
-                        pizza.name = new_name
-                        pizza.save()
-                    else:
-                        return createPizzaErrorReply(
-                            request,
-                            topping_list=None,
-                            pizza=pizza,
-                            destination="PizzaManager/pizza_editor.html",
-                            error_message="A pizza with this name already exists. Please enter a unique name. Name unchanged."
-                        )
-
-                else:
-                    return createPizzaErrorReply(
-                        request,
-                        topping_list=None,
-                        pizza=pizza,
-                        destination="PizzaManager/pizza_editor.html",
-                        error_message="Please do not include any special characters in the pizza name. Name unchanged."
-                    )
-            else:
+            # Check for a blank name, special characters or a name too long to store.
+            problem = nameProblem(new_name, "pizza")
+            if problem:
+                return createPizzaErrorReply(
+                    request,
+                    topping_list=None,
+                    pizza=pizza,
+                    destination="PizzaManager/pizza_editor.html",
+                    error_message=problem + " Name unchanged."
+                )
+            # Check for any duplicate entries that already exist.
+            if Pizza.objects.filter(name=new_name).exists() or not saveUniqueName(pizza, new_name):
                 return createPizzaErrorReply(
                     request,
                     topping_list=None,
                     pizza=pizza,
                     destination="PizzaManager/pizza_editor.html",
-                    error_message="Received blank. Name unchanged."
+                    error_message="A pizza with this name already exists. Please enter a unique name. Name unchanged."
                 )
 
         # Process pizza deletions
@@ -194,7 +308,7 @@ def pizza_editor(request, pizza_id):
                         destination="PizzaManager/pizza_editor.html",
                         error_message="The toppping " + new_topping + " is already on this pizza. No toppings added."
                     )
-            pizza.toppings.add(get_object_or_404(Topping, name=new_topping))
+            pizza.toppings.add(toppingIdOr404(new_topping))
             return HttpResponseRedirect(reverse("PizzaManager:Pizza Editor", args=(pizza.id,)))
 
         # Process topping changes
@@ -219,15 +333,62 @@ def pizza_editor(request, pizza_id):
                     error_message="The toppping " + new_topping + " is already on this pizza. No change made."
                 )
 
-            pizza.toppings.remove(get_object_or_404(Topping, name=old_topping))
-            pizza.toppings.add(get_object_or_404(Topping, name=new_topping))
+            # Both names are resolved before either change, so a missing topping leaves the pizza as it was.
+            toppings = toppingIds([old_topping, new_topping])
+            old_topping_id = toppingIdOr404(old_topping, toppings)
+            new_topping_id = toppingIdOr404(new_topping, toppings)
+            pizza.toppings.remove(old_topping_id)
+            pizza.toppings.add(new_topping_id)
             return HttpResponseRedirect(reverse("PizzaManager:Pizza Editor", args=(pizza.id,)))
 
         
         # Process topping removals
         elif "pizza_topping_delete" in request.POST:
             deleted_topping = request.POST["deleted_topping"]
-            pizza.toppings.remove(get_object_or_404(Topping, name=deleted_topping))
+            pizza.toppings.remove(toppingIdOr404(deleted_topping))
+            return HttpResponseRedirect(reverse("PizzaManager:Pizza Editor", args=(pizza.id,)))
+
+        # Process pizza cloning
+        elif "pizza_clone" in request.POST:
+            clone_name = request.POST["clone_name"]
+            problem = nameProblem(clone_name, "pizza")
+            if problem:
+                error_message = problem + " No pizza created."
+            else:
+                with transaction.atomic():
+                    clone = Pizza()
+                    if not Pizza.objects.filter(name=clone_name).exists() and saveUniqueName(clone, clone_name):
+                        clonePizza(pizza, clone)
+                        return HttpResponseRedirect(reverse("PizzaManager:Pizza Editor", args=(clone.id,)))
+                error_message = "A pizza with this name already exists. Please enter a unique name. No pizza created."
+            return createPizzaErrorReply(
+                request,
+                topping_list=Topping.objects.all().order_by("name"),
+                pizza=pizza,
+                destination="PizzaManager/pizza_editor.html",
+                error_message=error_message
+            )
+
+        # Process several changes at once
+        elif "pizza_batch_edit" in request.POST:
+            errors = applyPizzaBatchEdit(
+                pizza,
+                new_name=request.POST.get("batch_new_name", ""),
+                # Pickers left blank are skipped.
+                added=[name for name in request.POST.getlist("batch_add") if name],
+                removed=[name for name in request.POST.getlist("batch_remove") if name],
+                swaps=[(current, replacement) for current, replacement in zip(
+                    request.POST.getlist("batch_swap_from"), request.POST.getlist("batch_swap_to")
+                ) if current and replacement],
+            )
+            if errors:
+                return createPizzaErrorReply(
+                    request,
+                    topping_list=Topping.objects.all().order_by("name"),
+                    pizza=pizza,
+                    destination="PizzaManager/pizza_editor.html",
+                    error_message=" ".join(errors) + " No changes made."
+                )
             return HttpResponseRedirect(reverse("PizzaManager:Pizza Editor", args=(pizza.id,)))
 
     # Should never occur on production if I did this right.
@@ -271,47 +432,40 @@ def pizza_create(request):
     toppings_list = Topping.objects.all()
 
     if request.method =='GET':
-        context = {"toppings_list": toppings_list}
+        context = {"toppings_list": toppings_list, "topping_typeahead": settings.TOPPING_TYPEAHEAD}
         return render(request, "PizzaManager/pizza_new.html", context)
 
     # Process POST requests
     try:
         if "pizza_new" in request.POST:
             pizza_name = request.POST["new_pizza_name"]
-            if pizza_name.strip() != "":
-                if not hasSpecialChar(pizza_name):
-                    if not any(pizza_name == object.name for object in Pizza.objects.all()):
-                        new_pizza = Pizza(name=pizza_name)
-                        new_pizza.save()
-                        for topping in request.POST.getlist("toppings_options"):
-                            topping_to_add = get_object_or_404(Topping, name=topping)
-                            new_pizza.toppings.add(topping_to_add)
-                        new_pizza.save()
-                        return HttpResponseRedirect(reverse("PizzaManager:Pizza Overview"))
-                    else:
-                        return createPizzaErrorReply(
-                            request, 
-                            topping_list=toppings_list,
-                            pizza=None,
-                            destination="PizzaManager/pizza_new.html",
-                            error_message="A pizza with this name already exists. Please enter a unique name. No pizza created."
-                        )
-                else:
-                    return createPizzaErrorReply(
-                        request,
-                        topping_list=toppings_list,
-                        pizza=None,
-                        destination="PizzaManager/pizza_new.html",
-                        error_message="Please do not include any special characters in the pizza name. No pizza created."
-                    )
-            else:
+            problem = nameProblem(pizza_name, "pizza")
+            if problem:
                 return createPizzaErrorReply(
                     request,
                     topping_list=toppings_list,
                     pizza=None,
                     destination="PizzaManager/pizza_new.html",
-                    error_message="Received blank. No pizza created."
+                    error_message=problem + " No pizza created."
                 )
+            new_pizza = Pizza()
+            with transaction.atomic():
+                if not Pizza.objects.filter(name=pizza_name).exists() and saveUniqueName(new_pizza, pizza_name):
+                    # Resolve every selected topping through the name cache and link them with one bulk insert.
+                    topping_names = set(request.POST.getlist("toppings_options"))
+                    toppings_to_add = toppingIds(topping_names).values()
+                    if len(toppings_to_add) != len(topping_names):
+                        # Raising inside the atomic block discards the half-built pizza.
+                        raise Http404("One or more of the selected toppings do not exist.")
+                    new_pizza.toppings.add(*toppings_to_add)
+                    return HttpResponseRedirect(reverse("PizzaManager:Pizza Overview"))
+            return createPizzaErrorReply(
+                request,
+                topping_list=toppings_list,
+                pizza=None,
+                destination="PizzaManager/pizza_new.html",
+                error_message="A pizza with this name already exists. Please enter a unique name. No pizza created."
+            )
         elif "cancel_pizza_new" in request.POST:
             return HttpResponseRedirect(reverse("PizzaManager:Pizza Overview"))
 
@@ -324,18 +478,354 @@ def pizza_create(request):
             error_message="Internal Error occurred. Contact Nolan Murphy about resolving this."
         )
 
-def hasSpecialChar(data_to_validate : str) -> bool:
+def menu_export(request):
     """
-    Helper method to make sure the string passed in contains only alpha-numeric characters (blank spaces are permissible).
-    @param data_to_validate: String to be evaluated for special characters.
-    @return `True` if a special character is found. Otherwise returns `False`.
+    This is the view responsible for streaming the whole menu out as CSV (default) or JSON Lines (`?format=jsonl`).
     """
-    
-    for char in data_to_validate:
-        if not (char.isalnum() or char.isspace()):
-            return True
+    menu_format = menuExportFormat(request)
+    return createMenuExportReply(iterMenuExport(menu_format), menu_format)
+
+@require_GET
+def pizzas_api(request):
+    """
+    This is the view responsible for serving pizzas, with the ids and names of their toppings, as JSON.
+    Supports `?fields=`, `?limit=` and `?cursor=` (see `createApiPage`), and the `?all_of=`, `?any_of=` and
+    `?none_of=` topping filters (see `toppingFilters`).
+    """
+    try:
+        topping_filters = toppingFilters(request)
+    except ValueError as error:
+        return createApiErrorReply(str(error))
+    if settings.MENU_SNAPSHOT:
+        return createApiPage(request, menuSnapshot().filteredPizzaRows(**topping_filters), PIZZA_API_FIELDS)
+    if topping_filters:
+        return createApiPage(request, Pizza.objects.with_topping_filter(**topping_filters), PIZZA_API_FIELDS)
+    return createApiPage(request, Pizza.objects.all(), PIZZA_API_FIELDS)
+
+@require_GET
+def toppings_api(request):
+    """
+    This is the view responsible for serving toppings as JSON.
+    Supports `?fields=`, `?limit=` and `?cursor=` (see `createApiPage`).
+    """
+    return createApiPage(request, Topping.objects.all(), TOPPING_API_FIELDS)
+
+@require_GET
+def topping_usage_api(request, topping_id):
+    """
+    This is the view responsible for serving the pizzas that use a topping as JSON, with their total `count`.
+    Supports `?fields=`, `?limit=` and `?cursor=` (see `createApiPage`).
+    """
+    topping = get_object_or_404(Topping, pk=topping_id)
+    return createApiPage(request, toppingUsage(topping.pk), PIZZA_API_FIELDS, with_count=True)
+
+@require_GET
+def topping_search(request):
+    """
+    This is the view responsible for the topping typeahead. Returns at most `?limit=` toppings whose name starts with
+    `?q=`, ignoring case, and whether there are `more`. Each lookup reads only the matching rows from an index, so it
+    costs the same however many toppings the menu holds.
+    """
+    try:
+        limit = int(request.GET.get("limit", TOPPING_SEARCH_DEFAULT_LIMIT))
+    except ValueError:
+        limit = 0
+    if not 1 <= limit <= TOPPING_SEARCH_MAX_LIMIT:
+        return createApiErrorReply("Please request a limit between 1 and " + str(TOPPING_SEARCH_MAX_LIMIT) + ".")
+
+    # Results only change with the topping list, so a repeated search is answered from its version.
+    not_modified, validators = conditionalGetResponse(request, [TOPPINGS_VERSION], request.get_full_path())
+    if not_modified is not None:
+        return not_modified
+
+    prefix = request.GET.get("q", "")
+    matches = []
+    if len(prefix) <= Topping._meta.get_field("name").max_length:
+        # One extra row tells whether the results were cut off.
+        matches = list(Topping.objects.with_name_prefix(prefix).values("id", "name")[:limit + 1])
+    return setConditionalHeaders(
+        JsonResponse({"results": matches[:limit], "more": len(matches) > limit}), validators
+    )
+
+@require_GET
+def menu_search(request):
+    """
+    This is the view responsible for the search boxes on the overview pages. Returns at most `?limit=` pizzas or
+    toppings (`?kind=`) whose name matches `?q=`, best match first, and whether there are `more`. See
+    PizzaManager/search.py for how names are matched and ranked.
+    """
+    kind = request.GET.get("kind", "pizzas")
+    if kind not in ("pizzas", "toppings"):
+        return createApiErrorReply("Please search either pizzas or toppings.")
+    try:
+        limit = int(request.GET.get("limit", MENU_SEARCH_DEFAULT_LIMIT))
+    except ValueError:
+        limit = 0
+    if not 1 <= limit <= MENU_SEARCH_MAX_LIMIT:
+        return createApiErrorReply("Please request a limit between 1 and " + str(MENU_SEARCH_MAX_LIMIT) + ".")
+
+    # Renaming a pizza bumps the menu version, and renaming a topping bumps both.
+    model, version_name = (Pizza, MENU_VERSION) if kind == "pizzas" else (Topping, TOPPINGS_VERSION)
+    not_modified, validators = conditionalGetResponse(request, [version_name], request.get_full_path())
+    if not_modified is not None:
+        return not_modified
+
+    text = request.GET.get("q", "")
+    matches = []
+    if len(text) <= model._meta.get_field("name").max_length:
+        # One extra match tells whether the results were cut off.
+        matches = searchNames(model, text, limit + 1)
+    return setConditionalHeaders(
+        JsonResponse({"results": matches[:limit], "more": len(matches) > limit}), validators
+    )
+
+@require_GET
+def metrics(request):
+    """
+    This is the view responsible for serving request, query, cache and error reply metrics in the Prometheus text
+    format. When `METRICS_TOKEN` is set, scrapers must send it as `Authorization: Bearer <token>`.
+    """
+    if settings.METRICS_TOKEN and not constant_time_compare(
+        request.headers.get("Authorization", ""), "Bearer " + settings.METRICS_TOKEN
+    ):
+        return HttpResponseForbidden()
+    content, content_type = exposition()
+    return HttpResponse(content, content_type=content_type)
+
+def toppingUsage(topping_id):
+    """
+    Helper method selecting the pizzas that use a topping. The lookup starts from the topping's rows in the pizza
+    to topping table, found through `pizza_toppings_topping_pizza_idx`, so it reads only the pizzas that use it.
+    @param topping_id: The id of the topping.
+    @return A queryset of the pizzas, ordered by `(name, id)`.
+    """
+    return Pizza.objects.filter(toppings=topping_id).order_by("name", "id")
+
+def toppingFilters(request) -> dict:
+    """
+    Helper method reading the topping filters of a pizza overview or API request: `all_of`, `any_of` and `none_of`,
+    each a list of topping ids given comma separated, repeated, or both.
+    @param request: The GET request.
+    @return A dict from each filter given to its list of ids, ready for `Pizza.objects.with_topping_filter`.
+    @raise ValueError with a message for the user if an id is not a number or a filter names too many toppings.
+    """
+    filters = {}
+    for name in TOPPING_FILTERS:
+        values = [value.strip() for given in request.GET.getlist(name) for value in given.split(",") if value.strip()]
+        if not values:
+            continue
+        # `isdigit` alone also accepts characters such as "²" that `int` cannot read.
+        if not all(value.isascii() and value.isdigit() for value in values):
+            raise ValueError("Topping filters take topping ids separated by commas.")
+        if len(values) > TOPPING_FILTER_MAX_IDS:
+            raise ValueError("Please filter by at most " + str(TOPPING_FILTER_MAX_IDS) + " toppings at a time.")
+        filters[name] = sorted({int(value) for value in values})
+    return filters
+
+def toppingFilterQuery(topping_filters : dict) -> str:
+    """
+    Helper method turning topping filters back into query parameters, for links to other pages of the same list.
+    @return The parameters, each starting with `&`, or a blank string when nothing is filtered.
+    """
+    return "".join(
+        "&" + name + "=" + ",".join(str(topping_id) for topping_id in topping_filters[name])
+        for name in TOPPING_FILTERS if name in topping_filters
+    )
+
+def toppingFilterSummary(topping_filters : dict, names : dict = None) -> str:
+    """
+    Helper method describing topping filters by topping name, such as "all of Mushroom, Olive; none of Anchovies".
+    Costs one query, and none when nothing is filtered or the names are given.
+    @param names: Topping id to name, such as the menu snapshot's, or `None` to look the names up.
+    @return The description, or a blank string when nothing is filtered.
+    """
+    if not topping_filters:
+        return ""
+    if names is None:
+        names = dict(Topping.objects.filter(
+            pk__in={topping_id for ids in topping_filters.values() for topping_id in ids}
+        ).values_list("id", "name"))
+    return "; ".join(
+        name.replace("_", " ") + " " + ", ".join(sorted(names.get(topping_id, "#" + str(topping_id))
+                                                        for topping_id in topping_filters[name]))
+        for name in TOPPING_FILTERS if name in topping_filters
+    )
+
+def saveUniqueName(instance, name : str) -> bool:
+    """
+    Helper method to rename and save a pizza or topping whose name is protected by a unique index.
+    @param instance: The pizza or topping being named.
+    @param name: The name to store on `instance`.
+    @return `True` if the row was saved. Returns `False` and restores the previous name if another row already holds `name`.
+    """
+    old_name = instance.name
+    instance.name = name
+    try:
+        with transaction.atomic():
+            instance.save()
+    except IntegrityError:
+        instance.name = old_name
+        return False
+
+    return True
+
+def toppingIdOr404(name : str, resolved : dict = None) -> int:
+    """
+    Helper method resolving a topping named in a form to its id through the name cache.
+    @param name: The topping's name.
+    @param resolved: Names already resolved together with `toppingIds`, if any.
+    @return The topping's id. Raises `Http404` if no topping has this name.
+    """
+    topping_id = resolved.get(name) if resolved is not None else toppingId(name)
+    if topping_id is None:
+        raise Http404("No Topping matches the given query.")
+    return topping_id
+
+def applyPizzaBatchEdit(pizza, new_name : str, added : list, removed : list, swaps : list) -> list:
+    """
+    Helper method applying several changes to one pizza together: every change is checked first, then all of them
+    are made in one transaction, or none are. Every topping named is resolved through the name cache, and the toppings
+    are unlinked and linked with one query each, so the cost does not grow with the number of changes.
+    @param pizza: The pizza being edited.
+    @param new_name: The pizza's new name, or a blank string to keep the current one.
+    @param added: Names of toppings to put on the pizza.
+    @param removed: Names of toppings to take off the pizza.
+    @param swaps: `(current, replacement)` pairs of topping names.
+    @return The problems found, one message each. Nothing was changed if any are returned.
+    """
+    errors = []
+    # A blank name keeps the current one. Any other is checked, and saved, exactly as the single rename does.
+    if new_name.strip() == "":
+        new_name = ""
+    problem = nameProblem(new_name, "pizza") if new_name else ""
+    if problem:
+        errors.append(problem)
+    elif new_name and new_name != pizza.name and Pizza.objects.filter(name=new_name).exists():
+        errors.append("A pizza with this name already exists.")
+
+    taken_off = removed + [current for current, replacement in swaps]
+    put_on = added + [replacement for current, replacement in swaps]
+    toppings = toppingIds(taken_off + put_on)
+    on_pizza = set(pizza.toppings.values_list("name", flat=True))
+    times_named = Counter(taken_off + put_on)
+
+    replaced_with_itself = {current for current, replacement in swaps if current == replacement}
+    for name in replaced_with_itself:
+        errors.append("The topping " + name + " is being replaced with itself.")
+    for name, count in times_named.items():
+        if name in replaced_with_itself:
+            continue
+        if name not in toppings:
+            errors.append("You have attempted to alter a topping that does not exist: " + name + ".")
+        elif count > 1:
+            errors.append("The topping " + name + " is changed more than once.")
+        elif name in taken_off and name not in on_pizza:
+            errors.append("The topping " + name + " is not on this pizza.")
+        elif name in put_on and name in on_pizza:
+            errors.append("The toppping " + name + " is already on this pizza.")
+    if errors:
+        return errors
+
+    with transaction.atomic():
+        if new_name and new_name != pizza.name and not saveUniqueName(pizza, new_name):
+            return ["A pizza with this name already exists."]
+        if taken_off:
+            pizza.toppings.remove(*[toppings[name] for name in taken_off])
+        if put_on:
+            pizza.toppings.add(*[toppings[name] for name in put_on])
+    return []
+
+def createApiPage(request, queryset, allowed_fields : tuple, with_count : bool = False) -> JsonResponse:
+    """
+    Helper method for serving one keyset-paginated page of pizzas or toppings as JSON.
+    @param request: The API request. `fields` is a comma separated subset of `allowed_fields` (default: all of them),
+    `limit` is the page size and `cursor` is the `next` or `previous` value of an earlier page.
+    @param queryset: The pizzas or toppings being served, or pizzas from the menu snapshot.
+    @param allowed_fields: The fields a client may select.
+    @param with_count: Also report how many rows `queryset` holds in total, at the cost of one more query.
+    @return A JsonResponse with the `results` and the `next` and `previous` cursors, plus the `count` if asked for.
+    """
+    count = queryset.count() if with_count else None
+    fields = [field for field in request.GET.get("fields", ",".join(allowed_fields)).split(",") if field]
+    if not fields or any(field not in allowed_fields for field in fields):
+        return createApiErrorReply("Unknown field requested. Available fields are: " + ", ".join(allowed_fields) + ".")
+
+    try:
+        limit = int(request.GET.get("limit", API_DEFAULT_PAGE_SIZE))
+    except ValueError:
+        limit = 0
+    if not 1 <= limit <= API_MAX_PAGE_SIZE:
+        return createApiErrorReply("Please request a limit between 1 and " + str(API_MAX_PAGE_SIZE) + ".")
+
+    # Only a pizza's toppings need the model instances; every other selection is served from plain rows.
+    if isinstance(queryset, SortedRows):
+        # Rows held in memory already carry their toppings.
+        pass
+    elif "toppings" in fields:
+        queryset = queryset.only("id", "name").prefetch_related(
+            Prefetch("toppings", queryset=Topping.objects.only("id", "name").order_by("name"))
+        )
+    else:
+        queryset = queryset.values("id", "name")
+
+    try:
+        items, next_cursor, previous_cursor = keysetPage(queryset, limit, request.GET.get("cursor"))
+    except InvalidCursor:
+        return createApiErrorReply("Invalid cursor.")
+
+    results = []
+    for item in items:
+        if isinstance(item, dict):
+            results.append({field: item[field] for field in fields})
+            continue
+        row = {}
+        for field in fields:
+            if field == "toppings":
+                row["toppings"] = [{"id": topping.id, "name": topping.name} for topping in item.toppings.all()]
+            else:
+                row[field] = getattr(item, field)
+        results.append(row)
+
+    page = {
+        "results": results,
+        "next": next_cursor,
+        "previous": previous_cursor,
+    }
+    if with_count:
+        page["count"] = count
+    return JsonResponse(page)
 
-    return False
+def menuExportFormat(request) -> str:
+    """
+    Helper method reading which format a menu export was asked for.
+    @param request: The export request, with `format` either `csv` (default) or `jsonl`.
+    @return The format.
+    @raise Http404 for anything other than a GET in a known format.
+    """
+    menu_format = request.GET.get("format", "csv")
+    if request.method != 'GET' or menu_format not in MENU_FORMATS:
+        raise Http404
+    return menu_format
+
+def createMenuExportReply(lines, menu_format : str) -> StreamingHttpResponse:
+    """
+    Helper method for streaming an encoded menu out as a file download.
+    @param lines: The encoded lines, from `iterMenuExport` or, under ASGI, `aiterMenuExport`.
+    @param menu_format: The format the lines are encoded in.
+    @return A StreamingHttpResponse sending `lines` as `menu.<format>`.
+    """
+    content_type = "text/csv" if menu_format == "csv" else "application/x-ndjson"
+    response = StreamingHttpResponse(lines, content_type=content_type)
+    response["Content-Disposition"] = 'attachment; filename="menu.' + menu_format + '"'
+    return response
+
+def createApiErrorReply(error_message : str) -> JsonResponse:
+    """
+    Helper method for generating error responses for the JSON API.
+    @param error_message: Message communicating what went wrong when processing the request.
+    @return A JsonResponse with the `error_message` and a 400 status.
+    """
+    return JsonResponse({"error": error_message}, status=400)
 
 def createPizzaErrorReply(request, topping_list, pizza, destination : str, error_message : str) -> HttpResponse:
     """
@@ -347,12 +837,14 @@ def createPizzaErrorReply(request, topping_list, pizza, destination : str, error
     @param error_message: Message communicating what went wrong when processing the request.
     @return An HttpResponse with the `error_message`.
     """
+    recordErrorReply("pizza", error_message)
     return render(
         request,
         destination,
         {
             "pizza": pizza,
             "toppings_list": topping_list,
+            "topping_typeahead": settings.TOPPING_TYPEAHEAD,
             "error_message": error_message,
         },
     )
@@ -366,6 +858,7 @@ def createToppingErrorReply(request, destination : str, topping, error_message :
     @param error_message: Message communicating what went wrong when processing the request.
     @return An HttpResponse with the `error_message`.
     """
+    recordErrorReply("topping", error_message)
     return render(
         request,
         destination,
@@ -26,6 +26,16 @@ SECRET_KEY = os.environ.get('DJANGO_SECRET_KEY','django-insecure-esp1x^4!40owqv1
 # SECURITY WARNING: don't run with debug turned on in production!
 DEBUG = os.environ.get('DJANGO_DEBUG', '') != 'False'
 
+# Page the overview screens by cursor instead of page number, which skips COUNT(*) and OFFSET on large menus.
+KEYSET_PAGINATION = os.environ.get('DJANGO_KEYSET_PAGINATION', '') == 'True'
+
+# Serve the overviews and editors from PizzaManager/async_views.py. On by default under PizzaShop/asgi.py.
+ASYNC_VIEWS = os.environ.get('DJANGO_ASYNC_VIEWS', '') == 'True'
+
+# Pick toppings in the pizza editor and creation form by searching as you type, instead of from a list of every
+# topping. Keeps those pages the same size however many toppings the menu holds.
+TOPPING_TYPEAHEAD = os.environ.get('DJANGO_TOPPING_TYPEAHEAD', '') == 'True'
+
 ALLOWED_HOSTS = ['nolano1smurphy.pythonanywhere.com', '127.0.0.1']
 
 
@@ -42,6 +52,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # First, so its Server-Timing total covers the rest of the stack.
+    'PizzaManager.middleware.ServerTimingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -56,7 +68,8 @@ ROOT_URLCONF = 'PizzaShop.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # Django's template backend, timing each render for the Server-Timing header.
+        'BACKEND': 'PizzaManager.timing.TimedDjangoTemplates',
         'DIRS': [],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -78,11 +91,100 @@ WSGI_APPLICATION = 'PizzaShop.wsgi.application'
 
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        'ENGINE': 'PizzaManager.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
     }
 }
 
+# Applied to every new SQLite connection by PizzaManager/database.py. Write-ahead logging lets chefs keep reading
+# the menu while an owner edits it, and writers wait up to DJANGO_SQLITE_BUSY_TIMEOUT milliseconds for the lock
+# rather than failing with "database is locked". Set any of these to an empty string to keep SQLite's default.
+
+SQLITE_PRAGMAS = {
+    'journal_mode': os.environ.get('DJANGO_SQLITE_JOURNAL_MODE', 'WAL'),
+    'synchronous': os.environ.get('DJANGO_SQLITE_SYNCHRONOUS', 'NORMAL'),
+    'busy_timeout': os.environ.get('DJANGO_SQLITE_BUSY_TIMEOUT', '5000'),
+    'mmap_size': os.environ.get('DJANGO_SQLITE_MMAP_SIZE', str(128 * 1024 * 1024)),
+    # Negative sizes are in KiB, so this is a 20 MB page cache per connection.
+    'cache_size': os.environ.get('DJANGO_SQLITE_CACHE_SIZE', '-20000'),
+}
+
+# Take the write lock when a transaction begins, so it waits on busy_timeout rather than failing when it writes.
+# See PizzaManager/backends/sqlite3/base.py.
+SQLITE_TRANSACTION_MODE = os.environ.get('DJANGO_SQLITE_TRANSACTION_MODE', 'IMMEDIATE')
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.0/topics/cache/
+# Local memory is private to each process. Several gunicorn workers must share one file-based cache through
+# DJANGO_CACHE_DIR to see each other's invalidations, which gunicorn.conf.py sets up unless it is already set.
+
+CACHE_DIR = os.environ.get('DJANGO_CACHE_DIR', '')
+
+# Entries kept before a third of them are culled. Each pizza card is cached on its own next to a version for the
+# pizza, so a menu needs about 2.2 entries per pizza: 250,000 fits the 100,000 pizza menus seeded in benchmarks/.
+# The file-based cache counts its files on every write, which takes about 6 ms per 1,000 files, so it keeps Django's
+# default of 300 unless DJANGO_CACHE_MAX_ENTRIES raises it.
+CACHE_MAX_ENTRIES = int(os.environ.get('DJANGO_CACHE_MAX_ENTRIES', '300' if CACHE_DIR else '250000'))
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': CACHE_DIR,
+        'OPTIONS': {'MAX_ENTRIES': CACHE_MAX_ENTRIES},
+    } if CACHE_DIR else {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'pizzamanager',
+        'OPTIONS': {'MAX_ENTRIES': CACHE_MAX_ENTRIES},
+    }
+}
+
+# Seconds a rendered overview page may be served from the cache. Model changes invalidate it sooner.
+OVERVIEW_CACHE_TIMEOUT = int(os.environ.get('DJANGO_OVERVIEW_CACHE_TIMEOUT', '300'))
+
+# Serve the pizza overview and /api/pizzas/ from a copy of the menu held in each process (see
+# PizzaManager/snapshot.py), without querying the database until the menu changes.
+MENU_SNAPSHOT = os.environ.get('DJANGO_MENU_SNAPSHOT', '') == 'True'
+
+# Search pizza and topping names through SQLite's FTS5 index (see PizzaManager/search.py). Turned off, or on other
+# databases, searches match names with LIKE instead.
+FULL_TEXT_SEARCH = os.environ.get('DJANGO_FULL_TEXT_SEARCH', '') != 'False'
+
+
+# Topping names each process keeps resolved to ids for the pizza editor and creation form (see
+# PizzaManager/topping_names.py). 0 turns the cache off.
+TOPPING_NAME_CACHE_SIZE = int(os.environ.get('DJANGO_TOPPING_NAME_CACHE_SIZE', '1024'))
+
+
+# Metrics
+# /metrics serves Prometheus metrics. Set PROMETHEUS_MULTIPROC_DIR to add them up across gunicorn workers
+# (see PizzaManager/metrics.py), and DJANGO_METRICS_TOKEN to require `Authorization: Bearer <token>` from scrapers.
+
+METRICS_TOKEN = os.environ.get('DJANGO_METRICS_TOKEN', '')
+
+
+# Logging
+# https://docs.djangoproject.com/en/5.0/topics/logging/
+# PizzaManager.timing logs one JSON line per request with its URL name, total, DB and template times. It is on by
+# default when DEBUG is off; set DJANGO_TIMING_LOG_LEVEL to INFO to see it in development or WARNING to silence it.
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'PizzaManager.timing': {
+            'handlers': ['console'],
+            'level': os.environ.get('DJANGO_TIMING_LOG_LEVEL', 'WARNING' if DEBUG else 'INFO'),
+            'propagate': False,
+        },
+    },
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
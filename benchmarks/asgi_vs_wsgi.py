@@ -0,0 +1,70 @@
+"""
+Compares concurrent-request throughput of the synchronous WSGI deployment against the async ASGI one.
+
+Seeds a scratch SQLite database, then starts gunicorn twice with the same number of workers: once with sync workers
+serving `PizzaShop.wsgi` and once with uvicorn workers serving `PizzaShop.asgi:application`. Each server is loaded
+with the same concurrent GET requests and the results are printed as JSON.
+
+Run from the directory containing `manage.py`:
+    python benchmarks/asgi_vs_wsgi.py --workers 2 --concurrency 32 --requests 2000
+"""
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+
+from common import BASE_DIR, freePort, loadServer, scratchEnvironment, seedDatabase, waitForServer
+
+PATHS = ("/", "/pizza/", "/pizza/?page=2", "/toppings/", "/pizza/1/")
+
+def runServer(mode : str, env : dict, args) -> dict:
+    """
+    Helper method starting gunicorn in `mode` (`wsgi` or `asgi`), loading it and shutting it down again.
+    """
+    port = freePort()
+    command = [sys.executable, "-m", "gunicorn", "--bind", "127.0.0.1:" + str(port), "--workers", str(args.workers)]
+    if mode == "wsgi":
+        # gunicorn.conf.py gives each worker threads, which would swap the sync workers for threaded ones.
+        command += ["--threads", "1", "PizzaShop.wsgi"]
+    else:
+        command += ["-k", "uvicorn.workers.UvicornWorker", "PizzaShop.asgi:application"]
+    server = subprocess.Popen(command, cwd=BASE_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        base_url = "http://127.0.0.1:" + str(port)
+        waitForServer(base_url + "/")
+        # Warm every worker up before measuring.
+        loadServer(base_url, PATHS, args.concurrency, args.concurrency * 2)
+        return loadServer(base_url, PATHS, args.concurrency, args.requests)
+    finally:
+        server.terminate()
+        server.wait()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--pizzas", type=int, default=2000)
+    parser.add_argument("--toppings", type=int, default=200)
+    parser.add_argument("--toppings-per-pizza", type=int, default=8)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        env = scratchEnvironment(directory)
+        # Every request should reach the database, so the page cache is turned off.
+        env["DJANGO_OVERVIEW_CACHE_TIMEOUT"] = "0"
+        seedDatabase(env, args.pizzas, args.toppings, args.toppings_per_pizza)
+
+        results = {
+            "workers": args.workers,
+            "concurrency": args.concurrency,
+            "pizzas": args.pizzas,
+            "toppings": args.toppings,
+        }
+        results["wsgi"] = runServer("wsgi", dict(env, DJANGO_ASYNC_VIEWS="False"), args)
+        results["asgi"] = runServer("asgi", dict(env, DJANGO_ASYNC_VIEWS="True"), args)
+        print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""
+Helpers shared by the benchmark scripts for running the project against a scratch SQLite database.
+"""
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import textwrap
+import threading
+import time
+import urllib.request
+
+HTTP_OK = 200
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SETTINGS_TEMPLATE = """
+from PizzaShop.settings import *
+
+DATABASES["default"]["NAME"] = {db_path!r}
+"""
+
+def writeSettings(directory : str, db_path : str) -> str:
+    """
+    Helper method writing a settings module that points the project at the scratch database.
+    @return The module name, importable once `directory` is on the path.
+    """
+    with open(os.path.join(directory, "benchmark_settings.py"), "w") as settings_file:
+        settings_file.write(textwrap.dedent(SETTINGS_TEMPLATE.format(db_path=db_path)))
+    return "benchmark_settings"
+
+def migrateDatabase(env : dict):
+    """
+    Helper method bringing the scratch database up to the latest migration, such as one reused from an earlier run.
+    """
+    manage = [sys.executable, os.path.join(BASE_DIR, "manage.py")]
+    subprocess.run(manage + ["migrate", "--verbosity", "0"], cwd=BASE_DIR, env=env, check=True)
+
+def seedDatabase(env : dict, pizzas : int, toppings : int, toppings_per_pizza : int):
+    """
+    Helper method migrating the scratch database and filling it with a generated menu.
+    """
+    migrateDatabase(env)
+    manage = [sys.executable, os.path.join(BASE_DIR, "manage.py")]
+    subprocess.run(
+        manage + [
+            "seed_menu", "--pizzas", str(pizzas), "--toppings", str(toppings),
+            "--toppings-per-pizza", str(toppings_per_pizza), "--seed", "0",
+        ],
+        cwd=BASE_DIR, env=env, check=True, stdout=subprocess.DEVNULL,
+    )
+
+def scratchEnvironment(directory : str, db_path : str = None) -> dict:
+    """
+    Helper method building the environment for processes that should use a scratch database.
+    @param directory: Where the settings module is written.
+    @param db_path: The database file, `db.sqlite3` inside `directory` by default.
+    @return A copy of `os.environ` with the settings module and import path pointing at the scratch settings.
+    """
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [directory, BASE_DIR, env.get("PYTHONPATH")]))
+    env["DJANGO_SETTINGS_MODULE"] = writeSettings(directory, db_path or os.path.join(directory, "db.sqlite3"))
+    env["DJANGO_DEBUG"] = "False"
+    return env
+
+def latencySummary(latencies, elapsed : float) -> dict:
+    """
+    Helper method summarising request timings.
+    @param latencies: Seconds taken by each request.
+    @param elapsed: Wall clock seconds taken by all of them.
+    @return The request count, throughput and p50, p95 and p99 latency in milliseconds.
+    """
+    latencies = sorted(latencies)
+    if not latencies:
+        return {"requests": 0, "requests_per_second": 0, "p50_ms": None, "p95_ms": None, "p99_ms": None}
+    quantiles = statistics.quantiles(latencies, n=100, method="inclusive") if len(latencies) > 1 else latencies * 99
+    return {
+        "requests": len(latencies),
+        "requests_per_second": round(len(latencies) / elapsed, 1) if elapsed else None,
+        "p50_ms": round(quantiles[49] * 1000, 2),
+        "p95_ms": round(quantiles[94] * 1000, 2),
+        "p99_ms": round(quantiles[98] * 1000, 2),
+    }
+
+def measureRequests(client, urls, iterations : int) -> dict:
+    """
+    Helper method timing GET requests to `urls`, picked at random, and counting the queries they run.
+    """
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    latencies = []
+    queries = 0
+    started = time.perf_counter()
+    for _ in range(iterations):
+        url = random.choice(urls)
+        with CaptureQueriesContext(connection) as captured:
+            request_started = time.perf_counter()
+            response = client.get(url)
+            latencies.append(time.perf_counter() - request_started)
+        if response.status_code != HTTP_OK:
+            raise RuntimeError(url + " answered " + str(response.status_code))
+        queries += len(captured)
+    summary = latencySummary(latencies, time.perf_counter() - started)
+    summary["queries_per_request"] = round(queries / iterations, 2)
+    return summary
+
+def freePort() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def waitForServer(url : str, timeout : float = 30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            urllib.request.urlopen(url, timeout=1).read()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError("Server did not start at " + url)
+
+def loadServer(base_url : str, paths, concurrency : int, total : int) -> dict:
+    """
+    Helper method sending `total` GET requests over `paths`, in turn, from `concurrency` threads.
+    @return Throughput and latency figures for the run.
+    """
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+    counter = iter(range(total))
+
+    def worker():
+        while True:
+            with lock:
+                index = next(counter, None)
+            if index is None:
+                return
+            started = time.perf_counter()
+            try:
+                urllib.request.urlopen(base_url + paths[index % len(paths)], timeout=60).read()
+            except OSError as error:
+                with lock:
+                    errors.append(str(error))
+                continue
+            with lock:
+                latencies.append(time.perf_counter() - started)
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    return dict(
+        {"errors": len(errors), "seconds": round(elapsed, 3)},
+        **latencySummary(latencies, elapsed),
+    )
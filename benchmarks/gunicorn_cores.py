@@ -0,0 +1,111 @@
+"""
+Measures the throughput of gunicorn running with `gunicorn.conf.py` on 1 core, 2 cores and every core.
+
+Seeds a scratch SQLite database, then for each core count starts gunicorn restricted to that many cores, leaving
+`gunicorn.conf.py` to size its workers and threads, and loads it with concurrent GET requests. Each core count is also
+measured with the single sync worker gunicorn runs without a config, and `--threads` measures other thread counts per
+worker alongside the configured one. The load is sent from the cores gunicorn was not given, when there are any, and
+shares them otherwise. Results are printed as JSON.
+
+Run from the directory containing `manage.py`:
+    python benchmarks/gunicorn_cores.py --concurrency 32 --requests 3000
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+from common import BASE_DIR, freePort, loadServer, scratchEnvironment, seedDatabase, waitForServer
+
+PATHS = ("/", "/pizza/", "/pizza/?page=2", "/toppings/", "/pizza/1/", "/api/pizzas/?limit=50")
+
+def coreCounts(cores : list) -> list:
+    return sorted({1, min(2, len(cores)), len(cores)})
+
+def gunicornCommand(*options) -> list:
+    return [sys.executable, "-m", "gunicorn", *options, "PizzaShop.wsgi"]
+
+def configuredSizes(env : dict, server_cores : list) -> dict:
+    """
+    Helper method asking gunicorn how many workers and threads `gunicorn.conf.py` gives it on `server_cores`.
+    """
+    printed = subprocess.run(
+        gunicornCommand("--print-config"), cwd=BASE_DIR, env=env, capture_output=True, text=True, check=True,
+        preexec_fn=lambda: os.sched_setaffinity(0, server_cores),
+    ).stdout
+    settings = {}
+    for line in printed.splitlines():
+        name, _, value = line.partition(" = ")
+        settings[name.strip()] = value.strip()
+    return {"workers": int(settings["workers"]), "threads": int(settings["threads"])}
+
+def runServer(env : dict, server_cores : list, load_cores : list, args) -> dict:
+    """
+    Helper method starting gunicorn on `server_cores`, loading it from `load_cores` and shutting it down again.
+    """
+    port = freePort()
+    server = subprocess.Popen(
+        gunicornCommand("--bind", "127.0.0.1:" + str(port)), cwd=BASE_DIR, env=env,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        preexec_fn=lambda: os.sched_setaffinity(0, server_cores),
+    )
+    os.sched_setaffinity(0, load_cores)
+    try:
+        base_url = "http://127.0.0.1:" + str(port)
+        waitForServer(base_url + "/")
+        # Warm every worker up before measuring.
+        loadServer(base_url, PATHS, args.concurrency, args.concurrency * 4)
+        return loadServer(base_url, PATHS, args.concurrency, args.requests)
+    finally:
+        server.terminate()
+        server.wait()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=3000)
+    parser.add_argument("--threads", default="", help="Comma separated thread counts per worker to measure as well.")
+    parser.add_argument("--pizzas", type=int, default=2000)
+    parser.add_argument("--toppings", type=int, default=200)
+    parser.add_argument("--toppings-per-pizza", type=int, default=8)
+    args = parser.parse_args()
+
+    cores = sorted(os.sched_getaffinity(0))
+    with tempfile.TemporaryDirectory() as directory:
+        env = scratchEnvironment(directory)
+        # Every request should reach the database, so the page cache is turned off.
+        env["DJANGO_OVERVIEW_CACHE_TIMEOUT"] = "0"
+        for name in ("WEB_CONCURRENCY", "GUNICORN_THREADS", "GUNICORN_CMD_ARGS"):
+            env.pop(name, None)
+        seedDatabase(env, args.pizzas, args.toppings, args.toppings_per_pizza)
+
+        results = {
+            "cores_available": len(cores),
+            "concurrency": args.concurrency,
+            "pizzas": args.pizzas,
+            "toppings": args.toppings,
+            "runs": [],
+        }
+        setups = {
+            "gunicorn.conf.py": {},
+            # What the Procfile ran before it named gunicorn.conf.py.
+            "single sync worker": {"GUNICORN_CMD_ARGS": "--workers 1 --threads 1"},
+        }
+        for threads in filter(None, args.threads.split(",")):
+            setups["gunicorn.conf.py, " + threads + " threads"] = {"GUNICORN_THREADS": threads}
+        for count in coreCounts(cores):
+            server_cores = cores[:count]
+            load_cores = cores[count:] or cores
+            for setup, overrides in setups.items():
+                run_env = dict(env, **overrides)
+                run = dict({"cores": count, "setup": setup}, **configuredSizes(run_env, server_cores))
+                run.update(runServer(run_env, server_cores, load_cores, args))
+                results["runs"].append(run)
+                print(count, "cores,", setup + ",", run["workers"], "workers of", run["threads"], "threads:",
+                      run["requests_per_second"], "requests per second", file=sys.stderr)
+        print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,323 @@
+"""
+End-to-end latency benchmark for every URL in `PizzaManager/urls.py`.
+
+Seeds a menu of the requested size into a scratch SQLite database and drives each page through the Django test client,
+including every POST action of the topping and pizza editors. Any setup a request needs, such as a pizza to delete
+or a topping to add, is done before the clock starts. For each endpoint it reports p50, p95 and p99 latency,
+throughput and the number of queries run as JSON, so results can be stored and compared between runs.
+
+Run from the directory containing `manage.py`:
+    python benchmarks/http_suite.py --pizzas 10000 --toppings 2000 --toppings-per-pizza 8 --output results.json
+Pass `--database` to keep the seeded database between runs, and `--only` to run endpoints whose name contains a word.
+"""
+import argparse
+import datetime
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+from common import BASE_DIR, latencySummary, migrateDatabase, scratchEnvironment, seedDatabase
+
+HTTP_OK = 200
+HTTP_FOUND = 302
+
+class Endpoint:
+    """
+    One benchmarked request. `prepare(iteration)` does any untimed setup and returns the `(url, data)` to send.
+    `settings` are overridden while the requests are sent, for pages that change with a setting.
+    """
+    def __init__(self, name : str, method : str, prepare, expected_status : int = HTTP_OK, iterations : int = None,
+                 settings : dict = None):
+        self.name = name
+        self.method = method
+        self.prepare = prepare
+        self.expected_status = expected_status
+        self.iterations = iterations
+        self.settings = settings or {}
+
+def buildEndpoints(args) -> list:
+    """
+    Helper method listing every endpoint with the setup it needs, drawing pizzas and toppings from the seeded menu.
+    """
+    from django.urls import reverse
+    from PizzaManager.models import Topping, Pizza
+    from PizzaManager.pagination import encodeCursor
+
+    PizzaToppings = Pizza.toppings.through
+    pizza_ids = list(Pizza.objects.values_list("id", flat=True))
+    topping_ids = list(Topping.objects.values_list("id", flat=True))
+    pizza_pages = max(len(pizza_ids) // 5, 1)
+    topping_pages = max(len(topping_ids) // 10, 1)
+    run = str(int(time.time()))
+
+    def randomPizza():
+        return Pizza.objects.get(pk=random.choice(pizza_ids))
+
+    def randomTopping():
+        return Topping.objects.get(pk=random.choice(topping_ids))
+
+    def uniqueName(kind, iteration):
+        return "Bench " + kind + " " + run + " " + str(iteration)
+
+    def newTopping(iteration):
+        topping = Topping.objects.create(name=uniqueName("Topping", iteration))
+        PizzaToppings.objects.bulk_create([
+            PizzaToppings(pizza_id=pizza_id, topping_id=topping.id)
+            for pizza_id in random.sample(pizza_ids, min(args.toppings_per_pizza, len(pizza_ids)))
+        ])
+        return topping
+
+    def newPizza(iteration):
+        pizza = Pizza.objects.create(name=uniqueName("Pizza", iteration))
+        pizza.toppings.add(*random.sample(topping_ids, min(args.toppings_per_pizza, len(topping_ids))))
+        return pizza
+
+    def toppingChange(iteration):
+        pizza = randomPizza()
+        old_topping, new_topping = Topping.objects.filter(pk__in=random.sample(topping_ids, 2))
+        pizza.toppings.add(old_topping)
+        pizza.toppings.remove(new_topping)
+        return (reverse("PizzaManager:Pizza Editor", args=[pizza.id]), {
+            "pizza_topping_change": "",
+            "prior_topping": old_topping.name,
+            "toppings_options": new_topping.name,
+        })
+
+    def toppingAdd(iteration):
+        pizza = randomPizza()
+        topping = randomTopping()
+        pizza.toppings.remove(topping)
+        return (reverse("PizzaManager:Pizza Editor", args=[pizza.id]),
+                {"pizza_topping_add": "", "toppings_options": topping.name})
+
+    def toppingRemove(iteration):
+        pizza = randomPizza()
+        topping = randomTopping()
+        pizza.toppings.add(topping)
+        return (reverse("PizzaManager:Pizza Editor", args=[pizza.id]),
+                {"pizza_topping_delete": "", "deleted_topping": topping.name})
+
+    def batchEdit(iteration):
+        pizza = randomPizza()
+        added, removed, swapped_from, swapped_to = Topping.objects.filter(pk__in=random.sample(topping_ids, 4))
+        pizza.toppings.add(removed, swapped_from)
+        pizza.toppings.remove(added, swapped_to)
+        return (reverse("PizzaManager:Pizza Editor", args=[pizza.id]), {
+            "pizza_batch_edit": "",
+            "batch_new_name": uniqueName("Batch Pizza", iteration),
+            "batch_add": added.name,
+            "batch_remove": removed.name,
+            "batch_swap_from": swapped_from.name,
+            "batch_swap_to": swapped_to.name,
+        })
+
+    def toppingMerge(iteration):
+        # A new duplicate, on a few pizzas, folded into an existing topping.
+        return (reverse("PizzaManager:Toppings Editor", args=[newTopping(iteration).id]),
+                {"topping_merge": "", "merge_into": randomTopping().name})
+
+    def bulkEdit(action):
+        # Pizzas sharing the first word of a random pizza's name, a slice of the menu.
+        return lambda i: (reverse("PizzaManager:Toppings Editor", args=[random.choice(topping_ids)]),
+                          {action: "", "pizza_name_contains": randomPizza().name.split()[0]})
+
+    def keysetCursor(model, ids):
+        return encodeCursor(model.objects.get(pk=random.choice(ids)).name, 0)
+
+    def searchText(model, ids):
+        return model.objects.get(pk=random.choice(ids)).name[:3]
+
+    return [
+        Endpoint("index", "GET", lambda i: (reverse("PizzaManager:index"), None)),
+        Endpoint("toppings overview", "GET",
+                 lambda i: (reverse("PizzaManager:Toppings Overview"), {"page": random.randint(1, topping_pages)})),
+        Endpoint("toppings overview keyset", "GET",
+                 lambda i: (reverse("PizzaManager:Toppings Overview"), {"cursor": keysetCursor(Topping, topping_ids)})),
+        Endpoint("topping editor", "GET",
+                 lambda i: (reverse("PizzaManager:Toppings Editor", args=[random.choice(topping_ids)]), None)),
+        Endpoint("topping editor rename", "POST",
+                 lambda i: (reverse("PizzaManager:Toppings Editor", args=[random.choice(topping_ids)]),
+                            {"topping_name_change": "", "new_name": uniqueName("Renamed Topping", i)}),
+                 HTTP_FOUND),
+        Endpoint("topping editor delete", "POST",
+                 lambda i: (reverse("PizzaManager:Toppings Editor", args=[newTopping(i).id]), {"topping_delete": ""}),
+                 HTTP_FOUND),
+        Endpoint("topping editor merge", "POST", toppingMerge, HTTP_FOUND),
+        Endpoint("topping editor bulk add", "POST", bulkEdit("topping_bulk_add"), HTTP_FOUND),
+        Endpoint("topping editor bulk remove", "POST", bulkEdit("topping_bulk_remove"), HTTP_FOUND),
+        Endpoint("topping create", "GET", lambda i: (reverse("PizzaManager:Topping Create"), None)),
+        Endpoint("topping create submit", "POST",
+                 lambda i: (reverse("PizzaManager:Topping Create"),
+                            {"topping_new": "", "new_topping_name": uniqueName("New Topping", i)}),
+                 HTTP_FOUND),
+        Endpoint("topping create cancel", "POST",
+                 lambda i: (reverse("PizzaManager:Topping Create"), {"cancel_topping_new": ""}), HTTP_FOUND),
+        Endpoint("pizza overview", "GET",
+                 lambda i: (reverse("PizzaManager:Pizza Overview"), {"page": random.randint(1, pizza_pages)})),
+        Endpoint("pizza overview keyset", "GET",
+                 lambda i: (reverse("PizzaManager:Pizza Overview"), {"cursor": keysetCursor(Pizza, pizza_ids)})),
+        Endpoint("pizza editor", "GET",
+                 lambda i: (reverse("PizzaManager:Pizza Editor", args=[random.choice(pizza_ids)]), None)),
+        Endpoint("pizza editor typeahead", "GET",
+                 lambda i: (reverse("PizzaManager:Pizza Editor", args=[random.choice(pizza_ids)]), None),
+                 settings={"TOPPING_TYPEAHEAD": True}),
+        Endpoint("pizza editor rename", "POST",
+                 lambda i: (reverse("PizzaManager:Pizza Editor", args=[random.choice(pizza_ids)]),
+                            {"pizza_name_change": "", "new_name": uniqueName("Renamed Pizza", i)}),
+                 HTTP_FOUND),
+        Endpoint("pizza editor delete", "POST",
+                 lambda i: (reverse("PizzaManager:Pizza Editor", args=[newPizza(i).id]), {"pizza_delete": ""}),
+                 HTTP_FOUND),
+        Endpoint("pizza editor add topping", "POST", toppingAdd, HTTP_FOUND),
+        Endpoint("pizza editor change topping", "POST", toppingChange, HTTP_FOUND),
+        Endpoint("pizza editor remove topping", "POST", toppingRemove, HTTP_FOUND),
+        Endpoint("pizza editor batch edit", "POST", batchEdit, HTTP_FOUND),
+        Endpoint("pizza editor clone", "POST",
+                 lambda i: (reverse("PizzaManager:Pizza Editor", args=[random.choice(pizza_ids)]),
+                            {"pizza_clone": "", "clone_name": uniqueName("Clone", i)}),
+                 HTTP_FOUND),
+        Endpoint("pizza create", "GET", lambda i: (reverse("PizzaManager:Pizza Create"), None)),
+        Endpoint("pizza create submit", "POST",
+                 lambda i: (reverse("PizzaManager:Pizza Create"), {
+                     "pizza_new": "",
+                     "new_pizza_name": uniqueName("New Pizza", i),
+                     "toppings_options": list(Topping.objects.filter(
+                         pk__in=random.sample(topping_ids, min(args.toppings_per_pizza, len(topping_ids)))
+                     ).values_list("name", flat=True)),
+                 }),
+                 HTTP_FOUND),
+        Endpoint("pizza create cancel", "POST",
+                 lambda i: (reverse("PizzaManager:Pizza Create"), {"cancel_pizza_new": ""}), HTTP_FOUND),
+        Endpoint("menu export csv", "GET",
+                 lambda i: (reverse("PizzaManager:Menu Export"), {"format": "csv"}),
+                 iterations=args.export_iterations),
+        Endpoint("menu export jsonl", "GET",
+                 lambda i: (reverse("PizzaManager:Menu Export"), {"format": "jsonl"}),
+                 iterations=args.export_iterations),
+        Endpoint("pizza api", "GET",
+                 lambda i: (reverse("PizzaManager:Pizza API"), {"cursor": keysetCursor(Pizza, pizza_ids)})),
+        Endpoint("toppings api", "GET",
+                 lambda i: (reverse("PizzaManager:Toppings API"), {"cursor": keysetCursor(Topping, topping_ids)})),
+        Endpoint("topping usage", "GET",
+                 lambda i: (reverse("PizzaManager:Topping Usage", args=[random.choice(topping_ids)]), None)),
+        Endpoint("topping usage api", "GET",
+                 lambda i: (reverse("PizzaManager:Topping Usage API", args=[random.choice(topping_ids)]), None)),
+        Endpoint("topping search", "GET",
+                 lambda i: (reverse("PizzaManager:Topping Search"), {"q": searchText(Topping, topping_ids)})),
+        Endpoint("menu search pizzas", "GET",
+                 lambda i: (reverse("PizzaManager:Menu Search"), {"kind": "pizzas", "q": searchText(Pizza, pizza_ids)})),
+        Endpoint("menu search toppings", "GET",
+                 lambda i: (reverse("PizzaManager:Menu Search"),
+                            {"kind": "toppings", "q": searchText(Topping, topping_ids)})),
+        Endpoint("metrics", "GET", lambda i: (reverse("PizzaManager:Metrics"), None)),
+    ]
+
+def runEndpoint(client, endpoint : Endpoint, iterations : int) -> dict:
+    """
+    Helper method sending `iterations` requests to one endpoint, timing each one and counting its queries.
+    """
+    from django.db import connection
+    from django.test import override_settings
+    from django.test.utils import CaptureQueriesContext
+
+    latencies = []
+    queries = []
+    errors = 0
+    for iteration in range(iterations):
+        url, data = endpoint.prepare(iteration)
+        send = client.get if endpoint.method == "GET" else client.post
+        with override_settings(**endpoint.settings), CaptureQueriesContext(connection) as captured:
+            started = time.perf_counter()
+            response = send(url, data)
+            if response.streaming:
+                b"".join(response.streaming_content)
+            latencies.append(time.perf_counter() - started)
+        queries.append(len(captured))
+        if response.status_code != endpoint.expected_status:
+            errors += 1
+
+    summary = latencySummary(latencies, sum(latencies))
+    summary.update({
+        "method": endpoint.method,
+        "errors": errors,
+        "mean_ms": round(sum(latencies) / len(latencies) * 1000, 2),
+        "queries": {"min": min(queries), "max": max(queries), "mean": round(sum(queries) / len(queries), 2)},
+    })
+    return summary
+
+def gitRevision() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=BASE_DIR, capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pizzas", type=int, default=10000)
+    parser.add_argument("--toppings", type=int, default=2000)
+    parser.add_argument("--toppings-per-pizza", type=int, default=8)
+    parser.add_argument("--iterations", type=int, default=100, help="Requests per endpoint.")
+    parser.add_argument("--export-iterations", type=int, default=3, help="Requests per menu export format.")
+    parser.add_argument("--database", help="SQLite file to seed once and reuse on later runs.")
+    parser.add_argument("--only", help="Only run endpoints whose name contains this text.")
+    parser.add_argument("--no-cache", action="store_true", help="Turn off the overview page cache.")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed choosing the pizzas and toppings used.")
+    parser.add_argument("--output", help="Write the JSON report to this file instead of standard output.")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        db_path = os.path.abspath(args.database) if args.database else None
+        env = scratchEnvironment(directory, db_path)
+        if args.no_cache:
+            env["DJANGO_OVERVIEW_CACHE_TIMEOUT"] = "0"
+        # The test client sends no credentials, so the metrics endpoint is left open.
+        env.pop("DJANGO_METRICS_TOKEN", None)
+        if db_path and os.path.exists(db_path):
+            migrateDatabase(env)
+        else:
+            seedDatabase(env, args.pizzas, args.toppings, args.toppings_per_pizza)
+
+        os.environ.update(env)
+        sys.path[:0] = env["PYTHONPATH"].split(os.pathsep)
+        import django
+        django.setup()
+        from django.db import connection
+        from django.test import Client
+        from PizzaManager.models import Topping, Pizza
+
+        random.seed(args.seed)
+        client = Client(HTTP_HOST="127.0.0.1")
+        report = {
+            "started": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            "revision": gitRevision(),
+            "menu": {
+                "pizzas": Pizza.objects.count(),
+                "toppings": Topping.objects.count(),
+                "links": Pizza.toppings.through.objects.count(),
+            },
+            "iterations": args.iterations,
+            "page_cache": not args.no_cache,
+            "endpoints": {},
+        }
+        for endpoint in buildEndpoints(args):
+            if args.only and args.only not in endpoint.name:
+                continue
+            iterations = endpoint.iterations or args.iterations
+            report["endpoints"][endpoint.name] = runEndpoint(client, endpoint, iterations)
+            print(endpoint.name, report["endpoints"][endpoint.name]["p50_ms"], "ms p50", file=sys.stderr)
+        connection.close()
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as output_file:
+            output_file.write(output + "\n")
+    else:
+        print(output)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Measures `/api/search` over pizza and topping names, through the FTS5 index and through the `LIKE` fallback used when
+`FULL_TEXT_SEARCH` is off or the database has no FTS5.
+
+Seeds a menu of the requested size into a scratch SQLite database, migrating a reused one first, then reports as JSON
+how many names each search matches and its p50, p95 and p99 latency and queries per request, both ways. The searches
+range from a single letter, which matches a large share of the menu, to a full name.
+
+Run from the directory containing `manage.py`:
+    python benchmarks/menu_search.py --pizzas 100000 --toppings 2000 --toppings-per-pizza 8
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+
+from common import measureRequests, migrateDatabase, scratchEnvironment, seedDatabase
+
+SEARCHES = {
+    "pizzas, one letter": ("pizzas", "c"),
+    "pizzas, one common word": ("pizzas", "classic"),
+    "pizzas, two word prefixes": ("pizzas", "spicy diav"),
+    "pizzas, full name": ("pizzas", "Classic Bianca 10110"),
+    "pizzas, no match": ("pizzas", "zucchini"),
+    "toppings, two word prefixes": ("toppings", "smoked ol"),
+}
+
+def countMatches(connection, table : str, words : list) -> int:
+    """
+    Helper method counting every name a search matches, past the ones it ranks.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT COUNT(*) FROM "' + table + '" WHERE "' + table + '" MATCH %s',
+            [" ".join('"' + word + '"*' for word in words)],
+        )
+        return cursor.fetchone()[0]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pizzas", type=int, default=100000)
+    parser.add_argument("--toppings", type=int, default=2000)
+    parser.add_argument("--toppings-per-pizza", type=int, default=8)
+    parser.add_argument("--iterations", type=int, default=100, help="Requests per search and mode.")
+    parser.add_argument("--database", help="SQLite file to seed once and reuse on later runs.")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        db_path = os.path.abspath(args.database) if args.database else None
+        env = scratchEnvironment(directory, db_path)
+        if db_path and os.path.exists(db_path):
+            migrateDatabase(env)
+        else:
+            seedDatabase(env, args.pizzas, args.toppings, args.toppings_per_pizza)
+
+        os.environ.update(env)
+        sys.path[:0] = env["PYTHONPATH"].split(os.pathsep)
+        import django
+        django.setup()
+        from django.db import connection
+        from django.http import QueryDict
+        from django.test import Client, override_settings
+        from django.urls import reverse
+        from PizzaManager.models import Topping, Pizza
+        from PizzaManager.search import searchWords
+
+        report = {
+            "menu": {"pizzas": Pizza.objects.count(), "toppings": Topping.objects.count()},
+            "iterations": args.iterations,
+            "searches": {},
+        }
+        client = Client(HTTP_HOST="127.0.0.1")
+        search = reverse("PizzaManager:Menu Search")
+        for name, (kind, text) in SEARCHES.items():
+            query = QueryDict(mutable=True)
+            query.update({"kind": kind, "q": text})
+            model = Pizza if kind == "pizzas" else Topping
+            # Conditional GETs are not sent, so every request runs the search.
+            urls = [search + "?" + query.urlencode()]
+            matches = countMatches(connection, model._meta.db_table + "_search", searchWords(text))
+            with override_settings(FULL_TEXT_SEARCH=True):
+                full_text = measureRequests(client, urls, args.iterations)
+            with override_settings(FULL_TEXT_SEARCH=False):
+                like = measureRequests(client, urls, args.iterations)
+            report["searches"][name] = {"q": text, "matches": matches, "fts5": full_text, "like": like}
+            print(name, matches, "matches,", full_text["p50_ms"], "ms p50 with FTS5,", like["p50_ms"], "ms with LIKE",
+                  file=sys.stderr)
+        connection.close()
+
+    print(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    main()
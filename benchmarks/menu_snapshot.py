@@ -0,0 +1,112 @@
+"""
+Compares the chef screens served from the in-process menu snapshot (`MENU_SNAPSHOT`) with the same screens served
+through the ORM.
+
+Seeds a menu of the requested size into a scratch SQLite database, then reports as JSON:
+- the memory the snapshot holds, in total and per 100,000 pizzas, measured with `tracemalloc`;
+- how long a full load takes, and how long a refresh takes after one pizza changes;
+- p50, p95 and p99 latency and queries per request for the pizza overview and `/api/pizzas/`, both ways.
+The overview page cache is turned off, so every request renders its page.
+
+Run from the directory containing `manage.py`:
+    python benchmarks/menu_snapshot.py --pizzas 100000 --toppings 2000 --toppings-per-pizza 8
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from common import measureRequests, scratchEnvironment, seedDatabase
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pizzas", type=int, default=100000)
+    parser.add_argument("--toppings", type=int, default=2000)
+    parser.add_argument("--toppings-per-pizza", type=int, default=8)
+    parser.add_argument("--iterations", type=int, default=200, help="Requests per endpoint and mode.")
+    parser.add_argument("--database", help="SQLite file to seed once and reuse on later runs.")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed choosing the pages requested.")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        db_path = os.path.abspath(args.database) if args.database else None
+        env = scratchEnvironment(directory, db_path)
+        env["DJANGO_OVERVIEW_CACHE_TIMEOUT"] = "0"
+        if not (db_path and os.path.exists(db_path)):
+            seedDatabase(env, args.pizzas, args.toppings, args.toppings_per_pizza)
+
+        os.environ.update(env)
+        sys.path[:0] = env["PYTHONPATH"].split(os.pathsep)
+        import django
+        django.setup()
+        from django.db import connection
+        from django.test import Client, override_settings
+        from django.urls import reverse
+        from PizzaManager.models import Topping, Pizza
+        from PizzaManager.snapshot import MenuSnapshot, dropMenuSnapshot, menuSnapshot
+        from PizzaManager.versioning import versionsStamp
+
+        random.seed(args.seed)
+        pizzas = Pizza.objects.count()
+        report = {
+            "menu": {
+                "pizzas": pizzas,
+                "toppings": Topping.objects.count(),
+                "links": Pizza.toppings.through.objects.count(),
+            },
+            "iterations": args.iterations,
+        }
+
+        started = time.perf_counter()
+        MenuSnapshot.load(versionsStamp())
+        load_seconds = time.perf_counter() - started
+        # Loaded again to measure memory, as tracing every allocation slows loading down several times over.
+        tracemalloc.start()
+        snapshot = MenuSnapshot.load(versionsStamp())
+        held, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        report["snapshot"] = {
+            "load_ms": round(load_seconds * 1000, 1),
+            "memory_mb": round(held / 2 ** 20, 1),
+            "memory_mb_per_100k_pizzas": round(held / 2 ** 20 * 100000 / max(pizzas, 1), 1),
+            "peak_while_loading_mb": round(peak / 2 ** 20, 1),
+        }
+        del snapshot
+
+        client = Client(HTTP_HOST="127.0.0.1")
+        overview = reverse("PizzaManager:Pizza Overview")
+        api = reverse("PizzaManager:Pizza API")
+        pages = max(pizzas // 5, 1)
+        endpoints = {
+            "pizza overview": [overview + "?page=" + str(random.randint(1, pages)) for _ in range(50)],
+            "pizza api": [api + "?limit=50"],
+        }
+        report["endpoints"] = {}
+        for name, urls in endpoints.items():
+            with override_settings(MENU_SNAPSHOT=False):
+                orm = measureRequests(client, urls, args.iterations)
+            with override_settings(MENU_SNAPSHOT=True):
+                dropMenuSnapshot()
+                menuSnapshot()
+                from_snapshot = measureRequests(client, urls, args.iterations)
+            report["endpoints"][name] = {"orm": orm, "snapshot": from_snapshot}
+            print(name, orm["p50_ms"], "ms p50 through the ORM,", from_snapshot["p50_ms"], "ms from the snapshot",
+                  file=sys.stderr)
+
+        # One pizza renamed by another request, then picked up by the next one to read the snapshot.
+        pizza = Pizza.objects.order_by("?").first()
+        pizza.name = pizza.name + " Renamed"
+        pizza.save()
+        started = time.perf_counter()
+        menuSnapshot()
+        report["snapshot"]["refresh_after_one_change_ms"] = round((time.perf_counter() - started) * 1000, 1)
+        connection.close()
+
+    print(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    main()
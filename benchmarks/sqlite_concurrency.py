@@ -0,0 +1,115 @@
+"""
+Measures mixed read/write throughput on SQLite with its default settings and with `settings.SQLITE_PRAGMAS`.
+
+For each configuration a fresh scratch database is seeded. Reader processes then page through the pizza overview
+query while writer processes add and remove pizza toppings and rename toppings through the ORM, the same way the
+editors do. Completed reads, writes and "database is locked" failures are printed as JSON.
+
+Run from the directory containing `manage.py`:
+    python benchmarks/sqlite_concurrency.py --readers 8 --writers 2 --seconds 10
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+
+from common import scratchEnvironment, seedDatabase
+
+# SQLite's own defaults: a rollback journal, full syncs, Django's deferred transactions and only Python's built in
+# five second lock timeout.
+DEFAULT_PRAGMAS = {
+    "DJANGO_SQLITE_TRANSACTION_MODE": "DEFERRED",
+    "DJANGO_SQLITE_JOURNAL_MODE": "DELETE",
+    "DJANGO_SQLITE_SYNCHRONOUS": "",
+    "DJANGO_SQLITE_BUSY_TIMEOUT": "",
+    "DJANGO_SQLITE_MMAP_SIZE": "",
+    "DJANGO_SQLITE_CACHE_SIZE": "",
+}
+
+def runWorker(role : str, env : dict, seconds : float, results):
+    """
+    Body of one reader or writer process. Puts `(role, completed, locked)` on `results` when time is up.
+    """
+    os.environ.update(env)
+    sys.path[:0] = env["PYTHONPATH"].split(os.pathsep)
+
+    import django
+    django.setup()
+    from django.db import OperationalError, connection
+    from PizzaManager.models import Topping, Pizza
+
+    pizza_ids = list(Pizza.objects.values_list("id", flat=True))
+    topping_ids = list(Topping.objects.values_list("id", flat=True))
+    completed = 0
+    locked = 0
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        try:
+            if role == "reader":
+                offset = random.randrange(max(len(pizza_ids) - 10, 1))
+                list(Pizza.objects.with_toppings().order_by("name")[offset:offset + 10])
+                Pizza.objects.count()
+            else:
+                pizza = Pizza.objects.get(pk=random.choice(pizza_ids))
+                topping_id = random.choice(topping_ids)
+                pizza.toppings.add(topping_id)
+                pizza.toppings.remove(topping_id)
+                topping = Topping.objects.get(pk=random.choice(topping_ids))
+                # Seeded topping names are a style, a word and a number; the number is replaced with one unique
+                # to this writer.
+                topping.name = " ".join(topping.name.split()[:2] + [str(os.getpid()), str(completed)])
+                topping.save()
+            completed += 1
+        except OperationalError as error:
+            if "locked" not in str(error):
+                raise
+            locked += 1
+    connection.close()
+    results.put((role, completed, locked))
+
+def runConfiguration(env : dict, args) -> dict:
+    """
+    Helper method running the readers and writers against one database configuration.
+    @return Throughput and lock failures per role.
+    """
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    roles = ["reader"] * args.readers + ["writer"] * args.writers
+    processes = [context.Process(target=runWorker, args=(role, env, args.seconds, results)) for role in roles]
+    for process in processes:
+        process.start()
+    totals = {role: {"operations": 0, "locked": 0} for role in ("reader", "writer")}
+    for _ in processes:
+        role, completed, locked = results.get()
+        totals[role]["operations"] += completed
+        totals[role]["locked"] += locked
+    for process in processes:
+        process.join()
+    for role in totals.values():
+        role["per_second"] = round(role["operations"] / args.seconds, 1)
+    return {"reads": totals["reader"], "writes": totals["writer"]}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--writers", type=int, default=2)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--pizzas", type=int, default=2000)
+    parser.add_argument("--toppings", type=int, default=200)
+    parser.add_argument("--toppings-per-pizza", type=int, default=8)
+    args = parser.parse_args()
+
+    results = {"readers": args.readers, "writers": args.writers, "seconds": args.seconds}
+    for name, overrides in (("sqlite_defaults", DEFAULT_PRAGMAS), ("tuned", {})):
+        with tempfile.TemporaryDirectory() as directory:
+            env = dict(scratchEnvironment(directory), **overrides)
+            seedDatabase(env, args.pizzas, args.toppings, args.toppings_per_pizza)
+            results[name] = runConfiguration(env, args)
+    print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Measures the pizza overview and `/api/pizzas/` filtered by the `all_of`, `any_of` and `none_of` topping filters.
+
+Seeds a menu of the requested size into a scratch SQLite database, then requests filters that match few pizzas
+(selective) and filters that match most of them (non-selective). The toppings are picked by how many pizzas use them.
+For each filter it reports how many pizzas match, and the p50, p95 and p99 latency and queries per request for the
+first numbered overview page (which counts the matches), a keyset overview page and a 50 pizza API page, as JSON.
+The overview page cache is turned off, so every request runs its queries. `--snapshot` serves the same requests from
+the menu snapshot instead, reporting separately how long the first filtered request took to gather the pizzas of every
+topping.
+
+Run from the directory containing `manage.py`:
+    python benchmarks/topping_filters.py --pizzas 100000 --toppings 2000 --toppings-per-pizza 8
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+from common import measureRequests, scratchEnvironment, seedDatabase
+
+def buildFilters(popular : list, rare : list) -> dict:
+    """
+    Helper method naming the filters to measure.
+    @param popular: Topping ids, most used first.
+    @param rare: Topping ids, least used first.
+    @return Filter name to query parameters.
+    """
+    def ids(topping_ids):
+        return ",".join(str(topping_id) for topping_id in topping_ids)
+
+    return {
+        "selective all_of 2 toppings": {"all_of": ids(popular[:2])},
+        "selective any_of 2 rare toppings": {"any_of": ids(rare[:2])},
+        "selective all_of 1, none_of 1": {"all_of": ids(rare[:1]), "none_of": ids(popular[:1])},
+        "non-selective none_of 1 topping": {"none_of": ids(popular[:1])},
+        "non-selective any_of 50 toppings": {"any_of": ids(popular[:50])},
+        "non-selective any_of 50, none_of 5": {"any_of": ids(popular[:50]), "none_of": ids(popular[50:55])},
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pizzas", type=int, default=100000)
+    parser.add_argument("--toppings", type=int, default=2000)
+    parser.add_argument("--toppings-per-pizza", type=int, default=8)
+    parser.add_argument("--iterations", type=int, default=50, help="Requests per filter and endpoint.")
+    parser.add_argument("--database", help="SQLite file to seed once and reuse on later runs.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--snapshot", action="store_true", help="Serve the requests from the menu snapshot.")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        db_path = os.path.abspath(args.database) if args.database else None
+        env = scratchEnvironment(directory, db_path)
+        env["DJANGO_OVERVIEW_CACHE_TIMEOUT"] = "0"
+        env["DJANGO_MENU_SNAPSHOT"] = str(args.snapshot)
+        if not (db_path and os.path.exists(db_path)):
+            seedDatabase(env, args.pizzas, args.toppings, args.toppings_per_pizza)
+
+        os.environ.update(env)
+        sys.path[:0] = env["PYTHONPATH"].split(os.pathsep)
+        import django
+        django.setup()
+        from django.db import connection
+        from django.db.models import Count
+        from django.http import QueryDict
+        from django.test import Client
+        from django.urls import reverse
+        from PizzaManager.models import Topping, Pizza
+
+        random.seed(args.seed)
+        usage = list(
+            Pizza.toppings.through.objects.values("topping_id").annotate(pizzas=Count("pizza_id"))
+            .order_by("-pizzas", "topping_id").values_list("topping_id", flat=True)
+        )
+        report = {
+            "menu": {
+                "pizzas": Pizza.objects.count(),
+                "toppings": Topping.objects.count(),
+                "links": Pizza.toppings.through.objects.count(),
+            },
+            "iterations": args.iterations,
+            "snapshot": args.snapshot,
+            "filters": {},
+        }
+
+        client = Client(HTTP_HOST="127.0.0.1")
+        overview = reverse("PizzaManager:Pizza Overview")
+        api = reverse("PizzaManager:Pizza API")
+        if args.snapshot:
+            client.get(overview)
+            started = time.perf_counter()
+            client.get(overview + "?all_of=" + str(usage[0]))
+            report["first filtered request ms"] = round((time.perf_counter() - started) * 1000, 1)
+        for name, params in buildFilters(usage, usage[::-1]).items():
+            query = QueryDict(mutable=True)
+            query.update(params)
+            query = query.urlencode()
+            matches = Pizza.objects.with_topping_filter(**{
+                key: [int(topping_id) for topping_id in value.split(",")] for key, value in params.items()
+            }).count()
+            report["filters"][name] = {
+                "params": params,
+                "matches": matches,
+                "overview page": measureRequests(client, [overview + "?" + query], args.iterations),
+                "overview keyset page": measureRequests(client, [overview + "?cursor=&" + query], args.iterations),
+                "api page": measureRequests(client, [api + "?limit=50&" + query], args.iterations),
+            }
+            print(name, matches, "matches,", report["filters"][name]["overview page"]["p50_ms"], "ms p50 overview",
+                  file=sys.stderr)
+        connection.close()
+
+    print(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Gunicorn settings for serving PizzaShop. Gunicorn reads them from `gunicorn.conf.py` in the directory it starts in,
+and the Procfile also names this file. Command line flags and `GUNICORN_CMD_ARGS` still override anything set here.
+
+Workers and threads are sized from the cores the server may run on:
+- `WEB_CONCURRENCY` sets the number of worker processes, 2 per core plus 1 by default. With `DJANGO_MENU_SNAPSHOT` on
+  it is 1 per core plus 1, as every worker holds its own copy of the menu.
+- `GUNICORN_THREADS` sets the threads per worker. Pages are built on the CPU, where threads of one worker take turns,
+  so by default each worker has 1 thread. With `DJANGO_MENU_SNAPSHOT` on, workers have 2 threads to make up for there
+  being fewer of them.
+- `GUNICORN_MAX_REQUESTS` and `GUNICORN_MAX_REQUESTS_JITTER` restart each worker after 2000 to 2200 requests, which
+  bounds how far its memory can grow. The jitter keeps workers from all restarting at once. 0 turns restarts off.
+- `GUNICORN_TIMEOUT` sets the seconds a worker may spend on one request before it is restarted, 30 by default.
+- `GUNICORN_PRELOAD` set to "False" loads the app in every worker instead of once before forking.
+
+Workers only see each other's changes to the menu through the cache, which drops stale overview pages, topping name
+lookups and menu snapshots, and only add up their metrics through files in `PROMETHEUS_MULTIPROC_DIR`. With more than
+one worker, `DJANGO_CACHE_DIR` and `PROMETHEUS_MULTIPROC_DIR` therefore default to new temporary directories, removed
+again when gunicorn exits. Gunicorn refuses to start more than one worker without them, for example when `--workers`
+on the command line raises the count after this file has been read.
+"""
+import atexit
+import os
+import shutil
+import tempfile
+
+def cpuCount() -> int:
+    """
+    Helper method counting the cores this process may run on. Unlike `os.cpu_count`, it follows CPU sets given to a
+    container or set with `taskset`.
+    """
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+CPUS = cpuCount()
+
+MENU_SNAPSHOT = os.environ.get("DJANGO_MENU_SNAPSHOT", "") == "True"
+
+workers = int(os.environ.get("WEB_CONCURRENCY", CPUS + 1 if MENU_SNAPSHOT else CPUS * 2 + 1))
+threads = int(os.environ.get("GUNICORN_THREADS", 2 if MENU_SNAPSHOT else 1))
+
+# Settings that must be shared by every worker, for the cache and the metrics.
+SHARED_DIRECTORIES = (("DJANGO_CACHE_DIR", "pizzamanager-cache-"), ("PROMETHEUS_MULTIPROC_DIR", "pizzamanager-metrics-"))
+# Directories made here, to be removed when the process that made them exits.
+CREATED_DIRECTORIES = []
+CREATED_BY = os.getpid()
+
+def removeCreatedDirectories():
+    # Workers are forked from the master and run its exit handlers too, so only the master removes anything.
+    if os.getpid() == CREATED_BY:
+        for directory in CREATED_DIRECTORIES:
+            shutil.rmtree(directory, ignore_errors=True)
+
+# Also covers runs that read this file but never start the server, such as `--print-config`.
+atexit.register(removeCreatedDirectories)
+
+if workers > 1:
+    # Set before the app is loaded, as Django reads DJANGO_CACHE_DIR and prometheus_client reads
+    # PROMETHEUS_MULTIPROC_DIR when first imported.
+    for variable, prefix in SHARED_DIRECTORIES:
+        if not os.environ.get(variable):
+            os.environ[variable] = tempfile.mkdtemp(prefix=prefix)
+            CREATED_DIRECTORIES.append(os.environ[variable])
+
+# Loads Django and the project's modules once in the master, so forked workers share their memory and start quickly.
+preload_app = os.environ.get("GUNICORN_PRELOAD", "") != "False"
+
+max_requests = int(os.environ.get("GUNICORN_MAX_REQUESTS", 2000))
+max_requests_jitter = int(os.environ.get("GUNICORN_MAX_REQUESTS_JITTER", 200))
+
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", 30))
+graceful_timeout = 30
+keepalive = 5
+
+# Workers report that they are alive by touching a file. Memory backed files keep a slow disk from looking like a
+# hung worker.
+if os.path.isdir("/dev/shm"):
+    worker_tmp_dir = "/dev/shm"
+
+def on_starting(server):
+    missing = [variable for variable, _ in SHARED_DIRECTORIES if not os.environ.get(variable)]
+    if server.cfg.workers > 1 and missing:
+        raise RuntimeError(
+            "Set " + " and ".join(missing) + " to directories every worker can write to, or run a single worker. "
+            "Without them workers serve each other's stale pages and report only their own metrics."
+        )
+
+def on_exit(server):
+    removeCreatedDirectories()
+
+def post_fork(server, worker):
+    # A worker must not share a database connection with the master or its siblings. Django opens connections when
+    # first used, so closing any copied from the master leaves each worker to open its own.
+    from django.db import connections
+    connections.close_all()
+
+def child_exit(server, worker):
+    # Drops the exited worker's live gauges from the metrics shared through PROMETHEUS_MULTIPROC_DIR. Its counters and
+    # histograms stay in the totals.
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)